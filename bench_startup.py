@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the GUI launch.
+
+Measures what happens before the main window shows:
+- import time of every module loaded by main.py (python -X importtime)
+- time to first frame: from starting the interpreter until the window is drawn
+
+Modules that should load on first use (extractor, settings, yaml) are reported
+if they show up at startup. Use --json to record the numbers, and --budget-ms
+to fail when the import time grows past a limit.
+
+Usage: python bench_startup.py [--runs N] [--top N] [--json] [--budget-ms MS]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that must not be imported before the main window shows
+LAZY_MODULES = ['extractor', 'settings', 'yaml', 'skeleton', 'minifier']
+
+FIRST_FRAME_SCRIPT = """
+import sys, time
+start = float(sys.argv[1])
+sys.path.insert(0, sys.argv[2])
+from config import ConfigManager
+from gui import FileStructureGUI
+app = FileStructureGUI(ConfigManager())
+app.root.update()
+print(time.time() - start)
+app.root.destroy()
+"""
+
+
+def clean_env(home):
+    """Environment with an empty home directory, so no user config is loaded"""
+    env = dict(os.environ)
+    env['HOME'] = home
+    env['USERPROFILE'] = home
+    env.pop('PYTHONPROFILEIMPORTTIME', None)
+    return env
+
+
+def parse_importtime(stderr):
+    """Parse -X importtime output into {module: (self_us, cumulative_us)} and the total in microseconds"""
+    modules = {}
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+        # Only top-level imports add to the total; nested ones are inside their parent's time
+        if not name.startswith('  '):
+            total += int(cumulative_us)
+    return modules, total
+
+
+def measure_imports(runs, env):
+    """Best of several runs of importing main.py, as ({module: (self_us, cumulative_us)}, total_us)"""
+    best = None
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                                cwd=REPO_DIR, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing main.py failed:\n{result.stderr}")
+        modules, total = parse_importtime(result.stderr)
+        if best is None or total < best[1]:
+            best = (modules, total)
+    return best
+
+
+def measure_first_frame(runs, env):
+    """Best time to first frame in seconds, or None when no display is available"""
+    best = None
+    for _ in range(runs):
+        start = time.time()
+        result = subprocess.run([sys.executable, '-c', FIRST_FRAME_SCRIPT, str(start), REPO_DIR],
+                                cwd=REPO_DIR, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            if 'TclError' in result.stderr:
+                return None
+            raise RuntimeError(f"Starting the GUI failed:\n{result.stderr}")
+        elapsed = float(result.stdout.strip().splitlines()[-1])
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure GUI startup: import time and time to first frame")
+    parser.add_argument('--runs', type=int, default=5, help="runs per measurement, the best is reported")
+    parser.add_argument('--top', type=int, default=15, help="slowest modules to list")
+    parser.add_argument('--json', action='store_true', help="print the results as JSON")
+    parser.add_argument('--budget-ms', type=float,
+                        help="exit with status 1 when the import time is above this many milliseconds")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        env = clean_env(home)
+        modules, total_us = measure_imports(args.runs, env)
+        first_frame = measure_first_frame(args.runs, env)
+
+    slowest = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+    eager = [name for name in LAZY_MODULES if name in modules]
+
+    if args.json:
+        print(json.dumps({
+            "import_ms": round(total_us / 1000, 1),
+            "first_frame_ms": None if first_frame is None else round(first_frame * 1000, 1),
+            "modules": len(modules),
+            "eager_lazy_modules": eager,
+            "slowest": [{"module": name, "self_ms": round(self_us / 1000, 1),
+                         "cumulative_ms": round(cumulative_us / 1000, 1)}
+                        for name, (self_us, cumulative_us) in slowest]
+        }, indent=2))
+    else:
+        print(f"Import time (main.py): {total_us / 1000:.1f} ms, {len(modules)} modules")
+        if first_frame is None:
+            print("Time to first frame:   skipped (no display)")
+        else:
+            print(f"Time to first frame:   {first_frame * 1000:.1f} ms")
+        print("\nSlowest imports (cumulative):")
+        for name, (self_us, cumulative_us) in slowest:
+            print(f"  {cumulative_us / 1000:>8.1f} ms  {self_us / 1000:>7.1f} ms self  {name}")
+        if eager:
+            print(f"\nLoaded at startup but meant to be lazy: {', '.join(eager)}")
+
+    if eager or (args.budget_ms is not None and total_us / 1000 > args.budget_ms):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class ScanCache:
+    """Directory listings reused across scans while the directory is unchanged.
+
+    Listings are validated against the directory's modification time, which changes whenever
+    entries are added, removed or renamed. File sizes are not cached, since editing a file in
+    place leaves its directory's modification time unchanged.
+    """
+
+    def __init__(self, max_directories=50000):
+        self.max_directories = max_directories
+        self.listings = {}
+        self.lock = threading.Lock()
+
+    def list_directory(self, path):
+        """List a directory, using the cached listing if the directory is unchanged"""
+        mtime = os.stat(path).st_mtime_ns
+        cached = self.listings.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        # Cached listings drop the DirEntry objects, whose stat results would go stale
+        listing = [(name, is_dir, is_symlink, None) for name, is_dir, is_symlink, _ in list_directory(path)]
+        with self.lock:
+            if len(self.listings) >= self.max_directories:
+                self.listings.clear()
+            self.listings[path] = (mtime, listing)
+        return listing
+
+
+class ContentCache:
+    """Least-recently-used cache of decoded file contents, bounded by total size.
+
+    Entries are keyed by path and validated against the size and modification time
+    recorded when the file was scanned. Each entry keeps the encoding it was decoded with.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, path, size, mtime):
+        """Get cached (content, encoding), or None if missing or stale"""
+        with self.lock:
+            cached = self.entries.get(path)
+            if cached is None or cached[0] != size or cached[1] != mtime:
+                return None
+            self.entries.move_to_end(path)
+            return cached[2], cached[3]
+
+    def put(self, path, size, mtime, content, encoding=None):
+        """Cache content, evicting the least recently used entries when over budget"""
+        cost = len(content)
+        if cost > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.entries.pop(path, None)
+            if previous is not None:
+                self.total_bytes -= len(previous[2])
+            self.entries[path] = (size, mtime, content, encoding)
+            self.total_bytes += cost
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted[2])
+
+
+def list_directory(path):
+    """List a directory as (name, is_dir, is_symlink, dir_entry) tuples sorted by name"""
+    listing = []
+    with os.scandir(path) as it:
+        for item in it:
+            try:
+                is_dir = item.is_dir()
+            except OSError:
+                is_dir = False
+            listing.append((item.name, is_dir, item.is_symlink(), item))
+    listing.sort(key=lambda item: item[0])
+    return listing
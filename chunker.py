@@ -0,0 +1,227 @@
+import ast
+import hashlib
+import json
+
+from indexer import content_hash
+
+
+# Registry of block splitters, keyed by lowercase file extension.
+# A splitter takes the source lines and returns blocks: (symbol or None, [(first, last), ...])
+# with 1-based inclusive line ranges of the units in each block, or None when the source
+# cannot be parsed (blank-line paragraphs are used instead).
+BLOCK_SPLITTERS = {}
+
+# Largest chunk in characters, and lines repeated from the previous chunk of the same block
+DEFAULT_MAX_CHARS = 2000
+DEFAULT_OVERLAP_LINES = 0
+
+# Hex digits of a chunk ID
+ID_LENGTH = 16
+
+
+def register_splitter(extensions, splitter):
+    """Register a block splitter for one or more file extensions"""
+    if isinstance(extensions, str):
+        extensions = [extensions]
+    for ext in extensions:
+        BLOCK_SPLITTERS[ext.lower()] = splitter
+
+
+def chunk_id(rel_path, sha256, occurrence=0):
+    """Stable ID of a chunk: its path and content hash, plus which repeat of that content it is.
+
+    Line numbers are left out, so a chunk keeps its ID when lines are added above it.
+    """
+    key = f"{rel_path}\n{sha256}\n{occurrence}"
+    return hashlib.sha256(key.encode("utf-8", errors="surrogatepass")).hexdigest()[:ID_LENGTH]
+
+
+def paragraph_blocks(lines):
+    """One block of blank-line separated paragraphs"""
+    units = []
+    start = None
+    for number, line in enumerate(lines, 1):
+        if line.strip():
+            if start is None:
+                start = number
+        elif start is not None:
+            units.append((start, number - 1))
+            start = None
+    if start is not None:
+        units.append((start, len(lines)))
+    return [(None, units)] if units else []
+
+
+def _node_start(node):
+    """First line of a statement, including its decorators"""
+    return min([node.lineno] + [decorator.lineno for decorator in getattr(node, 'decorator_list', [])])
+
+
+def python_blocks(lines):
+    """Blocks of a Python module: each top-level function or class, and runs of other statements.
+
+    Classes are split into their members, so a large class is cut between methods. Comments
+    and blank lines before a statement belong to it.
+    """
+    try:
+        tree = ast.parse("\n".join(lines))
+    except (SyntaxError, ValueError, RecursionError):
+        return None
+
+    definitions = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+    blocks = []
+    previous_end = 0
+    for node in tree.body:
+        start, end = previous_end + 1, node.end_lineno
+        previous_end = end
+        if not isinstance(node, definitions):
+            # Plain statements (imports, constants, module code) join the previous run of them
+            if blocks and blocks[-1][0] is None:
+                blocks[-1][1].append((start, end))
+            else:
+                blocks.append((None, [(start, end)]))
+            continue
+
+        units = [(start, end)]
+        if isinstance(node, ast.ClassDef) and node.body:
+            units = []
+            unit_start = start
+            for member in node.body[1:]:
+                units.append((unit_start, _node_start(member) - 1))
+                unit_start = _node_start(member)
+            units.append((unit_start, end))
+        blocks.append((node.name, units))
+
+    # Trailing comments and blank lines go with the last block
+    if blocks and previous_end < len(lines):
+        first = blocks[-1][1][-1][0]
+        blocks[-1][1][-1] = (first, len(lines))
+    return blocks
+
+
+register_splitter(['.py', '.pyw', '.pyi'], python_blocks)
+
+
+class ChunkBuilder:
+    """Cuts file contents into chunks of at most max_chars characters along language-aware boundaries.
+
+    Every block (a Python function or class, or a file's paragraphs) starts a new chunk, so an edit
+    changes only the chunks of the block it is in. Units of a block are packed into chunks while they
+    fit; a unit too large for one chunk is cut between lines. Chunks of the same block repeat the
+    last overlap_lines lines of the previous one.
+    """
+
+    def __init__(self, max_chars=DEFAULT_MAX_CHARS, overlap_lines=DEFAULT_OVERLAP_LINES):
+        self.max_chars = max(int(max_chars or DEFAULT_MAX_CHARS), 1)
+        self.overlap_lines = max(int(overlap_lines or 0), 0)
+
+    def chunks(self, rel_path, content, ext):
+        """Chunk records of one file: id, path, language, symbol, line range, content hash and content"""
+        lines = content.split("\n")
+        splitter = BLOCK_SPLITTERS.get(ext.lower())
+        blocks = splitter(lines) if splitter is not None else None
+        if blocks is None:
+            blocks = paragraph_blocks(lines)
+
+        # offsets[n] is the number of characters in the first n lines, without newlines
+        offsets = [0]
+        for line in lines:
+            offsets.append(offsets[-1] + len(line))
+
+        records = []
+        occurrences = {}
+        for symbol, units in blocks:
+            for first, last, text in self.pack(lines, offsets, units):
+                sha256 = content_hash(text)
+                occurrence = occurrences.get(sha256, 0)
+                occurrences[sha256] = occurrence + 1
+                records.append({
+                    "id": chunk_id(rel_path, sha256, occurrence),
+                    "path": rel_path,
+                    "language": ext.lstrip('.').lower() or 'text',
+                    "symbol": symbol,
+                    "start_line": first,
+                    "end_line": last,
+                    "sha256": sha256,
+                    "content": text
+                })
+        return records
+
+    def pack(self, lines, offsets, units):
+        """Pack a block's units into (first line, last line, text) chunks"""
+        pieces = []
+        for first, last in units:
+            if self.size(offsets, first, last) <= self.max_chars:
+                pieces.append((first, last))
+            else:
+                pieces.extend(self.split_lines(lines, first, last))
+
+        chunks = []
+        first = last = None
+        for piece_first, piece_last in pieces:
+            if first is not None and self.size(offsets, first, piece_last) <= self.max_chars:
+                last = piece_last
+                continue
+            if first is not None:
+                chunks.append((first, last))
+                # Repeat the end of the previous chunk, as long as the new one still fits
+                overlap = min(self.overlap_lines, last - first + 1)
+                while overlap and self.size(offsets, last - overlap + 1, piece_last) > self.max_chars:
+                    overlap -= 1
+                piece_first = min(piece_first, last - overlap + 1)
+            first, last = piece_first, piece_last
+        if first is not None:
+            chunks.append((first, last))
+
+        results = []
+        for first, last in chunks:
+            first, last = self.trim(lines, first, last)
+            if first > last:
+                continue
+            text = "\n".join(lines[first - 1:last])
+            if len(text) <= self.max_chars:
+                results.append((first, last, text))
+            else:
+                # A single line longer than a chunk is cut into pieces
+                results.extend((first, last, text[start:start + self.max_chars])
+                               for start in range(0, len(text), self.max_chars))
+        return results
+
+    def split_lines(self, lines, first, last):
+        """Cut a unit that does not fit in a chunk into line ranges that do.
+
+        Every range after the first leaves room for the overlap lines pack() repeats before it.
+        """
+        ranges = []
+        start = first
+        size = -1
+        for number in range(first, last + 1):
+            line_size = len(lines[number - 1]) + 1
+            if number > start and size + line_size > self.max_chars:
+                ranges.append((start, number - 1))
+                overlap = min(self.overlap_lines, number - start)
+                start = number
+                size = sum(len(line) + 1 for line in lines[number - 1 - overlap:number - 1]) - 1
+            size += line_size
+        ranges.append((start, last))
+        return ranges
+
+    @staticmethod
+    def size(offsets, first, last):
+        """Characters in lines first..last joined with newlines"""
+        return offsets[last] - offsets[first - 1] + last - first
+
+    @staticmethod
+    def trim(lines, first, last):
+        """Leave out blank lines at both ends of a chunk"""
+        while first <= last and not lines[first - 1].strip():
+            first += 1
+        while last >= first and not lines[last - 1].strip():
+            last -= 1
+        return first, last
+
+    def write(self, f, rel_path, content, ext):
+        """Write a file's chunks as JSON lines; returns the number of chunks"""
+        records = self.chunks(rel_path, content, ext)
+        f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+        return len(records)
@@ -0,0 +1,273 @@
+import argparse
+import sys
+
+
+def cmd_section(args):
+    """Print the sections of one or more files from an output file"""
+    from indexer import read_sections, normalize_section_path
+
+    try:
+        sections = read_sections(args.output, args.paths)
+    except (FileNotFoundError, KeyError, ValueError) as e:
+        print(f"Error: {e.args[0] if e.args else e}", file=sys.stderr)
+        return 1
+
+    for rel_path in args.paths:
+        sys.stdout.write(sections[normalize_section_path(rel_path)])
+    return 0
+
+
+def load_config(args):
+    """Config manager with the --profile and --redact options of a command applied"""
+    from config import ConfigManager
+
+    config_manager = ConfigManager()
+    if args.profile is not None:
+        config_manager.use_profile(args.profile)
+    if args.redact:
+        config_manager.config['redaction']['enabled'] = True
+    return config_manager
+
+
+def cmd_extract(args):
+    """Extract a directory's structure to a file, a directory or stdout"""
+    from extractor import FileStructureExtractor
+
+    try:
+        config_manager = load_config(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if args.walk_threads:
+        config_manager.config['general']['walk_threads'] = args.walk_threads
+    if args.no_project_config:
+        config_manager.config['general']['project_config'] = False
+    if args.chunk_chars:
+        config_manager.config['chunks']['max_chars'] = args.chunk_chars
+    if args.chunk_overlap is not None:
+        config_manager.config['chunks']['overlap_lines'] = args.chunk_overlap
+    if args.grep:
+        search = config_manager.config['search']
+        search.update(patterns=args.grep, regex=args.regex, ignore_case=args.ignore_case,
+                      context_lines=args.context)
+
+    extractor = FileStructureExtractor(config_manager)
+    success, message = extractor.extract_structure(args.directory, output=args.output, revision=args.rev,
+                                                   force=args.force, formats=args.format)
+
+    # Keep stdout clean for the document itself when streaming
+    print(message, file=sys.stderr if args.output == "-" or not success else sys.stdout)
+    return 0 if success else 1
+
+
+def cmd_snapshot(args):
+    """Store a directory's files in the snapshot database"""
+    from extractor import FileStructureExtractor
+
+    try:
+        config_manager = load_config(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    extractor = FileStructureExtractor(config_manager)
+    success, message = extractor.snapshot(args.directory, args.db, args.name, args.rev)
+    print(message, file=sys.stdout if success else sys.stderr)
+    return 0 if success else 1
+
+
+def cmd_snapshots(args):
+    """List the snapshots in the snapshot database"""
+    import os
+    from snapshots import SnapshotStore
+
+    with SnapshotStore(args.db) as store:
+        for snapshot in store.list_snapshots(os.path.abspath(args.root) if args.root else None):
+            label = f" {snapshot['name']}" if snapshot['name'] else ""
+            revision = f" @ {snapshot['revision'][:12]}" if snapshot['revision'] else ""
+            print(f"{snapshot['id']:>5}  {snapshot['created']}  {snapshot['files']:>7} files  "
+                  f"{snapshot['root']}{revision}{label}")
+    return 0
+
+
+def cmd_search(args):
+    """Search file contents across the stored snapshots"""
+    import os
+    import time
+    from snapshots import SnapshotStore
+
+    started = time.perf_counter()
+    with SnapshotStore(args.db) as store:
+        hits = store.search(" ".join(args.query), os.path.abspath(args.root) if args.root else None,
+                            args.snapshot, args.latest, args.definitions, args.limit)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    for hit in hits:
+        print(f"{hit.path}  [snapshot {hit.snapshot_id}, {hit.created}, {hit.root}]")
+        for number, line in hit.lines:
+            print(f"  {number:>6}: {line}")
+    print(f"{len(hits)} files in {elapsed:.1f} ms", file=sys.stderr)
+    return 0 if hits else 1
+
+
+def cmd_diff(args):
+    """Write a change report between two outputs or snapshots"""
+    from config import ConfigManager
+    from differ import SNAPSHOT_PREFIX, diff_manifests, open_manifest
+    from outputs import AtomicWriter, STDOUT
+
+    config_manager = ConfigManager()
+    store = None
+    if args.old.startswith(SNAPSHOT_PREFIX) or args.new.startswith(SNAPSHOT_PREFIX):
+        from snapshots import SnapshotStore
+        store = SnapshotStore(args.db or config_manager.get('general', 'snapshot_db') or None)
+    try:
+        old = open_manifest(args.old, store)
+        new = open_manifest(args.new, store)
+        report = diff_manifests(old, new, args.unified, not args.names_only,
+                                config_manager.get('general', 'worker_processes') or None)
+    except (FileNotFoundError, KeyError, ValueError) as e:
+        print(f"Error: {e.args[0] if e.args else e}", file=sys.stderr)
+        return 1
+    finally:
+        if store is not None:
+            store.close()
+
+    file_format = args.format or ('json' if args.output and args.output.endswith('.json') else 'md')
+    with AtomicWriter(args.output or STDOUT) as f:
+        report.write(f, file_format, args.max_lines)
+    print(report.summary(), file=sys.stderr)
+    return 0
+
+
+def cmd_profiles(args):
+    """List the filter profiles, marking the active one"""
+    from config import ConfigManager
+
+    config_manager = ConfigManager()
+    active = config_manager.get('general', 'profile')
+    for name, profile in config_manager.get_profiles().items():
+        details = [f"content: {profile['content_mode']}"] if profile.get('content_mode') else []
+        only = (profile.get('extensions') or {}).get('only')
+        if only:
+            details.append(f"only {' '.join(only)}")
+        marker = "*" if name == active else " "
+        print(f"{marker} {name}" + (f"  ({', '.join(details)})" if details else ""))
+    return 0
+
+
+def cmd_serve(args):
+    """Run the local extraction HTTP server"""
+    from config import ConfigManager
+    from server import serve
+
+    serve(ConfigManager(), args.host, args.port, args.max_concurrent)
+    return 0
+
+
+def build_parser():
+    """Build the command line parser"""
+    parser = argparse.ArgumentParser(
+        prog="structjam",
+        description="File Structure Extractor command line interface. "
+                    "Run without arguments to start the GUI.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract = subparsers.add_parser("extract", help="Extract a directory's structure")
+    extract.add_argument("directory", help="Directory or zip/tar archive to scan")
+    extract.add_argument("-o", "--output",
+                         help="Output directory, file path, or '-' for stdout "
+                              "(default: the configured output directory, else the scanned directory)")
+    extract.add_argument("-f", "--format", choices=['md', 'txt', 'json', 'yaml', 'jsonl'], action="append",
+                         help="Output format; repeat to write several formats from one scan "
+                              "(default: from config)")
+    extract.add_argument("--force", action="store_true",
+                         help="Regenerate the output even if nothing changed since the last run")
+    extract.add_argument("--redact", action="store_true",
+                         help="Mask secrets (keys, tokens, passwords) in file contents")
+    extract.add_argument("--walk-threads", type=int,
+                         help="Threads listing directories in parallel; helps on network drives "
+                              "(default: from config)")
+    extract.add_argument("-p", "--profile",
+                         help="Use this filter profile for the run (see 'profiles'; '' = none, "
+                              "default: from config)")
+    extract.add_argument("--no-project-config", action="store_true",
+                         help="Ignore .structjam.toml/.structjam.json rule files in the scanned tree")
+    extract.add_argument("--grep", action="append", metavar="PATTERN",
+                         help="Only include files whose content contains PATTERN (repeat for several)")
+    extract.add_argument("--regex", action="store_true", help="Treat --grep patterns as regular expressions")
+    extract.add_argument("-i", "--ignore-case", action="store_true", help="Match --grep patterns ignoring case")
+    extract.add_argument("-C", "--context", type=int, metavar="LINES",
+                         help="Write only the matching lines of each file, with LINES lines of context")
+    extract.add_argument("--chunk-chars", type=int, metavar="CHARS",
+                         help="Largest chunk in the jsonl format (default: from config)")
+    extract.add_argument("--chunk-overlap", type=int, metavar="LINES",
+                         help="Lines repeated between chunks of a cut function or paragraph run "
+                              "in the jsonl format (default: from config)")
+    extract.add_argument("--rev",
+                         help="Read this git revision (commit, tag or branch) from the repository's "
+                              "object store instead of the working tree")
+    extract.set_defaults(func=cmd_extract)
+
+    profiles = subparsers.add_parser("profiles", help="List the filter profiles")
+    profiles.set_defaults(func=cmd_profiles)
+
+    serve = subparsers.add_parser("serve", help="Serve extractions over HTTP with warm caches")
+    serve.add_argument("--host", default="127.0.0.1", help="Address to bind (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    serve.add_argument("--max-concurrent", type=int, default=2,
+                       help="Extractions allowed to run at once (default: 2)")
+    serve.set_defaults(func=cmd_serve)
+
+    snapshot = subparsers.add_parser("snapshot", help="Store a directory's files in the snapshot database")
+    snapshot.add_argument("directory", help="Directory or zip/tar archive to scan")
+    snapshot.add_argument("--db", help="Snapshot database (default: from config, else in the config directory)")
+    snapshot.add_argument("--name", help="Label for the snapshot")
+    snapshot.add_argument("--rev", help="Store this git revision instead of the working tree")
+    snapshot.add_argument("-p", "--profile", help="Use this filter profile (see 'profiles')")
+    snapshot.add_argument("--redact", action="store_true", help="Mask secrets in the stored contents")
+    snapshot.set_defaults(func=cmd_snapshot)
+
+    snapshots = subparsers.add_parser("snapshots", help="List the stored snapshots")
+    snapshots.add_argument("--db", help="Snapshot database")
+    snapshots.add_argument("--root", help="Only snapshots of this directory")
+    snapshots.set_defaults(func=cmd_snapshots)
+
+    search = subparsers.add_parser("search", help="Search file contents across stored snapshots")
+    search.add_argument("query", nargs="+",
+                        help="Words, \"phrases\", prefix* and AND/OR/NOT (SQLite FTS5 syntax)")
+    search.add_argument("--db", help="Snapshot database")
+    search.add_argument("--root", help="Only snapshots of this directory")
+    search.add_argument("--snapshot", type=int, help="Only this snapshot id")
+    search.add_argument("--latest", action="store_true", help="Only the newest snapshot of each directory")
+    search.add_argument("-d", "--definitions", action="store_true",
+                        help="Only files and lines that define a searched name (def, class, fn, ...)")
+    search.add_argument("--limit", type=int, default=50, help="Most files to list (default: 50)")
+    search.set_defaults(func=cmd_search)
+
+    diff = subparsers.add_parser("diff", help="Report what changed between two outputs or snapshots")
+    diff.add_argument("old", help="Older md/txt output file, or snapshot:ID")
+    diff.add_argument("new", help="Newer md/txt output file, or snapshot:ID")
+    diff.add_argument("-f", "--format", choices=['md', 'json'],
+                      help="Report format (default: json for a .json output, else md)")
+    diff.add_argument("-o", "--output", help="Report file, or '-' for stdout (default: stdout)")
+    diff.add_argument("-U", "--unified", type=int, default=3, metavar="LINES",
+                      help="Context lines around each change (default: 3)")
+    diff.add_argument("--max-lines", type=int, default=400,
+                      help="Diff lines shown per file, 0 for all (default: 400)")
+    diff.add_argument("--names-only", action="store_true", help="List changed files without line diffs")
+    diff.add_argument("--db", help="Snapshot database for snapshot:ID references")
+    diff.set_defaults(func=cmd_diff)
+
+    section = subparsers.add_parser("section", help="Print file sections from an output file using its index")
+    section.add_argument("output", help="Output file (.md or .txt) with an .index.json sidecar")
+    section.add_argument("paths", nargs="+", help="Relative paths of the files to print")
+    section.set_defaults(func=cmd_section)
+
+    return parser
+
+
+def run_cli(argv):
+    """Run a command line command; returns the exit code"""
+    args = build_parser().parse_args(argv)
+    return args.func(args)
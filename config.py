@@ -1,20 +1,47 @@
 import json
 import os
+import sys
 from datetime import datetime
 
+# Built-in profiles; a profile of the same name in the config file replaces one of these.
+# Rule lists are layered over the global ones like project rules (see filters.rule_overrides).
+BUILTIN_PROFILES = {
+    "Full source": {},
+    "API only": {
+        "content_mode": "skeleton",
+        "folders": {"excluded": ["tests", "test", "docs", "examples"]},
+        "files": {"excluded": ["test_*", "*_test.py", "*_test.go", "*.test.js", "*.test.ts", "*.spec.js",
+                               "*.spec.ts", "conftest.py"]}
+    },
+    "Docs only": {
+        "content_mode": "full",
+        "extensions": {"only": [".md", ".rst", ".txt", ".adoc"]}
+    },
+    "Config only": {
+        "content_mode": "full",
+        "extensions": {"only": [".json", ".yml", ".yaml", ".toml", ".ini", ".cfg", ".conf", ".env", ".xml"]}
+    }
+}
+
 
 class ConfigManager:
     def __init__(self):
         self.user_home = os.path.expanduser("~")
         self.config_dir = os.path.join(self.user_home, ".file_extractor")
         self.config_file = os.path.join(self.config_dir, "config.json")
-
-        # Create config directory if it doesn't exist
-        if not os.path.exists(self.config_dir):
-            os.makedirs(self.config_dir)
-
+        # The config directory is created on the first save
         self.config = self.load_config()
 
+    @classmethod
+    def from_dict(cls, config):
+        """Create an in-memory config manager that never touches the config file"""
+        manager = cls.__new__(cls)
+        manager.user_home = os.path.expanduser("~")
+        manager.config_dir = None
+        manager.config_file = None
+        manager.config = config
+        return manager
+
     def get_default_config(self):
         """Return default configuration"""
         return {
@@ -22,9 +49,49 @@ class ConfigManager:
                 "output_file_prefix": "project_structure",
                 "delete_previous_files": True,
                 "file_format": "md",
+                "output_dir": "",  # empty = write into the scanned directory
                 "max_file_size_mb": 1,
                 "dark_mode": False,
-                "sort_mode": "recent"  # recent, alphabetical, size, date_modified
+                "sort_mode": "recent",  # recent, alphabetical, size, date_modified
+                "content_mode": "full",  # full, skeleton, minify
+                "write_index": True,  # section index sidecar for random access
+                "worker_processes": 0,  # 0 = one per CPU core
+                "symlinks": "skip",  # skip, follow, list_only (for symlinked directories)
+                # Tried in order when a file has no BOM and is not UTF-16/32
+                "encoding_fallbacks": ["utf-8", "latin-1"],
+                # Threads listing directories ahead of the scan; more than 1 helps on network drives
+                "walk_threads": 1,
+                # Files listed per directory in the tree before the rest collapse into a summary (0 = all)
+                "max_tree_files": 500,
+                # Statistics section: size per extension, largest files, deepest paths, skipped content
+                "include_statistics": True,
+                # Layer rules from .structjam.toml/.structjam.json files found in scanned directories
+                "project_config": True,
+                "profile": None,  # name of the active profile, None = global rules only
+                "snapshot_db": ""  # empty = snapshots.db in the config directory
+            },
+            # Named profiles: folders/extensions/files rules, content_mode and content_modes, e.g.
+            # {"Backend": {"folders": {"excluded": ["web"]}, "content_mode": "skeleton"}}
+            "profiles": {},
+            # Per-extension content mode overrides, e.g. {".py": "skeleton"}
+            "content_modes": {},
+            "redaction": {
+                "enabled": False,
+                "builtin": None,  # None = all built-in patterns, or a list of pattern names
+                "custom": [],  # extra regular expressions to mask
+                "mask": "[REDACTED:{name}]"
+            },
+            # Chunks of the JSON lines (.jsonl) output, for retrieval and embedding pipelines
+            "chunks": {
+                "max_chars": 2000,
+                "overlap_lines": 0  # lines repeated from the previous chunk when a block is cut
+            },
+            # Content search: when patterns are set, only files matching one of them are included
+            "search": {
+                "patterns": [],
+                "regex": False,  # patterns are regular expressions instead of literal text
+                "ignore_case": False,
+                "context_lines": None  # None = whole files, else matching lines with this much context
             },
             "folders": {
                 "ignored": [".venv", ".idea", "build", "dist", "__pycache__", "node_modules", ".git"],
@@ -44,36 +111,39 @@ class ConfigManager:
     def load_config(self):
         """Load configuration from JSON file"""
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    loaded_config = json.load(f)
-
-                # Merge with defaults to ensure all keys exist
-                default_config = self.get_default_config()
-                self.merge_configs(default_config, loaded_config)
-                return default_config
-            else:
-                return self.get_default_config()
-        except (json.JSONDecodeError, FileNotFoundError, PermissionError) as e:
-            print(f"Error loading config: {e}")
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                loaded_config = json.load(f)
+
+            # Merge with defaults to ensure all keys exist
+            default_config = self.get_default_config()
+            self.merge_configs(default_config, loaded_config)
+            return default_config
+        except FileNotFoundError:
+            return self.get_default_config()
+        except (json.JSONDecodeError, PermissionError) as e:
+            print(f"Error loading config: {e}", file=sys.stderr)
             return self.get_default_config()
 
     def merge_configs(self, default, loaded):
         """Recursively merge loaded config with default config"""
         for key, value in loaded.items():
             if key in default:
-                if isinstance(value, dict) and isinstance(default[key], dict):
+                # Empty default dicts are open mappings and take the loaded value as-is
+                if isinstance(value, dict) and isinstance(default[key], dict) and default[key]:
                     self.merge_configs(default[key], value)
                 else:
                     default[key] = value
 
     def save_config(self):
         """Save configuration to JSON file"""
+        if self.config_file is None:
+            return
         try:
+            os.makedirs(self.config_dir, exist_ok=True)
             with open(self.config_file, 'w', encoding='utf-8') as f:
                 json.dump(self.config, f, indent=2, ensure_ascii=False)
         except (PermissionError, OSError) as e:
-            print(f"Error saving config: {e}")
+            print(f"Error saving config: {e}", file=sys.stderr)
 
     def get(self, section, key=None):
         """Get configuration value"""
@@ -114,6 +184,53 @@ class ConfigManager:
             self.config["previous_directories"] = valid_dirs
             self.save_config()
 
+    def get_output_formats(self):
+        """Get the list of output formats; file_format holds one format or a list of them"""
+        formats = self.get('general', 'file_format') or 'md'
+        if isinstance(formats, str):
+            formats = [formats]
+        return list(dict.fromkeys(formats)) or ['md']
+
+    def set_output_formats(self, formats):
+        """Set the output formats, storing a single format as a plain string"""
+        formats = list(dict.fromkeys(formats)) or ['md']
+        self.set('general', 'file_format', formats[0] if len(formats) == 1 else formats)
+
+    def get_profiles(self):
+        """Get all profiles by name: the built-in ones and those in the config file"""
+        profiles = dict(BUILTIN_PROFILES)
+        profiles.update(self.config.get("profiles") or {})
+        return profiles
+
+    def get_profile(self):
+        """Get the active profile, or None when no profile (or an unknown one) is selected"""
+        name = self.get('general', 'profile')
+        if not name:
+            return None
+        profiles = self.config.get("profiles") or {}
+        return profiles[name] if name in profiles else BUILTIN_PROFILES.get(name)
+
+    def use_profile(self, name):
+        """Select a profile without saving it (None or '' = no profile); raises ValueError for an unknown name"""
+        profiles = self.get_profiles()
+        if name and name not in profiles:
+            raise ValueError(f"Unknown profile '{name}' (available: {', '.join(profiles)})")
+        self.config['general']['profile'] = name or None
+
+    def get_content_mode(self, ext):
+        """Get the content mode (full, skeleton or minify) for a file extension.
+
+        The active profile's per-extension and general modes come before the global ones.
+        """
+        ext = ext.lower()
+        profile = self.get_profile() or {}
+        modes = profile.get("content_modes") or {}
+        mode = modes.get(ext) or profile.get("content_mode")
+        if mode:
+            return mode
+        modes = self.config.get("content_modes") or {}
+        return modes.get(ext) or self.get('general', 'content_mode') or 'full'
+
     def get_text_extensions(self):
         """Get list of supported text file extensions"""
         return ['.py', '.html', '.js', '.css', '.txt', '.md', '.json', '.xml', '.yml', '.yaml',
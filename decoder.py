@@ -0,0 +1,84 @@
+import codecs
+
+
+# Byte order marks, longest first so a UTF-32 LE mark is not taken for UTF-16 LE
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+]
+
+# Encodings tried in order when there is no BOM; latin-1 accepts any bytes
+DEFAULT_ENCODINGS = ['utf-8', 'latin-1']
+
+# Bytes sampled when guessing UTF-16/32 without a BOM
+SNIFF_BYTES = 4096
+
+# Encoding recorded when nothing in the chain could decode the file
+REPLACEMENT_ENCODING = 'utf-8 (invalid bytes replaced)'
+
+
+def detect_bom(data):
+    """Get (encoding, BOM length) from a leading byte order mark, or (None, 0)"""
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return encoding, len(bom)
+    return None, 0
+
+
+def detect_wide_encoding(data):
+    """Guess BOM-less UTF-16/32 from where zero bytes fall in mostly-ASCII text"""
+    sample = data[:SNIFF_BYTES]
+    sample = sample[:len(sample) - len(sample) % 4]
+    if not sample or b"\x00" not in sample:
+        return None
+
+    quarter = len(sample) // 4
+    zeros = [sample[i::4].count(0) for i in range(4)]
+
+    def mostly(count, total):
+        return count >= total * 0.7
+
+    def rarely(count, total):
+        return count <= total * 0.1
+
+    if rarely(zeros[0], quarter) and all(mostly(zeros[i], quarter) for i in (1, 2, 3)):
+        return 'utf-32-le'
+    if rarely(zeros[3], quarter) and all(mostly(zeros[i], quarter) for i in (0, 1, 2)):
+        return 'utf-32-be'
+    if rarely(zeros[0] + zeros[2], 2 * quarter) and mostly(zeros[1] + zeros[3], 2 * quarter):
+        return 'utf-16-le'
+    if rarely(zeros[1] + zeros[3], 2 * quarter) and mostly(zeros[0] + zeros[2], 2 * quarter):
+        return 'utf-16-be'
+    return None
+
+
+def decode_bytes(data, encodings=None):
+    """Decode file bytes already in memory; returns (text, encoding name).
+
+    A BOM wins, then a UTF-16/32 guess, then each encoding in the fallback chain.
+    """
+    encoding, bom_length = detect_bom(data)
+    if encoding is None:
+        encoding = detect_wide_encoding(data)
+    if encoding is not None:
+        try:
+            return data[bom_length:].decode(encoding), encoding
+        except UnicodeDecodeError:
+            pass
+
+    for encoding in encodings or DEFAULT_ENCODINGS:
+        try:
+            return data.decode(encoding), encoding
+        except (UnicodeDecodeError, LookupError):
+            continue
+
+    return data.decode('utf-8', errors='replace'), REPLACEMENT_ENCODING
+
+
+def read_file(path, encodings=None):
+    """Read a file from disk once and decode it; returns (text, encoding name)"""
+    with open(path, "rb") as src:
+        return decode_bytes(src.read(), encodings)
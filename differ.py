@@ -0,0 +1,386 @@
+import difflib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from indexer import content_hash, load_index, normalize_section_path, read_sections
+
+# Below this many changed files, diffing inline is cheaper than starting a pool
+MIN_POOL_FILES = 8
+
+# Context lines around each change in the line diffs
+DIFF_CONTEXT = 3
+
+# Diff lines written per file in a report before the rest is cut (0 = all)
+MAX_DIFF_LINES = 400
+
+# Prefix of snapshot references, e.g. snapshot:12 (see snapshots.py)
+SNAPSHOT_PREFIX = "snapshot:"
+
+# Where file contents start in md and txt outputs
+CONTENTS_MARKERS = {
+    'md': "\n## FILE CONTENTS\n\n",
+    'txt': f"\nFILE CONTENTS:\n{'=' * 80}\n\n"
+}
+
+# Where the directory tree starts and ends in md and txt outputs
+TREE_MARKERS = {
+    'md': ("## DIRECTORY STRUCTURE\n\n```\n", "\n```"),
+    'txt': (f"DIRECTORY STRUCTURE:\n{'=' * 80}\n", "\n\n")
+}
+
+# Hash and body of a listed file that has no content section (not text), as snapshots store it
+NO_CONTENT_HASH = "(not_text)"
+NO_CONTENT_BODY = "[not_text]"
+
+# Tree lines of directories, with an optional note such as '(symlink, not followed)'
+DIRECTORY_LINE = re.compile(r"^(.*)/(?: \([^()]*\))?$")
+# Note after a file's tree line in filtered outputs
+MATCH_NOTE = re.compile(r" \(\d+ match(?:es)?\)$")
+
+
+def parse_sections(text, file_format):
+    """Split the contents part of an md or txt output into {path: body}.
+
+    Used when an output has no section index. Bodies are the file content (or the message
+    written instead of it), exactly as the section index hashes them.
+    """
+    marker = CONTENTS_MARKERS[file_format]
+    start = text.find(marker)
+    if start < 0:
+        raise ValueError("No file contents section found")
+    pos = start + len(marker)
+
+    sections = {}
+    header = "### FILE: " if file_format == 'md' else "FILE: "
+    while text.startswith(header, pos):
+        line_end = text.find("\n", pos)
+        rel_path = text[pos + len(header):line_end]
+        body, pos = parse_section_body(text, line_end + 1, file_format, header)
+        sections[normalize_section_path(rel_path)] = body
+    return sections
+
+
+def parse_tree(text, file_format):
+    """Entries listed in the directory tree of an md or txt output, directories ending in '/'.
+
+    Used when the section index does not record them. Files collapsed into a summary line
+    of a large directory are not listed.
+    """
+    start_marker, end_marker = TREE_MARKERS[file_format]
+    start = text.find(start_marker)
+    if start < 0:
+        raise ValueError("No directory structure section found")
+    start += len(start_marker)
+    end = text.find(end_marker, start)
+    lines = text[start:end if end >= 0 else len(text)].split("\n")[1:]  # the first line is the root
+
+    entries = []
+    parents = []
+    for line in lines:
+        positions = [pos for pos in (line.find("├── "), line.find("└── ")) if pos >= 0]
+        if not positions:
+            continue
+        pos = min(positions)
+        depth = pos // 4
+        name = line[pos + 4:]
+        if name.startswith("… "):
+            continue
+
+        del parents[depth:]
+        directory = DIRECTORY_LINE.match(name)
+        if directory:
+            parents.append(directory.group(1))
+            entries.append("/".join(parents) + "/")
+        else:
+            entries.append("/".join(parents + [MATCH_NOTE.sub("", name)]))
+    return entries
+
+
+def parse_section_body(text, pos, file_format, header):
+    """Parse one section's body starting after its header line; returns (body, end position)"""
+    if file_format == 'md':
+        pos += 1  # blank line after the header
+        if text.startswith("_", pos):
+            pos = text.find("\n\n", pos) + 2  # section note
+        if text.startswith("```", pos):
+            pos = text.find("\n", pos) + 1
+            closing = "\n```\n\n---\n\n"
+        else:
+            closing = "\n\n"
+    else:
+        if text.startswith("[", pos):
+            pos = text.find("\n", pos) + 1  # section note
+        if text.startswith("-" * 80 + "\n", pos):
+            pos += 81
+            closing = f"\n\n{'=' * 80}\n\n"
+        else:
+            closing = "\n\n"
+
+    # The body ends at the first closing followed by the next section or the end of the document
+    end = text.find(closing, pos)
+    while end >= 0 and not (end + len(closing) == len(text) or text.startswith(header, end + len(closing))):
+        end = text.find(closing, end + 1)
+    if end < 0:
+        raise ValueError("Unterminated file section")
+    return text[pos:end], end + len(closing)
+
+
+def split_listing(entries):
+    """Split listed entries into (file paths, directory paths without the trailing '/')"""
+    files = [entry for entry in entries if not entry.endswith("/")]
+    directories = {entry[:-1] for entry in entries if entry.endswith("/")}
+    return files, directories
+
+
+class OutputManifest:
+    """Files and directories of an md or txt output with the files' content hashes, from its
+    section index or by parsing it. Listed files without a content section hash as NO_CONTENT_HASH.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.label = os.path.basename(path)
+        self.bodies = None
+        try:
+            self.index = load_index(path)
+        except (FileNotFoundError, ValueError):
+            self.index = None
+
+        text = None
+        if self.index is not None:
+            self.file_format = self.index.file_format
+            self.hashes = {rel_path: section["sha256"] for rel_path, section in self.index.sections.items()}
+        else:
+            self.file_format = os.path.splitext(path)[1].lstrip('.').lower()
+            if self.file_format not in CONTENTS_MARKERS:
+                raise ValueError(f"Only md and txt outputs can be compared: {path}")
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                text = f.read()
+            self.bodies = parse_sections(text, self.file_format)
+            self.hashes = {rel_path: content_hash(body) for rel_path, body in self.bodies.items()}
+
+        # Indexes written before entries were recorded fall back to the tree
+        listed = self.index.entries if self.index is not None else None
+        if listed is None:
+            if text is None:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+            listed = parse_tree(text, self.file_format)
+        files, self.directories = split_listing(listed)
+        for rel_path in files:
+            self.hashes.setdefault(rel_path, NO_CONTENT_HASH)
+
+    def read(self, paths):
+        """{path: body} of some files"""
+        if self.bodies is not None:
+            return {rel_path: self.bodies.get(rel_path, NO_CONTENT_BODY) for rel_path in paths}
+        with_sections = [rel_path for rel_path in paths if self.index.get(rel_path) is not None]
+        sections = read_sections(self.path, with_sections, self.index)
+        header = "### FILE: " if self.file_format == 'md' else "FILE: "
+        bodies = {rel_path: NO_CONTENT_BODY for rel_path in paths}
+        for rel_path, section in sections.items():
+            bodies[rel_path] = parse_section_body(section, section.find("\n") + 1, self.file_format, header)[0]
+        return bodies
+
+
+class SnapshotManifest:
+    """Files of a stored snapshot with their content hashes, and the directories holding them"""
+
+    def __init__(self, store, snapshot_id):
+        snapshot = store.get_snapshot(snapshot_id)
+        if snapshot is None:
+            raise ValueError(f"No snapshot {snapshot_id} in {store.path}")
+        self.store = store
+        self.snapshot_id = snapshot_id
+        self.label = f"snapshot {snapshot_id} ({snapshot['root']}, {snapshot['created']})"
+        # Snapshot paths use the OS separator; reports use '/'
+        hashes = store.file_hashes(snapshot_id)
+        self.paths = {normalize_section_path(rel_path): rel_path for rel_path in hashes}
+        self.hashes = {rel_path: hashes[original] for rel_path, original in self.paths.items()}
+        # Snapshots store files only; empty directories are not known
+        self.directories = {parent for rel_path in self.hashes
+                            for parent in ("/".join(rel_path.split("/")[:depth])
+                                           for depth in range(1, rel_path.count("/") + 1))}
+
+    def read(self, paths):
+        """{path: content} of some files"""
+        contents = self.store.read_files(self.snapshot_id, [self.paths[rel_path] for rel_path in paths])
+        return {normalize_section_path(rel_path): content for rel_path, content in contents.items()}
+
+
+def diff_texts(rel_path, old_text, new_text, context=DIFF_CONTEXT):
+    """Line diff of one file; returns (path, lines added, lines removed, unified diff lines)"""
+    diff = list(difflib.unified_diff(old_text.split("\n"), new_text.split("\n"),
+                                     f"a/{rel_path}", f"b/{rel_path}", n=context, lineterm=""))
+    added = sum(1 for line in diff[2:] if line.startswith("+"))
+    removed = sum(1 for line in diff[2:] if line.startswith("-"))
+    return rel_path, added, removed, diff
+
+
+def _diff_job(args):
+    return diff_texts(*args)
+
+
+class FileChange:
+    """A file whose content differs between two extractions"""
+
+    __slots__ = ('path', 'added', 'removed', 'diff')
+
+    def __init__(self, path, added=None, removed=None, diff=None):
+        self.path = path
+        self.added = added
+        self.removed = removed
+        self.diff = diff
+
+
+class ChangeReport:
+    """What changed between two extractions: added, removed, renamed and changed files"""
+
+    def __init__(self, old_label, new_label):
+        self.old_label = old_label
+        self.new_label = new_label
+        self.added = []
+        self.removed = []
+        self.renamed = []
+        self.changed = []
+        self.unchanged = 0
+
+    def summary(self):
+        """One-line summary, e.g. '2 added, 1 removed, 3 changed (+40 -12 lines), 120 unchanged'"""
+        parts = [f"{len(self.added)} added", f"{len(self.removed)} removed"]
+        if self.renamed:
+            parts.append(f"{len(self.renamed)} renamed")
+        changed = f"{len(self.changed)} changed"
+        if self.changed and self.changed[0].diff is not None:
+            changed += (f" (+{sum(change.added for change in self.changed)}"
+                        f" -{sum(change.removed for change in self.changed)} lines)")
+        parts.append(changed)
+        parts.append(f"{self.unchanged} unchanged")
+        return ", ".join(parts)
+
+    @staticmethod
+    def cut(diff, max_lines):
+        """Diff lines for a report, cut to max_lines with a note of what was left out"""
+        if not max_lines or len(diff) <= max_lines:
+            return diff
+        return diff[:max_lines] + [f"... {len(diff) - max_lines} more diff lines"]
+
+    def to_dict(self, max_lines=MAX_DIFF_LINES):
+        return {
+            "from": self.old_label,
+            "to": self.new_label,
+            "generated": datetime.now().isoformat(timespec="seconds"),
+            "summary": {"added": len(self.added), "removed": len(self.removed), "renamed": len(self.renamed),
+                        "changed": len(self.changed), "unchanged": self.unchanged},
+            "added": self.added,
+            "removed": self.removed,
+            "renamed": [{"from": old, "to": new} for old, new in self.renamed],
+            "changed": [{"path": change.path, "lines_added": change.added, "lines_removed": change.removed,
+                         "diff": None if change.diff is None else "\n".join(self.cut(change.diff, max_lines))}
+                        for change in self.changed]
+        }
+
+    def markdown(self, max_lines=MAX_DIFF_LINES):
+        lines = [f"# Changes: {self.old_label} → {self.new_label}", "",
+                 f"**Generated on:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", "",
+                 f"**Summary:** {self.summary()}", ""]
+
+        if self.added:
+            lines += ["## Added", ""] + [f"- `{path}`" for path in self.added] + [""]
+        if self.removed:
+            lines += ["## Removed", ""] + [f"- `{path}`" for path in self.removed] + [""]
+        if self.renamed:
+            lines += ["## Renamed", ""] + [f"- `{old}` → `{new}`" for old, new in self.renamed] + [""]
+
+        if self.changed:
+            lines += ["## Changed", ""]
+            if self.changed[0].diff is None:
+                lines += [f"- `{change.path}`" for change in self.changed] + [""]
+            else:
+                lines += ["| File | Added | Removed |", "|---|---:|---:|"]
+                lines += [f"| `{change.path}` | {change.added} | {change.removed} |" for change in self.changed]
+                lines.append("")
+                for change in self.changed:
+                    lines += [f"### FILE: {change.path} (+{change.added} -{change.removed})", "", "```diff"]
+                    lines += self.cut(change.diff, max_lines)
+                    lines += ["```", ""]
+        return "\n".join(lines)
+
+    def write(self, f, file_format='md', max_lines=MAX_DIFF_LINES):
+        if file_format == 'json':
+            json.dump(self.to_dict(max_lines), f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        else:
+            f.write(self.markdown(max_lines))
+
+
+def diff_manifests(old, new, context=DIFF_CONTEXT, line_diffs=True, workers=None):
+    """Compare two manifests (OutputManifest or SnapshotManifest); returns a ChangeReport.
+
+    Files with equal content hashes are skipped without being read. A removed file whose
+    content reappears under a new path is reported as renamed. Changed files are read and
+    line-diffed, on a process pool when there are many of them; with line_diffs off only
+    their names are reported. Added and removed directories are listed with a trailing '/'.
+    """
+    report = ChangeReport(old.label, new.label)
+    old_paths = set(old.hashes)
+    new_paths = set(new.hashes)
+
+    added = sorted(new_paths - old_paths)
+    removed = sorted(old_paths - new_paths)
+    changed = sorted(path for path in old_paths & new_paths if old.hashes[path] != new.hashes[path])
+    report.unchanged = len(old_paths & new_paths) - len(changed)
+
+    # Renames: a removed file's content under an added path
+    removed_by_hash = {}
+    for path in removed:
+        removed_by_hash.setdefault(old.hashes[path], []).append(path)
+    renamed_to = set()
+    for path in added:
+        candidates = removed_by_hash.get(new.hashes[path])
+        if candidates:
+            report.renamed.append((candidates.pop(0), path))
+            renamed_to.add(path)
+    renamed_from = {old_path for old_path, _ in report.renamed}
+    report.added = sorted([path for path in added if path not in renamed_to]
+                          + [f"{path}/" for path in new.directories - old.directories])
+    report.removed = sorted([path for path in removed if path not in renamed_from]
+                            + [f"{path}/" for path in old.directories - new.directories])
+
+    if not line_diffs:
+        report.changed = [FileChange(path) for path in changed]
+        return report
+
+    old_texts = old.read(changed)
+    new_texts = new.read(changed)
+    jobs = [(path, old_texts[path], new_texts[path], context) for path in changed]
+    results = None
+    if len(jobs) >= MIN_POOL_FILES:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_diff_job, jobs, chunksize=4))
+        except (OSError, NotImplementedError) as e:
+            # Process pools are unavailable on some platforms; work inline instead
+            print(f"Diff process pool unavailable, working inline: {e}", file=sys.stderr)
+    if results is None:
+        results = [diff_texts(*job) for job in jobs]
+
+    report.changed = [FileChange(*result) for result in results]
+    return report
+
+
+def open_manifest(reference, store=None):
+    """Open an output file path, or snapshot:ID using a SnapshotStore"""
+    if reference.startswith(SNAPSHOT_PREFIX):
+        try:
+            snapshot_id = int(reference[len(SNAPSHOT_PREFIX):])
+        except ValueError:
+            raise ValueError(f"Invalid snapshot reference: {reference}")
+        return SnapshotManifest(store, snapshot_id)
+    if not os.path.exists(reference):
+        raise FileNotFoundError(f"Output file not found: {reference}")
+    return OutputManifest(reference)
@@ -1,132 +1,344 @@
+import contextlib
 import os
 import json
-import yaml
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from config import ConfigManager
+import minifier
+import skeleton
+from chunker import ChunkBuilder
+from indexer import SectionIndex, index_path_for, normalize_section_path
+from fingerprint import (tree_fingerprint, save_fingerprint, find_previous_output, is_unchanged, load_source,
+                         output_owner, source_tag)
+from outputs import (AtomicWriter, OUTPUT_FORMATS, STDOUT, TEMP_SUFFIX, resolve_output, format_from_path,
+                     is_special_file, is_stream)
+from filters import PROJECT_CONFIG_FILES, PROJECT_CONFIG_NAMES, directory_rules, get_filter_rules
+from redactor import get_redactor
+from scanstats import ScanStats, format_size
+from searcher import SEARCH_THREADS, get_content_query, search_entries
+from sources import open_source
+from walker import DirectoryLister
+
+# Below this many skeleton or minified files, working inline is cheaper than starting a pool
+MIN_POOL_FILES = 8
+
+# Content modes that transform file content: mode -> (has handler, file job, source job, section note)
+CONTENT_TRANSFORMS = {
+    'skeleton': (skeleton.has_parser, skeleton.skeletonize_file, skeleton.skeletonize_source,
+                 "Skeleton: signatures and docstrings only"),
+    'minify': (minifier.has_minifier, minifier.minify_file, minifier.minify_source,
+               "Minified: comments and blank lines removed")
+}
+
+# How symlinked directories are handled: skipped, followed, or listed without descending
+SYMLINK_POLICIES = ['skip', 'follow', 'list_only']
+
+# Tree lines written to the output in one call
+TREE_BATCH_LINES = 2048
+
+# Extensions named in the summary line of a collapsed directory
+COLLAPSED_TOP_EXTENSIONS = 3
+
+# Tree annotations for directories that are listed but not descended into
+DIRECTORY_NOTES = {
+    'symlink': "symlink, not followed",
+    'visited': "already listed"
+}
 
 
 class FileStructureExtractor:
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, scan_cache=None, content_cache=None):
         self.config = config_manager
+        self.scan_cache = scan_cache
+        self.content_cache = content_cache
+        self.last_output_path = None
+        self.last_output_paths = []
+        # Statistics of the most recent extraction, e.g. redactions per file
+        self.last_run_stats = {}
+
+    @property
+    def rules(self):
+        """Compiled filter rules for the current configuration"""
+        return get_filter_rules(self.config)
+
+    @property
+    def redactor(self):
+        """Secret redactor for the current configuration, or None when redaction is off"""
+        return get_redactor(self.config)
+
+    @property
+    def content_query(self):
+        """The configured content search, or None when every file is included"""
+        return get_content_query(self.config.config)
+
+    @property
+    def chunk_builder(self):
+        """Chunk builder for JSON lines output, with the configured chunk size and overlap"""
+        chunks = self.config.get('chunks')
+        return ChunkBuilder(chunks.get('max_chars'), chunks.get('overlap_lines'))
+
+    def excerpt_context(self):
+        """Lines of context around matches when only matching lines are written, else None"""
+        if self.content_query is None:
+            return None
+        return self.config.get('search', 'context_lines')
 
     def should_ignore_path(self, path):
         """Check if path should be ignored based on folder rules"""
-        parts = path.split(os.sep)
-        ignored_folders = self.config.get('folders', 'ignored') or []
-        excluded_folders = self.config.get('folders', 'excluded') or []
-
-        return any(folder in parts for folder in ignored_folders + excluded_folders)
+        return self.rules.should_ignore_path(path)
 
     def should_exclude_file(self, filename):
         """Check if file should be completely excluded"""
-        _, ext = os.path.splitext(filename)
-
-        excluded_extensions = self.config.get('extensions', 'excluded') or []
-        excluded_files = self.config.get('files', 'excluded') or []
-
-        # Check extension exclusion
-        if ext.lower() in excluded_extensions:
-            return True
-
-        # Check specific file exclusion
-        if filename in excluded_files:
-            return True
-
-        # Check wildcard patterns
-        for pattern in excluded_files:
-            if '*' in pattern:
-                if pattern.startswith('*') and filename.endswith(pattern[1:]):
-                    return True
-                elif pattern.endswith('*') and filename.startswith(pattern[:-1]):
-                    return True
-                elif '*' in pattern.replace(pattern.split('*')[0], '').replace(pattern.split('*')[-1], ''):
-                    # Complex wildcard matching - simplified
-                    parts = pattern.split('*')
-                    if all(part in filename for part in parts if part):
-                        return True
-
-        return False
+        return self.rules.should_exclude_file(filename)
 
     def should_ignore_file_content(self, filename):
         """Check if file content should be ignored but file shown in structure"""
-        _, ext = os.path.splitext(filename)
-
-        ignored_extensions = self.config.get('extensions', 'ignored') or []
-        ignored_files = self.config.get('files', 'ignored') or []
-
-        # Check extension
-        if ext.lower() in ignored_extensions:
-            return True
-
-        # Check specific files and patterns
-        if filename in ignored_files:
-            return True
-
-        for pattern in ignored_files:
-            if '*' in pattern:
-                if pattern.startswith('*') and filename.endswith(pattern[1:]):
-                    return True
-                elif pattern.endswith('*') and filename.startswith(pattern[:-1]):
-                    return True
-
-        return False
+        return self.rules.should_ignore_file_content(filename)
 
     def is_output_file(self, filename):
         """Check if file is a generated output file"""
         prefix = self.config.get('general', 'output_file_prefix') or 'project_structure'
+        if filename.endswith(TEMP_SUFFIX):
+            filename = filename[:-len(TEMP_SUFFIX)].rsplit('.', 1)[0]
         return (filename.startswith(prefix) and
                 (filename.endswith('.txt') or filename.endswith('.md') or
-                 filename.endswith('.json') or filename.endswith('.yaml')))
+                 filename.endswith('.json') or filename.endswith('.yaml') or filename.endswith('.jsonl')))
 
-    def delete_previous_output_files(self, directory):
-        """Delete previous output files if option is enabled"""
+    def delete_previous_output_files(self, directory, source=None):
+        """Delete previous output files if option is enabled.
+
+        With a source, only outputs whose fingerprint records that source are deleted (with their
+        sidecars), so other projects' outputs in a shared output directory are kept.
+        """
         deleted_files = []
         if not self.config.get('general', 'delete_previous_files'):
             return deleted_files
 
         try:
-            for fname in os.listdir(directory):
-                if self.is_output_file(fname):
-                    fpath = os.path.join(directory, fname)
-                    try:
-                        os.remove(fpath)
-                        deleted_files.append(fname)
-                    except Exception as e:
-                        print(f"Error deleting {fpath}: {e}")
+            names = [fname for fname in os.listdir(directory) if self.is_output_file(fname)]
+            if source is not None:
+                # Look up every owner before deleting, as the fingerprints go too
+                owners = {output_owner(fname) for fname in names}
+                owned = {owner for owner in owners if load_source(os.path.join(directory, owner)) == source}
+                names = [fname for fname in names if output_owner(fname) in owned]
+            for fname in names:
+                fpath = os.path.join(directory, fname)
+                try:
+                    os.remove(fpath)
+                    deleted_files.append(fname)
+                except Exception as e:
+                    print(f"Error deleting {fpath}: {e}", file=sys.stderr)
         except Exception as e:
-            print(f"Error scanning directory: {e}")
+            print(f"Error scanning directory: {e}", file=sys.stderr)
 
         return deleted_files
 
-    def count_files_and_folders(self, directory):
+    def count_files_and_folders(self, directory, entries=None):
         """Count total files and folders for progress tracking"""
+        if entries is None:
+            entries = self.iter_entries(directory)
+
         total_files = 0
         total_folders = 0
+        for entry in entries:
+            if entry.is_dir:
+                total_folders += 1
+            else:
+                total_files += 1
 
-        ignored_folders = self.config.get('folders', 'ignored') or []
+        return total_files, total_folders
 
-        for root, dirs, files in os.walk(directory):
-            # Filter out ignored directories
-            dirs[:] = [d for d in dirs if d not in ignored_folders]
+    def iter_entries(self, directory):
+        """Yield FileEntry records for every directory and file that passes the configured filters.
 
-            if self.should_ignore_path(root):
-                continue
+        directory may be a folder, a zip or tar archive, or an open source (see sources.py).
+        Entries come in depth-first order: a directory, then its files, then its subdirectories,
+        each sorted by name. File content is only read when an entry's content is accessed.
 
-            total_folders += 1
-            for file in files:
-                if not self.is_output_file(file) and not self.should_exclude_file(file):
-                    total_files += 1
+        Symlinked directories follow the 'symlinks' setting. When following, each physical
+        directory is walked once, which cuts cycles, and a file reached again through a hard
+        or symbolic link is marked 'duplicate' so its content is read only once.
 
-        return total_files, total_folders
+        A directory with a .structjam.toml or .structjam.json file layers its rules over the
+        ones inherited from its parent, for itself and everything below it.
+
+        A source opened here from a path is closed when the iteration ends, so archive and git
+        contents must be read while iterating; pass an open source to read them later.
+        """
+        if hasattr(directory, 'list_directory'):
+            yield from self._iter_entries(directory)
+            return
+        with self.open_source(directory) as source:
+            yield from self._iter_entries(source)
+
+    def _iter_entries(self, source):
+        """iter_entries over an open source"""
+        rules = self.rules
+        project_config = self.config.get('general', 'project_config') is not False
+        max_file_size = (self.config.get('general', 'max_file_size_mb') or 1) * 1024 * 1024
+        text_extensions = set(self.config.get_text_extensions())
+        # Content caching is keyed by file path, so it only applies to files on disk
+        content_cache = self.content_cache if source.on_disk else None
+        encodings = self.config.get('general', 'encoding_fallbacks') or None
+
+        symlinks = self.config.get('general', 'symlinks') or 'skip'
+        follow = symlinks == 'follow' and source.on_disk
+        # Physical files and directories already seen, by (device, inode)
+        seen_files = {}
+        visited_dirs = set()
+
+        # Listings and file stats can be fetched ahead on threads; they only pay off on disk
+        threads = (self.config.get('general', 'walk_threads') or 1) if source.on_disk else 1
+        lister = DirectoryLister(
+            source,
+            descend=lambda name, is_symlink: not is_symlink and not rules.should_prune_folder(name),
+            wants_stat=lambda name: not self.is_output_file(name) and not rules.should_exclude_file(name),
+            threads=threads)
+        configured_rules = rules
+
+        def walk(path, rel_path, depth, status=None, rules=rules):
+            yield FileEntry(rel_path, 'directory', 0, path, depth, status, source=source)
+            if status is not None:
+                return
 
-    def write_structure_header(self, f, directory, total_files, total_folders, file_format):
-        """Write the header for the structure file"""
+            try:
+                items = lister.listing(path)
+            except OSError:
+                return
+
+            # Rules from project config files apply to this directory and below
+            if project_config:
+                names = {item[0] for item in items if not item[1] and item[0] in PROJECT_CONFIG_NAMES}
+                if names:
+                    rules = directory_rules(rules, source, path,
+                                            [name for name in PROJECT_CONFIG_FILES if name in names])
+
+            subdirs = []
+            for name, is_dir, is_symlink, handle, stat in items:
+                if is_dir:
+                    if rules.should_prune_folder(name):
+                        continue
+                    if not is_symlink or follow:
+                        subdirs.append((name, None))
+                    elif symlinks == 'list_only':
+                        subdirs.append((name, 'symlink'))
+                    # Otherwise symlinked directories are skipped, as with os.walk
+                    continue
+
+                if self.is_output_file(name) or rules.should_exclude_file(name):
+                    continue
+
+                item_path = source.join(path, name)
+                item_rel = os.path.join(rel_path, name) if rel_path != '.' else name
+                if stat is None and rules is not configured_rules:
+                    # Stat'ed ahead with the configured rules, which exclude this file
+                    try:
+                        stat = source.stat(item_path, handle)
+                    except OSError:
+                        pass
+                size, mtime, file_id = stat or (0, 0, None)
+
+                _, ext = os.path.splitext(name)
+                same_as = None
+                if rules.should_ignore_file_content(name):
+                    status = 'ignored'
+                elif size > max_file_size:
+                    status = 'too_large'
+                elif ext.lower() not in text_extensions:
+                    status = 'not_text'
+                elif file_id is not None and file_id in seen_files:
+                    status = 'duplicate'
+                    same_as = seen_files[file_id]
+                else:
+                    status = None
+                    if file_id is not None:
+                        seen_files[file_id] = item_rel
+
+                entry = FileEntry(item_rel, 'file', size, item_path, depth + 1, status, mtime,
+                                  content_cache, source, encodings)
+                entry.same_as = same_as
+                yield entry
+
+            for name, status in subdirs:
+                sub_path = source.join(path, name)
+                sub_rel = os.path.join(rel_path, name) if rel_path != '.' else name
+                if follow and status is None:
+                    status = mark_visited(sub_path)
+                yield from walk(sub_path, sub_rel, depth + 1, status, rules)
+
+        def mark_visited(path):
+            """Record a directory about to be walked; returns 'visited' if it already was"""
+            try:
+                dir_id = source.stat(path)[2]
+            except OSError:
+                return None
+            if dir_id is None:
+                return None
+            if dir_id in visited_dirs:
+                return 'visited'
+            visited_dirs.add(dir_id)
+            return None
+
+        if follow:
+            mark_visited(source.root)
+        with lister:
+            lister.start(source.root)
+            yield from walk(source.root, '.', 0)
+
+    def filter_matching(self, entries, query):
+        """Keep the files whose content matches a query, and the directories leading to them.
+
+        Candidate files are read and scanned in parallel; kept files get their match count and
+        keep the content the search decoded for the contents pass.
+        """
+        candidates = [entry for entry in entries if not entry.is_dir and entry.content_status is None]
+        # Archive members and git blobs come through a single reader
+        threads = SEARCH_THREADS if candidates and candidates[0].source.on_disk else 1
+        hits = search_entries(query, candidates, threads)
+
+        directories = {'.'}
+        for rel_path in hits:
+            parent = os.path.dirname(rel_path)
+            while parent and parent not in directories:
+                directories.add(parent)
+                parent = os.path.dirname(parent)
+
+        matching = []
+        for entry in entries:
+            if entry.is_dir:
+                if entry.rel_path in directories:
+                    matching.append(entry)
+            elif entry.rel_path in hits:
+                entry.matches, entry.preloaded = hits[entry.rel_path]
+                matching.append(entry)
+
+        self.last_run_stats['search'] = {
+            "files_searched": len(candidates),
+            "files_matched": len(hits),
+            "matches": sum(matches for matches, _ in hits.values())
+        }
+        return matching
+
+    def open_source(self, path, revision=None):
+        """Open a directory, archive or git revision for scanning"""
+        max_file_size = (self.config.get('general', 'max_file_size_mb') or 1) * 1024 * 1024
+        return open_source(path, self.scan_cache, revision, max_file_size, self.config.get_text_extensions())
+
+    def write_structure_header(self, f, directory, total_files, total_folders, file_format, stats=None):
+        """Write the header for the structure file, with a statistics section if stats are given
+        (JSON and YAML carry them in the structure metadata instead)"""
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
+        if file_format == 'jsonl':
+            # Chunk records only, no header
+            return
         if file_format == 'md':
             f.write(f"# File Structure for: {directory}\n\n")
             f.write(f"**Generated on:** {timestamp}\n\n")
             f.write(f"**Total Files:** {total_files} | **Total Folders:** {total_folders}\n\n")
+            if stats is not None:
+                f.write("---\n\n" + stats.markdown())
             f.write("---\n\n## DIRECTORY STRUCTURE\n\n```\n")
         elif file_format == 'json':
             # JSON header will be written as metadata in the JSON structure
@@ -139,210 +351,724 @@ class FileStructureExtractor:
             f.write(f"File Structure for: {directory}\n")
             f.write(f"Generated on: {timestamp}\n")
             f.write(f"Total Files: {total_files} | Total Folders: {total_folders}\n")
+            if stats is not None:
+                f.write('=' * 80 + "\n\n" + stats.text() + "\n")
             f.write('=' * 80 + "\n\nDIRECTORY STRUCTURE:\n" + '=' * 80 + "\n")
 
-    def write_directory_structure(self, f, directory, file_format):
+    def write_directory_structure(self, f, directory, file_format, entries=None, stats=None):
         """Write the directory structure to file"""
-        ignored_folders = self.config.get('folders', 'ignored') or []
+        if file_format == 'jsonl':
+            return
+        if entries is None:
+            entries = list(self.iter_entries(directory))
 
         if file_format in ['json', 'yaml']:
-            structure_data = self.build_structure_data(directory)
+            structure_data = self.build_structure_data(directory, entries, stats)
             if file_format == 'json':
                 json.dump(structure_data, f, indent=2, ensure_ascii=False)
             else:  # yaml
+                import yaml  # imported on first use, it is slow to load
                 yaml.dump(structure_data, f, default_flow_style=False, allow_unicode=True)
             return
 
-        # Text-based formats
-        for root, dirs, files in os.walk(directory):
-            dirs[:] = [d for d in dirs if d not in ignored_folders]
+        # Text-based formats, written in batches of lines
+        batch = []
+        for line in self.tree_lines(directory, entries):
+            batch.append(line)
+            if len(batch) >= TREE_BATCH_LINES:
+                f.write("".join(batch))
+                batch.clear()
+        f.write("".join(batch))
+
+    def tree_lines(self, directory, entries):
+        """Render entries as tree lines with last-child connectors.
+
+        Directories with more files than general.max_tree_files show the first ones and
+        collapse the rest into a single summary line.
+        """
+        max_files = self.config.get('general', 'max_tree_files') or 0
+        last_flags = self.last_child_flags(entries)
+        # Whether the open directory at each depth is its parent's last child
+        open_last = []
+        shown = 0
+        hidden = []
+
+        for entry, is_last in zip(entries, last_flags):
+            prefix = "".join("    " if last else "│   " for last in open_last[1:entry.depth])
+            connector = "└── " if is_last else "├── "
+
+            if entry.is_dir:
+                if hidden:
+                    yield self.collapsed_line(hidden)
+                    hidden = []
+                shown = 0
+                del open_last[entry.depth:]
+                open_last.append(is_last)
+
+                note = f" ({DIRECTORY_NOTES[entry.content_status]})" if entry.content_status else ""
+                if entry.depth == 0:
+                    yield f"{os.path.basename(directory) or directory}/{note}\n"
+                else:
+                    yield f"{prefix}{connector}{entry.name}/{note}\n"
+                continue
 
-            if self.should_ignore_path(root):
+            shown += 1
+            if max_files and shown > max_files:
+                hidden.append((entry, prefix, connector))
                 continue
 
-            rel = os.path.relpath(root, directory)
-            level = 0 if rel == "." else rel.count(os.sep)
-            indent = "│   " * level
-            name = os.path.basename(directory) if rel == "." else os.path.basename(root)
-            f.write(f"{indent}├── {name}/\n")
+            note = ""
+            if entry.matches:
+                note = f" ({entry.matches} {'match' if entry.matches == 1 else 'matches'})"
+            yield f"{prefix}{connector}{entry.name}{note}\n"
+
+        if hidden:
+            yield self.collapsed_line(hidden)
+
+    @staticmethod
+    def last_child_flags(entries):
+        """For depth-first entries, flag each one that is the last child of its directory"""
+        flags = [False] * len(entries)
+        # Whether a later sibling was seen, per depth, walking backwards
+        following = []
+        for i in range(len(entries) - 1, -1, -1):
+            depth = entries[i].depth
+            del following[depth + 1:]
+            following.extend([False] * (depth + 1 - len(following)))
+            flags[i] = not following[depth]
+            following[depth] = True
+        return flags
+
+    @staticmethod
+    def collapsed_line(hidden):
+        """Summarize the files left out of a large directory as one tree line"""
+        _, prefix, connector = hidden[-1]
+        total = sum(entry.size for entry, _, _ in hidden)
+        extensions = {}
+        for entry, _, _ in hidden:
+            ext = entry.ext or "no extension"
+            extensions[ext] = extensions.get(ext, 0) + 1
+        top = sorted(extensions.items(), key=lambda item: (-item[1], item[0]))[:COLLAPSED_TOP_EXTENSIONS]
+        details = ", ".join([format_size(total)] + [f"{count} {ext}" for ext, count in top])
+        return f"{prefix}{connector}… {len(hidden)} more files ({details})\n"
+
+    def build_structure_data(self, directory, entries=None, stats=None):
+        """Build structure data for JSON/YAML export, with the scan statistics if given"""
+        if entries is None:
+            entries = list(self.iter_entries(directory))
+
+        root = {"name": os.path.basename(directory), "type": "directory", "children": []}
+        # Entries come depth-first, so the parent of each entry is on this stack
+        stack = [root]
+        total_files = 0
+        total_folders = 0
 
-            sub_indent = "│   " * (level + 1)
-            for file in sorted(files):
-                if self.is_output_file(file) or self.should_exclude_file(file):
+        for entry in entries:
+            if entry.is_dir:
+                total_folders += 1
+                if entry.depth == 0:
                     continue
-                f.write(f"{sub_indent}├── {file}\n")
-
-    def build_structure_data(self, directory):
-        """Build structure data for JSON/YAML export"""
-        ignored_folders = self.config.get('folders', 'ignored') or []
+                node = {"name": entry.name, "type": "directory", "children": []}
+                if entry.content_status:
+                    node["note"] = DIRECTORY_NOTES[entry.content_status]
+                del stack[entry.depth:]
+                stack[-1]["children"].append(node)
+                stack.append(node)
+            else:
+                total_files += 1
+                del stack[entry.depth:]
+                node = {"name": entry.name, "type": "file", "size": entry.size}
+                if entry.matches:
+                    node["matches"] = entry.matches
+                stack[-1]["children"].append(node)
+
+        # Directories first, then files, as in the original layout
+        def order_children(node):
+            node["children"].sort(key=lambda child: child["type"] != "directory")
+            for child in node["children"]:
+                if child["type"] == "directory":
+                    order_children(child)
+
+        order_children(root)
+
+        metadata = {
+            "directory": directory,
+            "generated_on": datetime.now().isoformat(),
+            "total_files": total_files,
+            "total_folders": total_folders
+        }
+        # Snapshots of a git revision record which commit they show
+        source = entries[0].source if entries else None
+        if getattr(source, 'revision', None):
+            metadata["revision"] = source.revision
+            metadata["commit"] = source.commit
+        if stats is not None:
+            metadata["statistics"] = stats.to_dict()
+
+        return {"metadata": metadata, "structure": root}
+
+    def write_file_contents(self, f, directory, file_format, progress_callback=None, index=None,
+                            entries=None):
+        """Write file contents to the output file, recording sections in the index if given"""
+        self.write_contents([(f, file_format, index)], directory, progress_callback, entries)
+
+    def write_contents(self, targets, directory, progress_callback=None, entries=None):
+        """Write file contents to several outputs at once, reading and rendering each file once.
+
+        targets are (file, format, index or None) tuples; JSON and YAML are skipped, and JSON lines
+        targets get each file's content as chunks (see chunker.py).
+        """
+        if entries is None and not hasattr(directory, 'list_directory'):
+            # Contents are read after the walk, so the source has to stay open until then
+            with self.open_source(directory) as source:
+                return self.write_contents(targets, source, progress_callback)
+
+        # File contents not included in structured formats
+        targets = [target for target in targets if target[1] in ['txt', 'md', 'jsonl']]
+        if not targets:
+            return
 
-        def build_tree(path, name):
-            tree = {"name": name, "type": "directory", "children": []}
+        max_file_size = self.config.get('general', 'max_file_size_mb') or 1
+        self.last_run_stats['chunks'] = 0
 
-            try:
-                items = os.listdir(path)
-                # Sort items: directories first, then files
-                dirs = [item for item in items if os.path.isdir(os.path.join(path, item))
-                        and item not in ignored_folders]
-                files = [item for item in items if os.path.isfile(os.path.join(path, item))
-                         and not self.is_output_file(item) and not self.should_exclude_file(item)]
-
-                for dirname in sorted(dirs):
-                    dir_path = os.path.join(path, dirname)
-                    if not self.should_ignore_path(dir_path):
-                        tree["children"].append(build_tree(dir_path, dirname))
-
-                for filename in sorted(files):
-                    file_info = {"name": filename, "type": "file"}
-                    file_path = os.path.join(path, filename)
-                    try:
-                        file_info["size"] = os.path.getsize(file_path)
-                    except OSError:
-                        file_info["size"] = 0
-                    tree["children"].append(file_info)
-
-            except (OSError, PermissionError):
-                pass
-
-            return tree
-
-        return {
-            "metadata": {
-                "directory": directory,
-                "generated_on": datetime.now().isoformat(),
-                "total_files": self.count_files_and_folders(directory)[0],
-                "total_folders": self.count_files_and_folders(directory)[1]
-            },
-            "structure": build_tree(directory, os.path.basename(directory))
-        }
+        # Write section headers
+        for f, file_format, _ in targets:
+            if file_format == 'md':
+                f.write("```\n\n## FILE CONTENTS\n\n")
+            elif file_format == 'txt':
+                f.write(f"\nFILE CONTENTS:\n{'=' * 80}\n\n")
 
-    def write_file_contents(self, f, directory, file_format, progress_callback=None):
-        """Write file contents to the output file"""
-        if file_format in ['json', 'yaml']:
-            return  # File contents not included in structured formats
+        if entries is None:
+            entries = self.iter_entries(directory)
+        files = [entry for entry in entries if not entry.is_dir]
+        self.last_run_stats['redactions'] = {}
+        self.last_run_stats['minify'] = {}
 
-        ignored_folders = self.config.get('folders', 'ignored') or []
-        max_file_size = self.config.get('general', 'max_file_size_mb') or 1
-        text_extensions = self.config.get_text_extensions()
+        total_files = len(files)
+        executor, jobs = self.start_content_jobs(files)
 
-        # Write section header
-        if file_format == 'md':
-            f.write("```\n\n## FILE CONTENTS\n\n")
-        else:  # txt
-            f.write(f"\nFILE CONTENTS:\n{'=' * 80}\n\n")
+        try:
+            for processed_items, entry in enumerate(files, 1):
+                if progress_callback and total_files > 0:
+                    progress_callback(50 + (processed_items / total_files * 50))
 
-        processed_items = 0
-        total_files = self.count_files_and_folders(directory)[0]
+                self.write_file_entry(targets, entry, max_file_size, jobs.get(entry.rel_path))
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
 
-        for root, dirs, files in os.walk(directory):
-            dirs[:] = [d for d in dirs if d not in ignored_folders]
+    def start_content_jobs(self, entries):
+        """Start skeleton parsing and minifying across processes; returns (executor or None, jobs by path)"""
+        # Excerpts of matching lines are cut from the full content
+        if self.excerpt_context() is not None:
+            return None, {}
 
-            if self.should_ignore_path(root):
+        candidates = []
+        for entry in entries:
+            if entry.content_status is not None:
                 continue
+            mode = self.config.get_content_mode(entry.ext)
+            if mode in CONTENT_TRANSFORMS and CONTENT_TRANSFORMS[mode][0](entry.ext):
+                candidates.append((entry, mode))
 
-            for file in sorted(files):
-                if self.is_output_file(file) or self.should_exclude_file(file):
-                    continue
+        # Workers read files on disk themselves; content the search already decoded is sent along
+        if len(candidates) < MIN_POOL_FILES or not all(entry.source.on_disk or entry.preloaded is not None
+                                                       for entry, _ in candidates):
+            return None, {entry.rel_path: _InlineJob(entry, mode) for entry, mode in candidates}
 
-                processed_items += 1
-                if progress_callback and total_files > 0:
-                    progress_callback(50 + (processed_items / total_files * 50))
+        workers = self.config.get('general', 'worker_processes') or None
+        try:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            jobs = {}
+            for entry, mode in candidates:
+                if entry.preloaded is not None:
+                    content, encoding = entry.preloaded
+                    entry.preloaded = None
+                    job = _LoadedJob(executor.submit(CONTENT_TRANSFORMS[mode][2], content, entry.ext), encoding,
+                                     len(content.encode("utf-8", errors="surrogatepass")))
+                else:
+                    job = executor.submit(CONTENT_TRANSFORMS[mode][1], entry.path, entry.ext, entry.encodings)
+                job.mode = mode
+                jobs[entry.rel_path] = job
+        except (OSError, NotImplementedError) as e:
+            # Process pools are unavailable on some platforms; work inline instead
+            print(f"Content process pool unavailable, working inline: {e}", file=sys.stderr)
+            return None, {entry.rel_path: _InlineJob(entry, mode) for entry, mode in candidates}
+        return executor, jobs
+
+    def write_file_entry(self, targets, entry, max_file_size, content_job=None):
+        """Write a single file's content section to each (file, format, index) target,
+        recording it in the target's section index if given"""
+        rendered = self.render_file_body(entry, max_file_size, content_job)
+        if rendered is None:
+            return
 
-                path = os.path.join(root, file)
-                rel = os.path.relpath(path, directory)
+        for f, file_format, index in targets:
+            if file_format == 'jsonl':
+                # Files written as a message (ignored, too large, ...) have no chunks
+                if not rendered[2]:
+                    content = rendered[0] if not rendered[3] else self.read_chunk_content(entry)
+                    if content is not None:
+                        self.last_run_stats['chunks'] += self.chunk_builder.write(
+                            f, normalize_section_path(entry.rel_path), content, entry.ext)
+                continue
 
-                try:
-                    _, file_ext = os.path.splitext(file)
-
-                    # Check if file content should be ignored
-                    if self.should_ignore_file_content(file):
-                        msg = "Content ignored (configured in settings)"
-                        if file_format == 'md':
-                            f.write(f"### FILE: {rel}\n\n{msg}\n\n")
-                        else:
-                            f.write(f"FILE: {rel}\n{msg}\n\n")
-                        continue
+            section = self.format_file_section(entry, rendered, file_format)
+            if index is None:
+                f.write(section)
+                continue
 
-                    # Check file size
-                    size = os.path.getsize(path)
-                    if size > max_file_size * 1024 * 1024:
-                        msg = f"Content too large (>{max_file_size}MB)"
-                        if file_format == 'md':
-                            f.write(f"### FILE: {rel}\n\n{msg}\n\n")
-                        else:
-                            f.write(f"FILE: {rel}\n{msg}\n\n")
-                        continue
+            start = f.tell()
+            f.write(section)
+            index.add(entry.rel_path, start, f.tell() - start, rendered[0], entry.encoding)
 
-                    # Check if it's a supported text file
-                    if file_ext.lower() not in text_extensions:
-                        continue
+    def render_file_section(self, entry, file_format, max_file_size, content_job=None):
+        """Render a file's content section; returns (section, body) or None if the file is skipped"""
+        rendered = self.render_file_body(entry, max_file_size, content_job)
+        if rendered is None:
+            return None
+        return self.format_file_section(entry, rendered, file_format), rendered[0]
 
-                    # Read file content
-                    try:
-                        with open(path, "r", encoding="utf-8") as src:
-                            content = src.read()
-                    except UnicodeDecodeError:
-                        try:
-                            with open(path, "r", encoding="latin-1") as src:
-                                content = src.read()
-                        except:
-                            content = "Error: Unable to decode file content"
-
-                    # Write content
-                    if file_format == 'md':
-                        lang = file_ext.lstrip('.') or 'text'
-                        f.write(f"### FILE: {rel}\n\n```{lang}\n{content}\n```\n\n---\n\n")
-                    else:
-                        f.write(f"FILE: {rel}\n{'-' * 80}\n{content}\n\n{'=' * 80}\n\n")
+    def read_chunk_content(self, entry):
+        """Full (redacted) content of a file whose section holds a skeleton, minified text or excerpt.
 
+        Chunks carry line numbers, so they are cut from the file itself; returns None if it cannot be read.
+        """
+        try:
+            content = entry.read_content()
+        except Exception as e:
+            print(f"Error reading {entry.rel_path} for chunks: {e}", file=sys.stderr)
+            return None
+        redactor = self.redactor
+        return redactor.redact(content)[0] if redactor is not None else content
+
+    def format_file_section(self, entry, rendered, file_format):
+        """Format a rendered (body, note, is_message, transformed) file section for an output format"""
+        body, note, is_message = rendered[:3]
+        if is_message:
+            return self.format_message_section(entry.rel_path, body, file_format)
+        return self.format_content_section(entry.rel_path, body, entry.ext, file_format, note)
+
+    def render_file_body(self, entry, max_file_size, content_job=None):
+        """Get what a file's section holds, independent of the output format.
+
+        Returns (body, note, is_message, transformed), where body is the content or a message
+        in its place and transformed tells whether it is a skeleton, minified text or excerpt
+        instead of the file's content, or None if the file is skipped.
+        """
+        rel = entry.rel_path
+
+        # Check if file content should be ignored
+        if entry.content_status == 'ignored':
+            return "Content ignored (configured in settings)", None, True, False
+
+        # Check file size
+        if entry.content_status == 'too_large':
+            return f"Content too large (>{max_file_size}MB)", None, True, False
+
+        # Check if it's a supported text file
+        if entry.content_status == 'not_text':
+            return None
+
+        # Physical files reached again through a link are only written once
+        if entry.content_status == 'duplicate':
+            return f"Same file as {entry.same_as} (linked)", None, True, False
+
+        try:
+            # Use the skeleton or minified content when it could be built, otherwise the full content
+            content = None
+            if content_job is not None:
+                try:
+                    content, entry.encoding, source_size = content_job.result()
                 except Exception as e:
-                    msg = f"Error reading file: {str(e)}"
-                    if file_format == 'md':
-                        f.write(f"### FILE: {rel}\n\n{msg}\n\n")
-                    else:
-                        f.write(f"FILE: {rel}\n{msg}\n\n")
+                    print(f"Content mode '{content_job.mode}' failed for {rel}: {e}", file=sys.stderr)
+
+            note = None
+            context = self.excerpt_context()
+            if content is not None:
+                note = CONTENT_TRANSFORMS[content_job.mode][3]
+                if content_job.mode == 'minify':
+                    self.record_minified(entry, source_size, content)
+            else:
+                content = entry.read_content()
+                excerpt = self.content_query.excerpt(content, context) if context is not None else None
+                if excerpt is not None:
+                    content = excerpt
+                    note = f"Matching lines with {context} {'line' if context == 1 else 'lines'} of context"
+
+            content, redactions = self.redact_content(rel, content)
+            return content, self.content_note(note, entry.encoding, redactions), False, note is not None
 
-    def extract_structure(self, directory, progress_callback=None):
-        """Main method to extract file structure"""
+        except Exception as e:
+            return f"Error reading file: {str(e)}", None, True, False
+
+    def record_minified(self, entry, source_size, content):
+        """Add a minified file to the per-language byte counts of the run.
+
+        Both counts are UTF-8 sizes of decoded text, so the encoding on disk does not count as saved.
+        """
+        language = minifier.get_language(entry.ext)
+        stats = self.last_run_stats.setdefault('minify', {}).setdefault(
+            language, {"files": 0, "bytes_before": 0, "bytes_after": 0})
+        stats["files"] += 1
+        stats["bytes_before"] += source_size
+        stats["bytes_after"] += len(content.encode("utf-8", errors="surrogatepass"))
+
+    def redact_content(self, rel, content):
+        """Mask secrets when redaction is enabled; returns (content, {pattern: count})"""
+        redactor = self.redactor
+        if redactor is None:
+            return content, {}
+
+        content, counts = redactor.redact(content)
+        if counts:
+            self.last_run_stats.setdefault('redactions', {})[rel] = counts
+        return content, counts
+
+    def redact_stored(self, rel, content):
+        """Mask secrets in content stored in a snapshot; returns the content"""
+        return self.redact_content(rel, content)[0]
+
+    def content_note(self, note, encoding, redactions=None):
+        """Extend a section note with the source encoding (when not UTF-8) and redaction counts"""
+        notes = [note] if note else []
+        if encoding and encoding != 'utf-8':
+            notes.append(f"Encoding: {encoding}")
+        if redactions:
+            notes.append("Redacted: " + ", ".join(f"{count} {name}"
+                                                  for name, count in sorted(redactions.items())))
+        return "; ".join(notes) or None
+
+    def format_message_section(self, rel, msg, file_format):
+        """Format a section that carries a message instead of file content"""
+        if file_format == 'md':
+            return f"### FILE: {rel}\n\n{msg}\n\n"
+        return f"FILE: {rel}\n{msg}\n\n"
+
+    def format_content_section(self, rel, content, file_ext, file_format, note=None):
+        """Format a section holding file content"""
+        if file_format == 'md':
+            lang = file_ext.lstrip('.') or 'text'
+            note = f"_{note}_\n\n" if note else ""
+            return f"### FILE: {rel}\n\n{note}```{lang}\n{content}\n```\n\n---\n\n"
+        note = f"[{note}]\n" if note else ""
+        return f"FILE: {rel}\n{note}{'-' * 80}\n{content}\n\n{'=' * 80}\n\n"
+
+    def extract_structure(self, directory, progress_callback=None, output=None, revision=None,
+                          force=False, formats=None):
+        """Main method to extract file structure.
+
+        directory may also be a zip or tar archive, whose members are read without unpacking it.
+        With a revision, directory is a git repository and that revision's files are read from
+        the object store without checking it out.
+        output overrides the configured output directory: a directory, an explicit file path,
+        '-' to stream to stdout, or a writable text stream. Files are written to a temporary
+        name and renamed into place.
+        formats overrides the configured output formats. With several formats, the tree is
+        scanned and each file's content read once, and every format is written side by side
+        (an explicit file path then gives the base name, one file per format extension).
+        When the scanned tree and settings match the fingerprints stored with the previous
+        output files, those files are returned instead of being regenerated, unless force is set.
+        """
         if not directory or not os.path.exists(directory):
             return False, f"Directory does not exist: {directory}"
 
+        self.last_run_stats = {}
         try:
-            # Clean up previous files
-            deleted_files = self.delete_previous_output_files(directory)
-
-            # Get file format
-            file_format = self.config.get('general', 'file_format') or 'md'
+            formats = list(dict.fromkeys(formats)) if formats else self.config.get_output_formats()
+            unsupported = [file_format for file_format in formats if file_format not in OUTPUT_FORMATS]
+            if unsupported:
+                return False, f"Unsupported format: {', '.join(unsupported)}"
 
-            # Count items for progress
-            total_files, total_folders = self.count_files_and_folders(directory)
-
-            # Generate output filename
+            # Generate output filenames
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             prefix = self.config.get('general', 'output_file_prefix') or 'project_structure'
-            output_file = os.path.join(directory, f"{prefix}_{timestamp}.{file_format}")
+            output = output or self.config.get('general', 'output_dir') or None
+            # Archives get their output next to them by default
+            base_dir = directory if os.path.isdir(directory) else os.path.dirname(os.path.abspath(directory))
+            # Recorded with each output, so outputs from other sources are left alone
+            source_path = os.path.abspath(directory)
+
+            outputs = []
+            for file_format in formats:
+                file_name = f"{prefix}_{timestamp}.{file_format}"
+                output_file = resolve_output(base_dir, output, file_name)
+
+                # Devices and pipes (e.g. /dev/null) are written like streams, without sidecars
+                to_file = (output_file != STDOUT and not is_stream(output_file)
+                           and not is_special_file(output_file))
+                if not to_file and len(formats) > 1:
+                    return False, "Several output formats need an output directory or file name"
+                auto_named = to_file and os.path.basename(output_file) == file_name
+                if auto_named and os.path.abspath(os.path.dirname(output_file)) != source_path:
+                    # Shared output directory: tag the name with the source, so two sources writing in
+                    # the same second never get the same file name
+                    output_file = os.path.join(os.path.dirname(output_file),
+                                               f"{prefix}_{timestamp}_{source_tag(source_path)}.{file_format}")
+                if to_file and not auto_named:
+                    if len(formats) > 1:
+                        output_file = f"{os.path.splitext(output_file)[0]}.{file_format}"
+                    else:
+                        file_format = format_from_path(output_file, file_format)
+
+                # Section index sidecar for random access to file contents
+                index = None
+                if file_format in ['txt', 'md'] and to_file and self.config.get('general', 'write_index'):
+                    index = SectionIndex(os.path.basename(output_file), file_format)
+                outputs.append(_Output(output_file, file_format, to_file, auto_named, index))
+
+            with self.open_source(directory, revision) as source:
+                # Scan once; the header, tree and contents of every format use the same entries.
+                # Statistics are gathered from the scanned sizes as entries arrive.
+                stats = ScanStats() if self.config.get('general', 'include_statistics') else None
+                entries = []
+                for entry in self.iter_entries(source):
+                    entries.append(entry)
+                    if stats is not None:
+                        stats.add(entry)
+
+                if outputs[0].to_file:
+                    # Reuse the previous outputs when nothing that goes into them has changed
+                    previous = []
+                    for target in outputs:
+                        target.fingerprint = tree_fingerprint(entries, self.config.config, target.file_format,
+                                                              getattr(source, 'commit', None))
+                        output_dir = os.path.dirname(target.path)
+                        last = (find_previous_output(output_dir, prefix, target.file_format, source_path)
+                                if target.auto_named else target.path)
+                        sidecars = [index_path_for(last)] if target.index is not None and last else []
+                        if is_unchanged(last, target.fingerprint, sidecars):
+                            previous.append(last)
+
+                    if not force and len(previous) == len(outputs):
+                        self.last_output_paths = [os.path.abspath(path) for path in previous]
+                        self.last_output_path = self.last_output_paths[0]
+                        if progress_callback:
+                            progress_callback(100)
+                        names = ", ".join(os.path.basename(path) for path in previous)
+                        return True, f"Unchanged since last run: {names}"
+
+                    # Clean up previous files where the new ones go
+                    for output_dir in dict.fromkeys(os.path.dirname(target.path) for target in outputs
+                                                    if target.auto_named):
+                        # Outside the scanned directory, other projects' outputs may share the folder
+                        if os.path.isdir(output_dir):
+                            shared = os.path.abspath(output_dir) != os.path.abspath(directory)
+                            self.delete_previous_output_files(output_dir, source_path if shared else None)
+
+                # Keep only the files that mention what is searched for
+                query = self.content_query
+                if query is not None:
+                    entries = self.filter_matching(entries, query)
+                    if stats is not None:
+                        stats = ScanStats.from_entries(entries)
+                total_files, total_folders = self.count_files_and_folders(directory, entries)
+                for target in outputs:
+                    if target.index is not None:
+                        target.index.set_entries(entries)
+
+                # Write the structure files side by side
+                with contextlib.ExitStack() as stack:
+                    for target in outputs:
+                        target.file = stack.enter_context(AtomicWriter(target.path))
+
+                    # Write headers
+                    label = f"{directory} @ {revision}" if revision else directory
+                    for target in outputs:
+                        self.write_structure_header(target.file, label, total_files, total_folders,
+                                                    target.file_format, stats)
+
+                    # Update progress
+                    if progress_callback:
+                        progress_callback(25)
+
+                    # Write directory structures
+                    for target in outputs:
+                        self.write_directory_structure(target.file, directory, target.file_format, entries,
+                                                       stats)
+
+                    # Update progress
+                    if progress_callback:
+                        progress_callback(50)
+
+                    # Write file contents (for text formats only), reading each file once
+                    self.write_contents([(target.file, target.file_format, target.index) for target in outputs],
+                                        directory, progress_callback, entries)
+
+            redactions = self.last_run_stats.get('redactions')
+            summary = ""
+            if redactions:
+                total = sum(sum(counts.values()) for counts in redactions.values())
+                summary = f" ({total} secrets redacted in {len(redactions)} files)"
+            search = self.last_run_stats.get('search')
+            if search:
+                summary += f" ({search['files_matched']} of {search['files_searched']} files match)"
+            if self.last_run_stats.get('chunks'):
+                summary += f" ({self.last_run_stats['chunks']} chunks)"
+            minified = self.last_run_stats.get('minify')
+            if minified:
+                saved = sum(stats["bytes_before"] - stats["bytes_after"] for stats in minified.values())
+                summary += f" ({saved / 1024:.1f} KB saved by minifying)"
+
+            if not outputs[0].to_file:
+                self.last_output_path = None
+                self.last_output_paths = []
+                target = outputs[0].path
+                if target == STDOUT or is_stream(target):
+                    target = 'stdout' if target == STDOUT else 'stream'
+                return True, f"Successfully written to {target}{summary}"
+
+            for target in outputs:
+                if target.index is not None:
+                    target.index.save(index_path_for(target.path))
+                save_fingerprint(target.path, target.fingerprint, source_path)
+
+            self.last_output_paths = [os.path.abspath(target.path) for target in outputs]
+            self.last_output_path = self.last_output_paths[0]
+            names = ", ".join(os.path.basename(target.path) for target in outputs)
+            return True, f"Successfully created: {names}{summary}"
 
-            # Write the structure file
-            with open(output_file, "w", encoding="utf-8") as f:
-                # Write header
-                self.write_structure_header(f, directory, total_files, total_folders, file_format)
+        except Exception as e:
+            return False, f"Error: {str(e)}"
 
-                # Update progress
-                if progress_callback:
-                    progress_callback(25)
+    def snapshot(self, directory, database=None, name=None, revision=None, progress_callback=None):
+        """Store a scan of a directory as a snapshot in the SQLite snapshot store (see snapshots.py).
 
-                # Write directory structure
-                self.write_directory_structure(f, directory, file_format)
+        File contents are stored as read, redacted when redaction is enabled; content modes
+        and content search do not apply. database defaults to general.snapshot_db.
+        """
+        from snapshots import SnapshotStore
 
-                # Update progress
-                if progress_callback:
-                    progress_callback(50)
+        if not directory or not os.path.exists(directory):
+            return False, f"Directory does not exist: {directory}"
 
-                # Write file contents (for text formats only)
-                if file_format in ['txt', 'md']:
-                    self.write_file_contents(f, directory, file_format, progress_callback)
+        self.last_run_stats = {}
+        try:
+            database = database or self.config.get('general', 'snapshot_db') or None
+            redact = self.redact_stored if self.redactor is not None else None
+
+            with self.open_source(directory, revision) as source:
+                entries = list(self.iter_entries(source))
+                if progress_callback:
+                    progress_callback(10)
+                with SnapshotStore(database) as store:
+                    snapshot_id = store.add_snapshot(
+                        os.path.abspath(directory), entries, name, getattr(source, 'commit', None) or revision,
+                        redact, lambda value: progress_callback(10 + value * 0.9) if progress_callback else None)
 
-            return True, f"Successfully created: {os.path.basename(output_file)}"
+            files = sum(1 for entry in entries if not entry.is_dir)
+            return True, f"Snapshot {snapshot_id} stored in {store.path} ({files} files)"
 
         except Exception as e:
-            return False, f"Error: {str(e)}"
\ No newline at end of file
+            return False, f"Error: {str(e)}"
+
+
+class _Output:
+    """One output file of an extraction and what goes with it"""
+
+    def __init__(self, path, file_format, to_file, auto_named, index):
+        self.path = path
+        self.file_format = file_format
+        self.to_file = to_file
+        self.auto_named = auto_named
+        self.index = index
+        self.fingerprint = None
+        self.file = None
+
+
+class FileEntry:
+    """Lightweight record of a scanned file or directory.
+
+    content_status is None when the content can be read, otherwise the reason it is skipped:
+    'ignored' (configured in settings), 'too_large', 'not_text' or 'duplicate' (the same
+    physical file as same_as). Directories that are listed but not walked have 'symlink'
+    or 'visited'.
+    """
+
+    __slots__ = ('rel_path', 'kind', 'size', 'path', 'depth', 'content_status', 'mtime', 'cache',
+                 'source', 'same_as', 'encodings', 'encoding', 'matches', 'preloaded', '_content')
+
+    def __init__(self, rel_path, kind, size, path, depth, content_status=None, mtime=0, cache=None,
+                 source=None, encodings=None):
+        self.rel_path = rel_path
+        self.kind = kind
+        self.size = size
+        self.path = path
+        self.depth = depth
+        self.content_status = content_status
+        self.mtime = mtime
+        self.cache = cache
+        self.source = source
+        self.same_as = None
+        # Matches of the content search, when one is used
+        self.matches = None
+        # Fallback chain to decode with, and the encoding actually used once content is read
+        self.encodings = encodings
+        self.encoding = None
+        # (text, encoding) the content search already decoded, handed to the next read_content
+        self.preloaded = None
+        self._content = None
+
+    def __repr__(self):
+        return f"FileEntry({self.rel_path!r}, {self.kind!r}, size={self.size})"
+
+    @property
+    def is_dir(self):
+        return self.kind == 'directory'
+
+    @property
+    def name(self):
+        return os.path.basename(self.rel_path)
+
+    @property
+    def ext(self):
+        return os.path.splitext(self.rel_path)[1].lower()
+
+    @property
+    def content(self):
+        """File content, loaded on first access; None for directories and skipped content"""
+        if self._content is None and not self.is_dir and self.content_status is None:
+            self._content = self.read_content()
+        return self._content
+
+    def read_content(self):
+        """Read the file content without caching it on the entry; sets encoding.
+
+        Content the search already decoded is handed over once instead of being read again.
+        """
+        if self.preloaded is not None:
+            (content, self.encoding), self.preloaded = self.preloaded, None
+        else:
+            cached = self.cache.get(self.path, self.size, self.mtime) if self.cache is not None else None
+            if cached is not None:
+                content, self.encoding = cached
+                return content
+            content, self.encoding = self.source.read_text(self.path, self.encodings)
+        if self.cache is not None:
+            self.cache.put(self.path, self.size, self.mtime, content, self.encoding)
+        return content
+
+
+class _LoadedJob:
+    """Future-like wrapper of a skeleton or minify job run on content that was already decoded"""
+
+    def __init__(self, future, encoding, source_size):
+        self.future = future
+        self.encoding = encoding
+        self.source_size = source_size
+
+    def result(self):
+        return self.future.result(), self.encoding, self.source_size
+
+
+class _InlineJob:
+    """Future-like wrapper that builds a skeleton or minified content in-process when it is needed"""
+
+    def __init__(self, entry, mode):
+        self.entry = entry
+        self.mode = mode
+
+    def result(self):
+        content = self.entry.read_content()
+        return (CONTENT_TRANSFORMS[self.mode][2](content, self.entry.ext), self.entry.encoding,
+                len(content.encode("utf-8", errors="surrogatepass")))
@@ -0,0 +1,199 @@
+import json
+import os
+import sys
+import threading
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11: only JSON project files are read
+    tomllib = None
+
+# Project config files, read in every scanned directory and layered over the inherited rules
+PROJECT_CONFIG_FILES = ('.structjam.toml', '.structjam.json')
+PROJECT_CONFIG_NAMES = frozenset(PROJECT_CONFIG_FILES)
+
+RULE_SECTIONS = ('folders', 'extensions', 'files')
+RULE_KINDS = ('ignored', 'excluded')
+
+
+class FilterRules:
+    """Folder, extension and file rules compiled into sets and tuples for fast matching.
+
+    Wildcard semantics match the Settings window: '*x' matches names ending in x, 'x*' names
+    starting with x, and for excluded files 'a*b' matches names containing every part.
+    A non-empty extensions 'only' list excludes every file with another extension.
+    """
+
+    def __init__(self, folders, extensions, files):
+        # The rule lists this set was compiled from, for layering project and profile rules on top
+        self.lists = {section: {kind: list(rules.get(kind, []) or []) for kind in RULE_KINDS}
+                      for section, rules in zip(RULE_SECTIONS, (folders, extensions, files))}
+        self.lists['extensions']['only'] = list(extensions.get('only', []) or [])
+        self.only_extensions = frozenset(self.lists['extensions']['only'])
+
+        self.pruned_folders = frozenset(folders.get('ignored', []) + folders.get('excluded', []))
+
+        self.excluded_extensions = frozenset(extensions.get('excluded', []))
+        self.ignored_extensions = frozenset(extensions.get('ignored', []))
+
+        self.excluded_names, self.excluded_suffixes, self.excluded_prefixes, self.excluded_parts = \
+            self.compile_patterns(files.get('excluded', []), allow_parts=True)
+        self.ignored_names, self.ignored_suffixes, self.ignored_prefixes, _ = \
+            self.compile_patterns(files.get('ignored', []), allow_parts=False)
+
+    @staticmethod
+    def compile_patterns(patterns, allow_parts):
+        """Split file patterns into exact names, suffixes, prefixes and multi-part patterns"""
+        names, suffixes, prefixes, parts = set(patterns), [], [], []
+        for pattern in patterns:
+            if '*' not in pattern:
+                continue
+            if pattern.startswith('*'):
+                suffixes.append(pattern[1:])
+            elif pattern.endswith('*'):
+                prefixes.append(pattern[:-1])
+            elif allow_parts:
+                parts.append(tuple(part for part in pattern.split('*') if part))
+        return frozenset(names), tuple(suffixes), tuple(prefixes), tuple(parts)
+
+    def should_prune_folder(self, name):
+        """Check if a folder is left out of the scan (ignored or excluded)"""
+        return name in self.pruned_folders
+
+    def should_ignore_path(self, path):
+        """Check if any component of a path is an ignored or excluded folder"""
+        return any(part in self.pruned_folders for part in path.split(os.sep))
+
+    def should_exclude_file(self, filename):
+        """Check if file should be completely excluded"""
+        ext = os.path.splitext(filename)[1].lower()
+        if ext in self.excluded_extensions or (self.only_extensions and ext not in self.only_extensions):
+            return True
+        if filename in self.excluded_names:
+            return True
+        if self.excluded_suffixes and filename.endswith(self.excluded_suffixes):
+            return True
+        if self.excluded_prefixes and filename.startswith(self.excluded_prefixes):
+            return True
+        return any(all(part in filename for part in parts) for parts in self.excluded_parts)
+
+    def should_ignore_file_content(self, filename):
+        """Check if file content should be ignored but file shown in structure"""
+        if os.path.splitext(filename)[1].lower() in self.ignored_extensions:
+            return True
+        if filename in self.ignored_names:
+            return True
+        if self.ignored_suffixes and filename.endswith(self.ignored_suffixes):
+            return True
+        return bool(self.ignored_prefixes) and filename.startswith(self.ignored_prefixes)
+
+
+# Compiled rule sets shared by all extractors, keyed by the rules they were built from
+MAX_CACHED_RULE_SETS = 64
+_rules_cache = {}
+_rules_lock = threading.Lock()
+
+
+def rules_key(folders, extensions, files):
+    """Build a hashable cache key from rule lists"""
+    return tuple(tuple(section.get(kind, []) or []) for section in (folders, extensions, files)
+                 for kind in RULE_KINDS) + (tuple(extensions.get('only', []) or []),)
+
+
+def compile_rules(folders, extensions, files):
+    """Get compiled filter rules for rule lists, compiling each distinct rule set only once"""
+    key = rules_key(folders, extensions, files)
+    rules = _rules_cache.get(key)
+    if rules is None:
+        with _rules_lock:
+            rules = _rules_cache.get(key)
+            if rules is None:
+                if len(_rules_cache) >= MAX_CACHED_RULE_SETS:
+                    _rules_cache.clear()
+                rules = FilterRules(folders, extensions, files)
+                _rules_cache[key] = rules
+    return rules
+
+
+def get_filter_rules(config):
+    """Get compiled filter rules for a config manager, with its active profile's rules layered on top"""
+    rules = compile_rules(config.get('folders') or {}, config.get('extensions') or {}, config.get('files') or {})
+    profile = config.get_profile()
+    if profile:
+        rules = layer_rules(rules, rule_overrides(profile))
+    return rules
+
+
+def parse_project_config(data, name):
+    """Parse a project config file into {section: {kind: [names]}}; raises ValueError if it is invalid"""
+    if name.endswith('.toml'):
+        if tomllib is None:
+            raise ValueError("TOML project files need Python 3.11 or later")
+        config = tomllib.loads(data.decode('utf-8'))
+    else:
+        config = json.loads(data.decode('utf-8'))
+    if not isinstance(config, dict):
+        raise ValueError("expected a table of folders, extensions and files rules")
+    return rule_overrides(config)
+
+
+def rule_overrides(config):
+    """Get the rule lists of a project config or profile as {section: {kind: [names]}}.
+
+    Each of folders, extensions and files may list 'ignored' and 'excluded' names, which are added
+    to the inherited rules, and 'include' names, which are taken out of the inherited rules.
+    extensions may also set 'only', which replaces the inherited allowlist.
+    Raises ValueError if a list is malformed.
+    """
+    overrides = {}
+    for section in RULE_SECTIONS:
+        rules = config.get(section) or {}
+        if not isinstance(rules, dict):
+            raise ValueError(f"'{section}' must be a table of rule lists")
+        kinds = RULE_KINDS + ('include', 'only') if section == 'extensions' else RULE_KINDS + ('include',)
+        for kind in kinds:
+            names = rules.get(kind) or []
+            if not isinstance(names, list) or not all(isinstance(item, str) for item in names):
+                raise ValueError(f"'{section}.{kind}' must be a list of strings")
+            if names:
+                overrides.setdefault(section, {})[kind] = names
+    return overrides
+
+
+def layer_rules(rules, overrides):
+    """Compiled rules with the rule lists of a project config or profile layered over rules"""
+    merged = []
+    for section in RULE_SECTIONS:
+        inherited = rules.lists[section]
+        extra = overrides.get(section, {})
+        include = set(extra.get('include', []))
+        merged.append({kind: [name for name in inherited[kind] if name not in include] +
+                             [name for name in extra.get(kind, []) if name not in inherited[kind]]
+                       for kind in RULE_KINDS})
+    merged[1]['only'] = overrides.get('extensions', {}).get('only') or rules.lists['extensions']['only']
+    return compile_rules(*merged)
+
+
+# Parsed project files shared by all scans, keyed by file name and content
+MAX_CACHED_PROJECT_CONFIGS = 256
+_project_cache = {}
+
+
+def directory_rules(rules, source, path, names):
+    """Layer the project config files found in a directory (names, in PROJECT_CONFIG_FILES order)
+    over the rules inherited from its parent. Unreadable or invalid files are reported and skipped."""
+    for name in names:
+        file_path = source.join(path, name)
+        try:
+            data = source.read_bytes(file_path)
+            overrides = _project_cache.get((name, data))
+            if overrides is None:
+                overrides = parse_project_config(data, name)
+                if len(_project_cache) >= MAX_CACHED_PROJECT_CONFIGS:
+                    _project_cache.clear()
+                _project_cache[(name, data)] = overrides
+        except (OSError, ValueError) as e:
+            print(f"Error reading project config {file_path}: {e}", file=sys.stderr)
+            continue
+        rules = layer_rules(rules, overrides)
+    return rules
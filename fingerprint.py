@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+
+from indexer import INDEX_SUFFIX
+from outputs import AtomicWriter, TEMP_SUFFIX
+
+# Sidecar stored next to an output file with the fingerprint of what it was built from
+FINGERPRINT_SUFFIX = ".fingerprint.json"
+
+# Bump when the output layout changes, so older outputs are regenerated
+FINGERPRINT_VERSION = 1
+
+# Settings that do not change what is written
+IGNORED_GENERAL_SETTINGS = ['dark_mode', 'sort_mode', 'delete_previous_files', 'output_dir',
+                            'worker_processes', 'walk_threads', 'snapshot_db']
+IGNORED_SECTIONS = ['previous_directories']
+
+
+def fingerprint_path_for(output_file):
+    """Get the fingerprint sidecar path for an output file"""
+    return output_file + FINGERPRINT_SUFFIX
+
+
+def output_settings(config):
+    """The parts of a config dict that affect the output"""
+    settings = {key: value for key, value in config.items() if key not in IGNORED_SECTIONS}
+    settings['general'] = {key: value for key, value in (config.get('general') or {}).items()
+                           if key not in IGNORED_GENERAL_SETTINGS}
+    return settings
+
+
+def tree_fingerprint(entries, config, file_format, revision=None):
+    """Hash the scanned paths, sizes and modification times together with the output settings"""
+    digest = hashlib.sha256()
+    header = {
+        "version": FINGERPRINT_VERSION,
+        "format": file_format,
+        "revision": revision,
+        "settings": output_settings(config)
+    }
+    digest.update(json.dumps(header, sort_keys=True, default=str).encode("utf-8"))
+    for entry in entries:
+        record = f"{entry.rel_path}\0{entry.kind}\0{entry.size}\0{entry.mtime}\0{entry.content_status}\n"
+        digest.update(record.encode("utf-8", errors="surrogatepass"))
+    return digest.hexdigest()
+
+
+def load_fingerprint_data(output_file):
+    """Get the fingerprint sidecar of an output file as a dict (empty if missing or unreadable)"""
+    try:
+        with open(fingerprint_path_for(output_file), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def load_fingerprint(output_file):
+    """Get the fingerprint stored for an output file, or None"""
+    return load_fingerprint_data(output_file).get("fingerprint")
+
+
+def load_source(output_file):
+    """Get the scanned directory or archive recorded for an output file, or None"""
+    return load_fingerprint_data(output_file).get("source")
+
+
+def save_fingerprint(output_file, fingerprint, source=None):
+    """Store the fingerprint of an output file, and the source it was built from, next to it"""
+    data = {"output": os.path.basename(output_file), "fingerprint": fingerprint, "source": source}
+    with AtomicWriter(fingerprint_path_for(output_file)) as f:
+        json.dump(data, f)
+
+
+def source_tag(source):
+    """Short tag of a source path, added to automatic output names in shared output directories"""
+    return hashlib.sha256(source.encode("utf-8", errors="surrogatepass")).hexdigest()[:8]
+
+
+def output_owner(name):
+    """Name of the output file a sidecar or temporary file belongs to (the name itself for outputs)"""
+    if name.endswith(TEMP_SUFFIX):
+        name = name[:-len(TEMP_SUFFIX)].rsplit('.', 1)[0]
+    for suffix in (FINGERPRINT_SUFFIX, INDEX_SUFFIX):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def find_previous_output(directory, prefix, file_format, source=None):
+    """Find the newest timestamped output of a format that has a fingerprint, or None.
+
+    With a source, only outputs built from that source count, so outputs of other projects
+    in a shared output directory are never taken for this one's.
+    """
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return None
+
+    suffix = f".{file_format}"
+    candidates = [name for name in names
+                  if name.startswith(f"{prefix}_") and name.endswith(suffix)
+                  and f"{name}{FINGERPRINT_SUFFIX}" in names]
+    if source is not None:
+        candidates = [name for name in candidates if load_source(os.path.join(directory, name)) == source]
+    if not candidates:
+        return None
+    # Timestamped names sort chronologically
+    return os.path.join(directory, max(candidates))
+
+
+def is_unchanged(output_file, fingerprint, sidecars=()):
+    """Check if an output file and its sidecars exist and were built from the same fingerprint"""
+    if not output_file or not os.path.isfile(output_file):
+        return False
+    if any(not os.path.isfile(sidecar) for sidecar in sidecars):
+        return False
+    return load_fingerprint(output_file) == fingerprint
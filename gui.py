@@ -2,18 +2,24 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 import threading
-from datetime import datetime
 
 from utils import set_window_icon, ThemeManager, open_directory_in_explorer, create_tooltip, format_file_size, \
     get_directory_size
-from settings import SettingsWindow
-from extractor import FileStructureExtractor
+
+# settings and extractor (with yaml and the content transforms) are imported on first use,
+# so the main window shows without waiting for them
+
+# Pause in typing before the directory list is filtered
+SEARCH_DEBOUNCE_MS = 150
+
+# Profile choice meaning the global rules only
+NO_PROFILE = "(none)"
 
 
 class FileStructureGUI:
     def __init__(self, config_manager):
         self.config = config_manager
-        self.extractor = FileStructureExtractor(config_manager)
+        self.extractor = None
 
         # Get theme
         self.dark_mode = self.config.get('general', 'dark_mode') or False
@@ -34,6 +40,14 @@ class FileStructureGUI:
         # Initialize variables
         self.valid_dirs = []
         self.filtered_dirs = []
+        # Lowercased paths for searching, and measured sort keys, kept until the list is refreshed
+        self.search_index = {}
+        self.sort_keys = {}
+        # All directories in the current sort order, and the query the filtered list was built for
+        self.sorted_dirs = None
+        self.sorted_mode = None
+        self.last_query = None
+        self.search_job = None
 
         self.create_widgets()
         self.setup_bindings()
@@ -166,19 +180,42 @@ class FileStructureGUI:
         tk.Label(format_frame, text="Output format:", bg=self.theme['frame_bg'],
                  fg=self.theme['fg'], font=("Helvetica", 10)).pack(side=tk.LEFT, padx=(0, 10))
 
-        self.format_var = tk.StringVar(value=self.config.get('general', 'file_format'))
-
+        # Several formats can be ticked; they are written from a single scan
+        selected = self.config.get_output_formats()
         formats = [("Markdown (.md)", "md"), ("Text (.txt)", "txt"),
-                   ("JSON (.json)", "json"), ("YAML (.yaml)", "yaml")]
+                   ("JSON (.json)", "json"), ("YAML (.yaml)", "yaml"), ("Chunks (.jsonl)", "jsonl")]
 
+        self.format_vars = {}
         for text, value in formats:
-            rb = tk.Radiobutton(format_frame, text=text, variable=self.format_var, value=value,
+            self.format_vars[value] = tk.BooleanVar(value=value in selected)
+            cb = tk.Checkbutton(format_frame, text=text, variable=self.format_vars[value],
                                 bg=self.theme['frame_bg'], fg=self.theme['fg'],
                                 activebackground=self.theme['frame_bg'],
                                 selectcolor=self.theme['accent'],
                                 font=("Helvetica", 10), relief=tk.FLAT, bd=2, padx=5, pady=2)
-            rb.pack(side=tk.LEFT, padx=(0, 20))
-            self.add_radiobutton_effects(rb)
+            cb.pack(side=tk.LEFT, padx=(0, 20))
+            self.add_checkbox_effects(cb)
+
+        # Filter profile
+        profile_frame = tk.Frame(content_frame, bg=self.theme['frame_bg'])
+        profile_frame.pack(fill=tk.X, pady=(10, 0))
+
+        tk.Label(profile_frame, text="Profile:", bg=self.theme['frame_bg'],
+                 fg=self.theme['fg'], font=("Helvetica", 10)).pack(side=tk.LEFT, padx=(0, 10))
+
+        profiles = [NO_PROFILE] + list(self.config.get_profiles())
+        active = self.config.get('general', 'profile')
+        self.profile_var = tk.StringVar(value=active if active in profiles else NO_PROFILE)
+        profile_combo = ttk.Combobox(profile_frame, textvariable=self.profile_var, values=profiles,
+                                     state='readonly', width=25)
+        profile_combo.pack(side=tk.LEFT)
+        profile_combo.bind('<<ComboboxSelected>>', self.on_profile_change)
+        create_tooltip(profile_combo, "Rules and content mode layered over the settings for each run")
+
+    def on_profile_change(self, *args):
+        """Handle profile selection changes"""
+        name = self.profile_var.get()
+        self.config.set('general', 'profile', None if name == NO_PROFILE else name)
 
     def add_checkbox_effects(self, checkbox):
         """Add visual effects to checkboxes"""
@@ -408,7 +445,14 @@ class FileStructureGUI:
         self.root.bind('<Control-s>', lambda e: self.open_settings())
 
     def on_search(self, *args):
-        """Handle search input changes"""
+        """Handle search input changes once typing pauses"""
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(SEARCH_DEBOUNCE_MS, self.apply_search)
+
+    def apply_search(self):
+        """Filter the directory list by the current search text"""
+        self.search_job = None
         self.update_directory_list()
         self.update_button_states()
 
@@ -443,6 +487,10 @@ class FileStructureGUI:
         """Refresh the directory list from config"""
         self.config.cleanup_directories()
         self.valid_dirs = [d for d in self.config.config['previous_directories'] if os.path.exists(d)]
+        self.search_index = {d: d.lower() for d in self.valid_dirs}
+        # Sizes and modification times are measured again after a refresh
+        self.sort_keys.clear()
+        self.sorted_dirs = None
         self.update_directory_list()
         self.update_button_states()
         self.status_var.set("Directory list refreshed")
@@ -450,36 +498,75 @@ class FileStructureGUI:
     def update_directory_list(self):
         """Update the directory listbox based on search and sort"""
         search_text = self.search_var.get().lower()
-        sort_mode = self.sort_var.get()
+        candidates = self.sorted_directories()
 
-        # Filter directories
-        self.filtered_dirs = []
-        for directory in self.valid_dirs:
-            if search_text in directory.lower():
-                self.filtered_dirs.append(directory)
-
-        # Sort directories
-        if sort_mode == 'alphabetical':
-            self.filtered_dirs.sort()
-        elif sort_mode == 'size':
-            self.filtered_dirs.sort(key=lambda d: get_directory_size(d), reverse=True)
-        elif sort_mode == 'date_modified':
-            self.filtered_dirs.sort(key=lambda d: os.path.getmtime(d), reverse=True)
-        # 'recent' is already in the correct order
-
-        # Update listbox
-        self.directory_listbox.delete(0, tk.END)
-        for i, directory in enumerate(self.filtered_dirs):
-            self.directory_listbox.insert(tk.END, directory)
-            # Alternate row colors
-            if i % 2 == 0:
-                self.directory_listbox.itemconfigure(i, background='#f9f9f9' if not self.dark_mode else '#404040')
+        # A query that extends the previous one only narrows the previous result
+        if self.last_query is not None and search_text.startswith(self.last_query):
+            candidates = self.filtered_dirs
+        filtered = [d for d in candidates if search_text in self.search_index[d]]
+        self.last_query = search_text
+
+        self.update_listbox(filtered)
+        self.filtered_dirs = filtered
 
         # Update count
         total_dirs = len(self.valid_dirs)
         shown_dirs = len(self.filtered_dirs)
         self.count_var.set(f"Showing {shown_dirs} of {total_dirs} directories")
 
+    def sorted_directories(self):
+        """All directories in the current sort order, sorted again only when the list or sort changes"""
+        sort_mode = self.sort_var.get()
+        if self.sorted_dirs is None or self.sorted_mode != sort_mode:
+            dirs = list(self.valid_dirs)
+            if sort_mode == 'alphabetical':
+                dirs.sort()
+            elif sort_mode in ('size', 'date_modified'):
+                dirs.sort(key=lambda d: self.sort_key(sort_mode, d), reverse=True)
+            # 'recent' is already in the correct order
+            self.sorted_dirs = dirs
+            self.sorted_mode = sort_mode
+            self.last_query = None
+        return self.sorted_dirs
+
+    def sort_key(self, sort_mode, directory):
+        """Size or modification time of a directory, measured once per refresh"""
+        key = (sort_mode, directory)
+        if key not in self.sort_keys:
+            try:
+                self.sort_keys[key] = (get_directory_size(directory) if sort_mode == 'size'
+                                       else os.path.getmtime(directory))
+            except OSError:
+                self.sort_keys[key] = 0
+        return self.sort_keys[key]
+
+    def update_listbox(self, directories):
+        """Change the listbox rows to directories, touching only rows that differ from what is shown"""
+        shown = self.filtered_dirs
+        removed = missing_runs(shown, directories)
+        added = missing_runs(directories, shown) if removed is None else None
+
+        if removed is not None:
+            # Narrowed: delete the rows that no longer match, bottom up
+            for start, end in reversed(removed):
+                self.directory_listbox.delete(start, end - 1)
+            first_changed = removed[0][0] if removed else len(directories)
+        elif added is not None:
+            # Widened: insert the rows that match again
+            for start, end in added:
+                self.directory_listbox.insert(start, *directories[start:end])
+            first_changed = added[0][0] if added else len(directories)
+        else:
+            self.directory_listbox.delete(0, tk.END)
+            if directories:
+                self.directory_listbox.insert(tk.END, *directories)
+            first_changed = 0
+
+        # Alternate row colors from the first row that moved
+        stripe = '#f9f9f9' if not self.dark_mode else '#404040'
+        for i in range(first_changed, len(directories)):
+            self.directory_listbox.itemconfigure(i, background=stripe if i % 2 == 0 else '')
+
     def update_button_states(self):
         """Update button states based on selection and available directories"""
         has_dirs = len(self.filtered_dirs) > 0
@@ -571,7 +658,7 @@ class FileStructureGUI:
         """Process a directory with progress tracking"""
         # Update config with current UI settings
         self.config.set('general', 'delete_previous_files', self.delete_var.get())
-        self.config.set('general', 'file_format', self.format_var.get())
+        self.config.set_output_formats([value for value, var in self.format_vars.items() if var.get()])
 
         # Show progress
         self.show_progress(True)
@@ -584,12 +671,14 @@ class FileStructureGUI:
             self.progress_label.config(text=f"Processing... {int(value)}%")
             self.root.update()
 
+        extractor = self.get_extractor()
+
         def run_extraction():
             try:
                 self.status_var.set(f"Processing: {os.path.basename(directory)}...")
                 self.root.update()
 
-                success, message = self.extractor.extract_structure(directory, update_progress)
+                success, message = extractor.extract_structure(directory, update_progress)
 
                 # Update UI from main thread
                 self.root.after(0, lambda: self.extraction_complete(success, message, directory))
@@ -602,6 +691,13 @@ class FileStructureGUI:
         thread.daemon = True
         thread.start()
 
+    def get_extractor(self):
+        """Get the extractor, importing the extraction modules the first time"""
+        if self.extractor is None:
+            from extractor import FileStructureExtractor
+            self.extractor = FileStructureExtractor(self.config)
+        return self.extractor
+
     def extraction_complete(self, success, message, directory):
         """Handle extraction completion"""
         # Re-enable buttons
@@ -614,11 +710,7 @@ class FileStructureGUI:
             self.status_var.set(message)
 
             # Store output path for copying
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_format = self.config.get('general', 'file_format')
-            prefix = self.config.get('general', 'output_file_prefix')
-            output_path = os.path.join(directory, f"{prefix}_{timestamp}.{file_format}")
-            self.last_output_path = output_path
+            self.last_output_path = self.extractor.last_output_path
             self.copy_btn.config(state=tk.NORMAL)
 
             # Refresh list to update the directory order
@@ -657,6 +749,7 @@ class FileStructureGUI:
             # since the main window theme change requires restart
             pass
 
+        from settings import SettingsWindow
         SettingsWindow(self.root, self.config, on_theme_change)
 
     def run(self):
@@ -664,4 +757,19 @@ class FileStructureGUI:
         try:
             self.root.mainloop()
         except KeyboardInterrupt:
-            self.root.quit()
\ No newline at end of file
+            self.root.quit()
+
+
+def missing_runs(longer, shorter):
+    """Runs [start, end) of items in longer that are left out of shorter, or None if shorter
+    is not a subsequence of longer (items are unique)"""
+    runs = []
+    j = 0
+    for i, item in enumerate(longer):
+        if j < len(shorter) and shorter[j] == item:
+            j += 1
+        elif runs and runs[-1][1] == i:
+            runs[-1][1] = i + 1
+        else:
+            runs.append([i, i + 1])
+    return runs if j == len(shorter) else None
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+from outputs import AtomicWriter
+
+
+# Sidecar written next to an output file, e.g. project_structure_20250101_120000.md.index.json
+INDEX_SUFFIX = ".index.json"
+INDEX_VERSION = 1
+
+
+def index_path_for(output_file):
+    """Get the sidecar index path for an output file"""
+    return output_file + INDEX_SUFFIX
+
+
+def normalize_section_path(path):
+    """Normalize a relative path so index lookups work with either separator"""
+    return path.replace("\\", "/").strip("/")
+
+
+def content_hash(text):
+    """Hash section content (sha256 of its UTF-8 encoding)"""
+    return hashlib.sha256(text.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+
+class SectionIndex:
+    """Byte offsets, lengths and content hashes of every file section in an output file"""
+
+    def __init__(self, output_name="", file_format="md", sections=None, entries=None):
+        self.output_name = output_name
+        self.file_format = file_format
+        self.sections = sections if sections is not None else {}
+        # Every file and directory the output lists (directories end in '/'), or None if not recorded
+        self.entries = entries
+
+    def add(self, rel_path, offset, length, content, encoding=None):
+        """Record a section written at offset with the given byte length"""
+        section = {
+            "offset": offset,
+            "length": length,
+            "sha256": content_hash(content)
+        }
+        # Source files that were not plain UTF-8 keep the encoding they were decoded with
+        if encoding and encoding != 'utf-8':
+            section["encoding"] = encoding
+        self.sections[normalize_section_path(rel_path)] = section
+
+    def get(self, rel_path):
+        """Get the index entry for a relative path, or None"""
+        return self.sections.get(normalize_section_path(rel_path))
+
+    def set_entries(self, entries):
+        """Record the scanned entries the output lists, with or without a content section"""
+        self.entries = [normalize_section_path(entry.rel_path) + ("/" if entry.is_dir else "")
+                        for entry in entries if entry.depth > 0]
+
+    def paths(self):
+        """Get all indexed paths in document order"""
+        return sorted(self.sections, key=lambda p: self.sections[p]["offset"])
+
+    def save(self, index_file):
+        """Write the index to disk"""
+        data = {
+            "version": INDEX_VERSION,
+            "output": self.output_name,
+            "format": self.file_format,
+            "sections": self.sections
+        }
+        if self.entries is not None:
+            data["entries"] = self.entries
+        with AtomicWriter(index_file) as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, index_file):
+        """Load an index from disk"""
+        with open(index_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version: {data.get('version')}")
+        return cls(data.get("output", ""), data.get("format", "md"), data.get("sections", {}), data.get("entries"))
+
+
+def load_index(output_file):
+    """Load the sidecar index of an output file"""
+    index_file = index_path_for(output_file)
+    if not os.path.exists(index_file):
+        raise FileNotFoundError(f"No section index found for {output_file}")
+    return SectionIndex.load(index_file)
+
+
+def read_sections(output_file, rel_paths, index=None):
+    """Read the sections of several files by seeking; returns {path: section text}"""
+    index = index or load_index(output_file)
+
+    wanted = []
+    for rel_path in rel_paths:
+        entry = index.get(rel_path)
+        if entry is None:
+            raise KeyError(f"No section for {rel_path} in {os.path.basename(output_file)}")
+        wanted.append((entry["offset"], entry["length"], normalize_section_path(rel_path)))
+
+    # Read in file order so seeks only move forward
+    sections = {}
+    with open(output_file, "rb") as f:
+        for offset, length, rel_path in sorted(wanted):
+            f.seek(offset)
+            sections[rel_path] = f.read(length).decode("utf-8", errors="replace")
+    return sections
+
+
+def read_section(output_file, rel_path, index=None):
+    """Read one file's section from an output file by seeking"""
+    return read_sections(output_file, [rel_path], index)[normalize_section_path(rel_path)]
@@ -14,6 +14,7 @@ Features:
 
 import sys
 import os
+import importlib.util
 import tkinter as tk
 from tkinter import messagebox
 
@@ -32,6 +33,20 @@ except ImportError as e:
     print("- gui.py")
     print("- settings.py")
     print("- extractor.py")
+    print("- skeleton.py")
+    print("- indexer.py")
+    print("- cli.py")
+    print("- sources.py")
+    print("- decoder.py")
+    print("- redactor.py")
+    print("- walker.py")
+    print("- fingerprint.py")
+    print("- minifier.py")
+    print("- searcher.py")
+    print("- scanstats.py")
+    print("- snapshots.py")
+    print("- differ.py")
+    print("- chunker.py")
     print("- utils.py")
     sys.exit(1)
 
@@ -40,10 +55,8 @@ def check_dependencies():
     """Check if all required dependencies are available"""
     missing_deps = []
 
-    # Check for yaml support
-    try:
-        import yaml
-    except ImportError:
+    # Check for yaml support without importing it; it is loaded when YAML is first written
+    if importlib.util.find_spec("yaml") is None:
         missing_deps.append("pyyaml")
 
     if missing_deps:
@@ -74,6 +87,11 @@ def check_dependencies():
 
 def main():
     """Main entry point"""
+    # Any arguments select the command line interface instead of the GUI
+    if len(sys.argv) > 1:
+        from cli import run_cli
+        sys.exit(run_cli(sys.argv[1:]))
+
     print("File Structure Extractor - Enhanced Version")
     print("=" * 50)
 
@@ -108,4 +126,9 @@ def main():
 
 
 if __name__ == "__main__":
+    # Needed for the skeleton process pool in frozen (PyInstaller) builds; elsewhere it does
+    # nothing, so the slow multiprocessing import is skipped until the extractor needs it
+    if getattr(sys, 'frozen', False):
+        import multiprocessing
+        multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,574 @@
+import io
+import re
+import tokenize
+
+from decoder import read_file
+
+
+# Registry of minifiers, keyed by lowercase file extension: (language, minifier).
+# A minifier takes the decoded source text and returns it without comments, trailing
+# whitespace and blank lines, or None when the source cannot be lexed safely
+# (the full content is used instead). String literals are always left untouched.
+MINIFIERS = {}
+
+
+def register_minifier(extensions, minifier, language):
+    """Register a minifier for one or more file extensions"""
+    if isinstance(extensions, str):
+        extensions = [extensions]
+    for ext in extensions:
+        MINIFIERS[ext.lower()] = (language, minifier)
+
+
+def get_minifier(ext):
+    """Get the minifier registered for an extension, if any"""
+    entry = MINIFIERS.get(ext.lower())
+    return entry[1] if entry else None
+
+
+def get_language(ext):
+    """Get the language name a minifier reports its statistics under"""
+    entry = MINIFIERS.get(ext.lower())
+    return entry[0] if entry else None
+
+
+def has_minifier(ext):
+    """Check if a minifier is registered for an extension"""
+    return ext.lower() in MINIFIERS
+
+
+def minify_source(source, ext):
+    """Minify already-loaded source text, or None when it cannot be done safely"""
+    minifier = get_minifier(ext)
+    if minifier is None:
+        return None
+    try:
+        return minifier(source)
+    except (tokenize.TokenError, SyntaxError, ValueError, RecursionError):
+        return None
+
+
+def minify_file(path, ext, encodings=None):
+    """Read a file and minify it (process pool entry point).
+
+    Returns (minified text or None, encoding the file was decoded with, UTF-8 size of the decoded source).
+    """
+    source, encoding = read_file(path, encodings)
+    return (minify_source(source, ext), encoding,
+            len(source.encode("utf-8", errors="surrogatepass")))
+
+
+def collapse_lines(text, kept_lines=()):
+    """Drop trailing whitespace and blank lines.
+
+    kept_lines holds the (0-based) lines whose line break is inside a string literal;
+    those lines and the lines after them are kept exactly as they are.
+    """
+    lines = []
+    for i, line in enumerate(text.split("\n")):
+        if i in kept_lines:
+            lines.append(line)
+        elif i - 1 in kept_lines:
+            lines.append(line.rstrip())
+        else:
+            line = line.rstrip()
+            if line:
+                lines.append(line)
+    return "\n".join(lines)
+
+
+class _Output:
+    """Collects minified text and the lines whose line break is inside a literal"""
+
+    def __init__(self):
+        self.parts = []
+        self.line = 0
+        self.kept = set()
+
+    def add(self, text, literal=False):
+        if not text:
+            return
+        count = text.count("\n")
+        if literal and count:
+            self.kept.update(range(self.line, self.line + count))
+        self.line += count
+        self.parts.append(text)
+
+    def last_char(self):
+        """The last non-whitespace character written so far"""
+        for part in reversed(self.parts):
+            stripped = part.rstrip()
+            if stripped:
+                return stripped[-1]
+        return ""
+
+    def last_word(self):
+        """The identifier written last, if the output ends with one"""
+        for part in reversed(self.parts):
+            stripped = part.rstrip()
+            if stripped:
+                match = re.search(r"[A-Za-z_$][\w$]*$", stripped)
+                return match.group() if match else ""
+        return ""
+
+    def text(self):
+        return collapse_lines("".join(self.parts), self.kept)
+
+
+# ---------------------------------------------------------------------------
+# Python (tokenize)
+# ---------------------------------------------------------------------------
+
+FSTRING_START = getattr(tokenize, "FSTRING_START", None)
+FSTRING_END = getattr(tokenize, "FSTRING_END", None)
+
+
+def python_minify(source):
+    """Remove comments and blank lines from Python source; docstrings are kept"""
+    lines = io.StringIO(source).readlines()
+    cuts = {}
+    kept = set()
+    fstring_start = None
+    fstring_depth = 0
+
+    for token in tokenize.generate_tokens(io.StringIO(source).readline):
+        if token.type == tokenize.COMMENT:
+            row, col = token.start
+            # Keep the shebang and encoding declaration
+            if row <= 2 and (token.string.startswith("#!") or re.match(r"#.*coding[:=]", token.string)):
+                continue
+            cuts.setdefault(row - 1, []).append((col, token.end[1]))
+        elif token.type == tokenize.STRING:
+            kept.update(range(token.start[0] - 1, token.end[0] - 1))
+        elif FSTRING_START is not None and token.type == FSTRING_START:
+            if fstring_depth == 0:
+                fstring_start = token.start[0]
+            fstring_depth += 1
+        elif FSTRING_END is not None and token.type == FSTRING_END:
+            fstring_depth -= 1
+            if fstring_depth == 0:
+                kept.update(range(fstring_start - 1, token.end[0] - 1))
+
+    for row, spans in cuts.items():
+        line = lines[row]
+        for start, end in sorted(spans, reverse=True):
+            line = line[:start] + line[end:]
+        lines[row] = line
+    return collapse_lines("".join(lines), kept)
+
+
+register_minifier(['.py', '.pyw'], python_minify, "Python")
+
+
+# ---------------------------------------------------------------------------
+# C-family (character lexer)
+# ---------------------------------------------------------------------------
+
+# String literal forms, matched at an opening quote
+_DOUBLE = re.compile(r'"(?:[^"\\\n]|\\[\s\S])*"?')
+_SINGLE = re.compile(r"'(?:[^'\\\n]|\\[\s\S])*'?")
+_TRIPLE = re.compile(r'"""[\s\S]*?(?:"""|$)')
+_TEMPLATE_STOP = re.compile(r"[`\\]|\$\{")
+_EXPRESSION_STOP = re.compile(r"[`'\"{}]|/[/*]")
+_RAW_BACKTICK = re.compile(r"`[^`]*`?")
+_VERBATIM = re.compile(r'"(?:[^"]|"")*"?')
+_RUST_CHAR = re.compile(r"'(?:\\(?:x[0-9a-fA-F]{2}|u\{[0-9a-fA-F]{1,6}\}|.)|[^\\'\n])'")
+_CPP_RAW = re.compile(r'"([^()\\\s]{0,16})\(')
+_REGEX_LITERAL = re.compile(r"/(?![*/])(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*")
+
+# A '/' after one of these (or at the start) begins a JavaScript regex literal, not a division
+_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void",
+                   "throw", "yield", "await", "instanceof"}
+
+
+def _is_ident(char):
+    return char.isalnum() or char == "_"
+
+
+def _template_end(source, start):
+    """Find the end of the JavaScript template literal at start, including nested ${...}"""
+    pos = start + 1
+    while True:
+        match = _TEMPLATE_STOP.search(source, pos)
+        if not match:
+            return len(source)
+        token = match.group()
+        if token == "`":
+            return match.end()
+        pos = match.end() + 1 if token == "\\" else _expression_end(source, match.end())
+
+
+def _expression_end(source, pos):
+    """Find the end of a ${...} expression inside a template literal"""
+    depth = 0
+    while True:
+        match = _EXPRESSION_STOP.search(source, pos)
+        if not match:
+            return len(source)
+        token = match.group()
+        start = match.start()
+        if token == "`":
+            pos = _template_end(source, start)
+        elif token == '"':
+            pos = _DOUBLE.match(source, start).end()
+        elif token == "'":
+            pos = _SINGLE.match(source, start).end()
+        elif token == "//":
+            end = source.find("\n", start)
+            pos = len(source) if end == -1 else end
+        elif token == "/*":
+            end = source.find("*/", start + 2)
+            pos = len(source) if end == -1 else end + 2
+        elif token == "{":
+            depth += 1
+            pos = match.end()
+        elif depth:
+            depth -= 1
+            pos = match.end()
+        else:
+            return match.end()
+
+
+class CLikeLanguage:
+    """Lexer settings for a language with // and /* */ comments"""
+
+    def __init__(self, line_comments=True, nested_comments=False, single_quotes=None,
+                 backticks=None, triple_quotes=False, cpp_raw_strings=False,
+                 verbatim_strings=False, rust_raw_strings=False, regex_literals=False,
+                 line_splices=False):
+        self.line_comments = line_comments
+        self.nested_comments = nested_comments
+        # None, "string" or "char" (Rust: char literal or lifetime)
+        self.single_quotes = single_quotes
+        # None, "template" (JavaScript) or "raw" (Go)
+        self.backticks = backticks
+        self.triple_quotes = triple_quotes
+        self.cpp_raw_strings = cpp_raw_strings
+        self.verbatim_strings = verbatim_strings
+        self.rust_raw_strings = rust_raw_strings
+        self.regex_literals = regex_literals
+        self.line_splices = line_splices
+
+        tokens = [r"/\*", '"']
+        if line_comments:
+            tokens.append("//")
+        if single_quotes:
+            tokens.append("'")
+        if backticks:
+            tokens.append("`")
+        if regex_literals:
+            tokens.append("/")
+        self.pattern = re.compile("|".join(tokens))
+
+    def __call__(self, source):
+        return self.minify(source)
+
+    def block_comment_end(self, source, start):
+        """Find the end of the block comment at start, or -1"""
+        if not self.nested_comments:
+            end = source.find("*/", start + 2)
+            return -1 if end == -1 else end + 2
+        depth = 0
+        for match in re.compile(r"/\*|\*/").finditer(source, start):
+            depth += 1 if match.group() == "/*" else -1
+            if depth == 0:
+                return match.end()
+        return -1
+
+    def string_end(self, source, start):
+        """Find the end of the double-quoted literal at start"""
+        if self.triple_quotes and source.startswith('"""', start):
+            return _TRIPLE.match(source, start).end()
+
+        before = source[start - 1] if start else ""
+        if self.verbatim_strings and before == "@":
+            return _VERBATIM.match(source, start).end()
+
+        if self.cpp_raw_strings and before == "R":
+            prefix = source[start - 2] if start >= 2 else ""
+            raw = _CPP_RAW.match(source, start)
+            if raw and (not _is_ident(prefix) or prefix in "uUL8"):
+                end = source.find(f"){raw.group(1)}\"", raw.end())
+                return len(source) if end == -1 else end + len(raw.group(1)) + 2
+
+        if self.rust_raw_strings:
+            i = start - 1
+            while i >= 0 and source[i] == "#":
+                i -= 1
+            if i >= 0 and source[i] == "r" and (i == 0 or not _is_ident(source[i - 1]) or
+                                                 (source[i - 1] == "b" and (i == 1 or not _is_ident(source[i - 2])))):
+                closing = '"' + "#" * (start - 1 - i)
+                end = source.find(closing, start + 1)
+                return len(source) if end == -1 else end + len(closing)
+
+        return _DOUBLE.match(source, start).end()
+
+    def minify(self, source):
+        """Remove comments and blank lines, keeping literals as they are"""
+        out = _Output()
+        pos = 0
+        length = len(source)
+        while True:
+            match = self.pattern.search(source, pos)
+            if not match:
+                out.add(source[pos:])
+                break
+            start = match.start()
+            token = match.group()
+            out.add(source[pos:start])
+
+            if token == "//":
+                end = source.find("\n", start)
+                # A backslash at the end of the line continues the comment
+                while self.line_splices and end != -1 and source[start:end].rstrip("\r").endswith("\\"):
+                    end = source.find("\n", end + 1)
+                pos = length if end == -1 else end
+            elif token == "/*":
+                end = self.block_comment_end(source, start)
+                if end == -1:
+                    raise ValueError("Unterminated block comment")
+                # Keep tokens on either side apart. A comment spanning lines still ends a
+                # line (JavaScript semicolon insertion), except where the preprocessor reads
+                # lines and a break would cut a directive short.
+                if "\n" in source[start:end] and not self.line_splices:
+                    out.add("\n")
+                elif start and end < length and not source[start - 1].isspace() and not source[end].isspace():
+                    out.add(" ")
+                pos = end
+            elif token == '"':
+                pos = self.string_end(source, start)
+                out.add(source[start:pos], literal=True)
+            elif token == "'":
+                if self.single_quotes == "char":
+                    literal = _RUST_CHAR.match(source, start)
+                    # Otherwise a lifetime or label
+                    pos = literal.end() if literal else start + 1
+                else:
+                    pos = _SINGLE.match(source, start).end()
+                out.add(source[start:pos], literal=True)
+            elif token == "`":
+                if self.backticks == "template":
+                    pos = _template_end(source, start)
+                else:
+                    pos = _RAW_BACKTICK.match(source, start).end()
+                out.add(source[start:pos], literal=True)
+            else:
+                # '/': a regex literal where an operand is expected, otherwise division
+                literal = None
+                previous = out.last_char()
+                if not previous or previous in _REGEX_PRECEDERS or out.last_word() in _REGEX_KEYWORDS:
+                    literal = _REGEX_LITERAL.match(source, start)
+                pos = literal.end() if literal else start + 1
+                out.add(source[start:pos], literal=True)
+        return out.text()
+
+
+register_minifier(['.c', '.h', '.cpp', '.hpp', '.cc', '.cxx', '.hh'],
+                  CLikeLanguage(single_quotes="string", cpp_raw_strings=True, line_splices=True), "C/C++")
+register_minifier('.java', CLikeLanguage(single_quotes="string", triple_quotes=True), "Java")
+register_minifier('.cs', CLikeLanguage(single_quotes="string", verbatim_strings=True), "C#")
+register_minifier('.go', CLikeLanguage(single_quotes="string", backticks="raw"), "Go")
+register_minifier('.rs', CLikeLanguage(nested_comments=True, single_quotes="char", rust_raw_strings=True), "Rust")
+register_minifier('.swift', CLikeLanguage(nested_comments=True, triple_quotes=True), "Swift")
+register_minifier('.kt', CLikeLanguage(single_quotes="string", triple_quotes=True), "Kotlin")
+register_minifier(['.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs'],
+                  CLikeLanguage(single_quotes="string", backticks="template", regex_literals=True),
+                  "JavaScript/TypeScript")
+register_minifier('.css', CLikeLanguage(line_comments=False, single_quotes="string"), "CSS")
+
+
+# ---------------------------------------------------------------------------
+# Hash comments (shell, YAML, TOML, config files)
+# ---------------------------------------------------------------------------
+
+# Here-document operators; the delimiter may be quoted
+_HEREDOC = re.compile(r"(?<!<)<<(-?)\s*(['\"]?)([A-Za-z_][\w.-]*)\2")
+# A YAML line ending in a block scalar indicator (| or >, with optional chomping/indent)
+_BLOCK_SCALAR = re.compile(r"(?:^|[\s:-])[|>][0-9+-]*$")
+# Characters after which '#' starts a shell comment
+_SHELL_WORD_BREAKS = set(" \t;|&()")
+
+
+class HashLanguage:
+    """Lexer settings for a language with # comments"""
+
+    def __init__(self, quotes, escapes=False, comment_anywhere=False, heredocs=False,
+                 block_scalars=False, shebang=False):
+        # Opening delimiter -> (closing delimiter, backslash escapes, may span lines); longest first
+        self.quotes = quotes
+        self.escapes = escapes
+        self.comment_anywhere = comment_anywhere
+        self.heredocs = heredocs
+        self.block_scalars = block_scalars
+        self.shebang = shebang
+        self.openers = sorted(quotes, key=len, reverse=True)
+
+    def __call__(self, source):
+        return self.minify(source)
+
+    def starts_comment(self, line, i):
+        if self.comment_anywhere or i == 0:
+            return True
+        before = line[i - 1]
+        if self.block_scalars:
+            return before in " \t"
+        return before in _SHELL_WORD_BREAKS
+
+    def scan_line(self, line, quote):
+        """Strip the comment from a line; returns (code, open quote at the end of the line)"""
+        # Nothing to look at on most lines
+        if quote is None and "#" not in line:
+            if not any(opener in line for opener in self.openers):
+                return line, None
+
+        i = 0
+        length = len(line)
+        while i < length:
+            if quote is not None:
+                closing, escapes, _ = quote
+                if escapes and line[i] == "\\":
+                    i += 2
+                elif line.startswith(closing, i):
+                    i += len(closing)
+                    quote = None
+                else:
+                    i += 1
+                continue
+
+            char = line[i]
+            if char == "\\" and self.escapes:
+                i += 2
+                continue
+            opener = next((o for o in self.openers if line.startswith(o, i)), None)
+            if opener is not None:
+                quote = self.quotes[opener]
+                i += len(opener)
+                continue
+            if char == "#" and self.starts_comment(line, i):
+                return line[:i], None
+            i += 1
+
+        # Single-line strings end with the line
+        if quote is not None and not quote[2]:
+            quote = None
+        return line, quote
+
+    def minify(self, source):
+        """Remove comments and blank lines; here-documents and block scalars are kept as they are"""
+        lines = []
+        kept = set()
+        quote = None
+        heredocs = []
+        block_indent = None
+
+        for index, line in enumerate(source.split("\n")):
+            if heredocs:
+                lines.append(line)
+                kept.add(index)
+                delimiter, strip_tabs = heredocs[0]
+                if (line.lstrip("\t") if strip_tabs else line).rstrip("\r") == delimiter:
+                    heredocs.pop(0)
+                continue
+
+            if block_indent is not None:
+                if not line.strip() or len(line) - len(line.lstrip(" ")) > block_indent:
+                    lines.append(line)
+                    kept.add(index)
+                    continue
+                block_indent = None
+
+            if index == 0 and self.shebang and line.startswith("#!"):
+                lines.append(line)
+                continue
+
+            code, quote = self.scan_line(line, quote)
+            if quote is not None:
+                kept.add(index)
+            lines.append(code)
+            if quote is not None:
+                continue
+
+            if self.heredocs and "<<" in code:
+                heredocs = [(m.group(3), m.group(1) == "-") for m in _HEREDOC.finditer(code)]
+            if self.block_scalars and _BLOCK_SCALAR.search(code.rstrip()):
+                block_indent = len(code) - len(code.lstrip(" "))
+
+        return collapse_lines("\n".join(lines), kept)
+
+
+def config_minify(source):
+    """Remove full-line # and ; comments and blank lines (inline comments are not standard)"""
+    lines = [line for line in source.split("\n") if not line.lstrip().startswith(("#", ";"))]
+    return collapse_lines("\n".join(lines))
+
+
+def dockerfile_minify(source):
+    """Remove full-line # comments (keeping parser directives on top) and blank lines"""
+    lines = []
+    directives = True
+    for line in source.split("\n"):
+        stripped = line.lstrip()
+        if directives and re.match(r"#\s*\w+\s*=", stripped):
+            lines.append(line)
+            continue
+        directives = False
+        if not stripped.startswith("#"):
+            lines.append(line)
+    return collapse_lines("\n".join(lines))
+
+
+register_minifier('.sh', HashLanguage({'"': ('"', True, True), "'": ("'", False, True)},
+                                      escapes=True, heredocs=True, shebang=True), "Shell")
+register_minifier(['.yml', '.yaml'],
+                  HashLanguage({'"': ('"', True, True), "'": ("'", False, True)},
+                               block_scalars=True), "YAML")
+register_minifier('.toml',
+                  HashLanguage({'"""': ('"""', True, True), "'''": ("'''", False, True),
+                                        '"': ('"', True, False), "'": ("'", False, False)},
+                               comment_anywhere=True), "TOML")
+register_minifier(['.ini', '.cfg', '.conf', '.env', '.gitignore', '.editorconfig'], config_minify,
+                  "INI/config")
+register_minifier('.dockerfile', dockerfile_minify, "Dockerfile")
+
+
+# ---------------------------------------------------------------------------
+# HTML/XML
+# ---------------------------------------------------------------------------
+
+_MARKUP_TOKEN = re.compile(r"<!--|<!\[CDATA\[|<(pre|textarea|script|style)\b", re.IGNORECASE)
+
+
+def markup_minify(source):
+    """Remove comments and blank lines; conditional comments, CDATA and whitespace-sensitive
+    elements (pre, textarea, script, style) are kept as they are"""
+    out = _Output()
+    pos = 0
+    while True:
+        match = _MARKUP_TOKEN.search(source, pos)
+        if not match:
+            out.add(source[pos:])
+            break
+        start = match.start()
+        out.add(source[pos:start])
+
+        if match.group() == "<!--":
+            end = source.find("-->", match.end())
+            if end == -1:
+                raise ValueError("Unterminated comment")
+            pos = end + 3
+            if source.startswith(("<!--[if", "<!--<![endif"), start):
+                out.add(source[start:pos], literal=True)
+            continue
+
+        if match.group(1) is None:
+            end = source.find("]]>", match.end())
+            pos = len(source) if end == -1 else end + 3
+        else:
+            closing = re.compile(rf"</{match.group(1)}\s*>", re.IGNORECASE).search(source, match.end())
+            pos = closing.end() if closing else len(source)
+        out.add(source[start:pos], literal=True)
+    return out.text()
+
+
+register_minifier(['.html', '.htm', '.xhtml', '.xml', '.svg'], markup_minify, "HTML/XML")
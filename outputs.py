@@ -0,0 +1,110 @@
+import io
+import os
+import secrets
+import stat
+import sys
+
+
+# Output destination meaning "write to standard output"
+STDOUT = "-"
+
+# Suffix of in-progress output files; they are renamed into place once complete
+TEMP_SUFFIX = ".tmp"
+
+OUTPUT_FORMATS = ['md', 'txt', 'json', 'yaml', 'jsonl']
+
+
+def resolve_output(directory, output, file_name):
+    """Resolve an output destination to a file path, or STDOUT.
+
+    output may be None (write into the scanned directory), STDOUT, a writable text stream,
+    an existing directory or a path ending in a separator (write file_name there),
+    or an explicit file path.
+    """
+    if output == STDOUT or is_stream(output):
+        return output
+    if not output:
+        return os.path.join(directory, file_name)
+
+    output = os.path.expanduser(output)
+    if os.path.isdir(output) or output.endswith(('/', os.sep)):
+        return os.path.join(output, file_name)
+    return output
+
+
+def is_stream(output):
+    """Check if an output destination is an already open text stream"""
+    return hasattr(output, 'write')
+
+
+def is_special_file(path):
+    """Check if a path is an existing device, pipe or socket rather than a regular file or directory"""
+    try:
+        mode = os.stat(path).st_mode
+    except (OSError, TypeError, ValueError):
+        return False
+    return not stat.S_ISREG(mode) and not stat.S_ISDIR(mode)
+
+
+def format_from_path(path, default):
+    """Infer the output format from an explicit output path's extension"""
+    ext = os.path.splitext(path)[1].lstrip('.').lower()
+    if ext == 'yml':
+        return 'yaml'
+    return ext if ext in OUTPUT_FORMATS else default
+
+
+class AtomicWriter:
+    """Text file writer that writes to a temporary file and renames it into place on success.
+
+    Readers never see a partially written file. STDOUT, open streams and devices, pipes or
+    sockets (e.g. /dev/null) are written directly.
+    """
+
+    def __init__(self, path, encoding="utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self.temp_path = None
+        self.file = None
+
+    def __enter__(self):
+        if is_stream(self.path):
+            self.file = self.path
+            return self.file
+        if self.path == STDOUT:
+            # Stream UTF-8 regardless of the console encoding
+            self.file = io.TextIOWrapper(sys.stdout.buffer, encoding=self.encoding, newline='')
+            return self.file
+        if is_special_file(self.path):
+            # Renaming onto a device or pipe would replace it with a regular file
+            self.file = open(self.path, "w", encoding=self.encoding)
+            return self.file
+
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.temp_path = f"{self.path}.{secrets.token_hex(4)}{TEMP_SUFFIX}"
+        # Mode 'x' keeps the normal umask permissions, unlike mkstemp
+        self.file = open(self.temp_path, "x", encoding=self.encoding)
+        return self.file
+
+    def __exit__(self, exc_type, exc, tb):
+        if is_stream(self.path):
+            self.file.flush()
+            return False
+        if self.path == STDOUT:
+            self.file.flush()
+            self.file.detach()
+            return False
+
+        self.file.close()
+        if self.temp_path is None:
+            return False
+        if exc_type is None:
+            os.replace(self.temp_path, self.path)
+        else:
+            try:
+                os.remove(self.temp_path)
+            except OSError:
+                pass
+        return False
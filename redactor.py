@@ -0,0 +1,143 @@
+import re
+import sys
+import threading
+
+
+# Built-in secret patterns: name -> (regex, trigger literals).
+# Patterns that start with a literal are searched directly, which the regex engine does at
+# close to memchr speed. Case-insensitive patterns list trigger literals instead: every match
+# starts with one, so candidates are found with substring searches in the lowercased text and
+# the regex is only tried there. A named group 'secret' limits the mask to that part of the
+# match, keeping the surrounding key name readable.
+BUILTIN_PATTERNS = {
+    "private_key": (
+        r"-----BEGIN [A-Z0-9 ]*PRIVATE KEY(?: BLOCK)?-----[\s\S]*?-----END [A-Z0-9 ]*PRIVATE KEY(?: BLOCK)?-----",
+        ()),
+    "aws_access_key": (
+        r"(?:AKIA|ASIA)[0-9A-Z]{16}\b",
+        ()),
+    "github_token": (
+        r"(?:gh[pousr]_[A-Za-z0-9]{36,}|github_pat_[A-Za-z0-9_]{60,})\b",
+        ()),
+    "slack_token": (
+        r"xox[abposr]-[A-Za-z0-9-]{10,}",
+        ()),
+    "jwt": (
+        r"eyJ[A-Za-z0-9_-]{8,}\.eyJ[A-Za-z0-9_-]{8,}\.[A-Za-z0-9_-]{8,}",
+        ()),
+    # Values assigned to password, secret (including AWS secret keys), API key and token names
+    "secret_assignment": (
+        r"(?i:passw(?:or)?d|secret|api_?key|(?:(?<=access_)|(?<=access)|(?<=auth_)|(?<=auth))token)"
+        r"[\w.-]*['\"]?\s*[:=]\s*['\"]?(?P<secret>[^\s'\",;]{6,})",
+        ("passw", "secret", "api", "token")),
+}
+
+DEFAULT_MASK = "[REDACTED:{name}]"
+
+# Lowercases ASCII letters only, so positions line up with the original text
+ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+class Redactor:
+    """Masks secrets in file content.
+
+    Each pattern is searched directly or through its trigger literals; overlapping matches
+    keep the earliest, longest one, and the masked text is assembled in a single pass.
+    """
+
+    def __init__(self, builtin=None, custom=None, mask=DEFAULT_MASK):
+        self.mask = mask or DEFAULT_MASK
+        # (name, compiled regex, triggers); patterns without triggers are searched directly
+        self.patterns = []
+        for name in (BUILTIN_PATTERNS if builtin is None else builtin):
+            if name not in BUILTIN_PATTERNS:
+                print(f"Unknown redaction pattern: {name}", file=sys.stderr)
+                continue
+            regex, triggers = BUILTIN_PATTERNS[name]
+            self.patterns.append((name, re.compile(regex), triggers))
+
+        for i, regex in enumerate(custom or [], 1):
+            try:
+                self.patterns.append((f"custom_{i}", re.compile(regex), ()))
+            except re.error as e:
+                print(f"Invalid custom redaction pattern {regex!r}: {e}", file=sys.stderr)
+
+    def find_matches(self, text):
+        """Find non-overlapping secret matches as (start, end, pattern name, match), in order"""
+        lowered = None
+        found = []
+        for name, regex, triggers in self.patterns:
+            if not triggers:
+                found.extend((m.start(), m.end(), name, m) for m in regex.finditer(text)
+                             if m.end() > m.start())
+                continue
+
+            if lowered is None:
+                lowered = text.lower()
+                if len(lowered) != len(text):
+                    # Some non-ASCII characters change length when lowercased
+                    lowered = text.translate(ASCII_LOWER)
+
+            for trigger in triggers:
+                pos = lowered.find(trigger)
+                while pos != -1:
+                    match = regex.match(text, pos)
+                    if match:
+                        found.append((match.start(), match.end(), name, match))
+                    pos = lowered.find(trigger, pos + 1)
+
+        found.sort(key=lambda item: (item[0], -item[1]))
+        matches = []
+        last_end = 0
+        for item in found:
+            if item[0] >= last_end:
+                matches.append(item)
+                last_end = item[1]
+        return matches
+
+    def redact(self, text):
+        """Mask secrets in text; returns (text, {pattern name: count})"""
+        matches = self.find_matches(text)
+        if not matches:
+            return text, {}
+
+        counts = {}
+        pieces = []
+        pos = 0
+        for start, end, name, match in matches:
+            counts[name] = counts.get(name, 0) + 1
+            # Keep the key name, mask only the value when the pattern marks it
+            if 'secret' in match.re.groupindex and match.group('secret') is not None:
+                start, end = match.span('secret')
+            pieces.append(text[pos:start])
+            pieces.append(self.mask.format(name=name))
+            pos = end
+        pieces.append(text[pos:])
+        return "".join(pieces), counts
+
+
+# Redactors shared by all extractors, keyed by the settings they were built from
+MAX_CACHED_REDACTORS = 16
+_redactor_cache = {}
+_redactor_lock = threading.Lock()
+
+
+def get_redactor(config):
+    """Get the redactor for a config, or None when redaction is disabled"""
+    settings = config.get('redaction') or {}
+    if not settings.get('enabled'):
+        return None
+
+    builtin = settings.get('builtin')
+    key = (None if builtin is None else tuple(builtin), tuple(settings.get('custom') or []),
+           settings.get('mask') or DEFAULT_MASK)
+    redactor = _redactor_cache.get(key)
+    if redactor is None:
+        with _redactor_lock:
+            redactor = _redactor_cache.get(key)
+            if redactor is None:
+                if len(_redactor_cache) >= MAX_CACHED_REDACTORS:
+                    _redactor_cache.clear()
+                redactor = Redactor(builtin, settings.get('custom'), settings.get('mask'))
+                _redactor_cache[key] = redactor
+    return redactor
@@ -0,0 +1,141 @@
+import heapq
+
+# Entries kept in the largest-file and deepest-path lists
+TOP_N = 10
+
+# Extensions listed in the text sections; the rest are summed up as "other"
+MAX_EXTENSIONS_LISTED = 15
+
+# Why a file's content was left out, as written in the statistics
+SKIP_REASONS = {
+    'ignored': "ignored by settings",
+    'too_large': "too large",
+    'not_text': "not a text file",
+    'duplicate': "linked duplicate"
+}
+
+
+def format_size(size):
+    """Format a byte count, e.g. '3.2 MB'"""
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            return f"{size} B" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class ScanStats:
+    """Histograms of a scan, built from the sizes and paths the scan already has.
+
+    Collects file counts and bytes per extension, the largest files, the deepest paths
+    and the bytes whose content is skipped, by reason. Adding an entry costs no I/O.
+    """
+
+    def __init__(self, top_n=TOP_N):
+        self.top_n = top_n
+        self.extensions = {}
+        self.skipped = {}
+        # Min-heaps of (size, path) and (depth, path), trimmed to top_n
+        self.largest = []
+        self.deepest = []
+
+    @classmethod
+    def from_entries(cls, entries, top_n=TOP_N):
+        stats = cls(top_n)
+        for entry in entries:
+            stats.add(entry)
+        return stats
+
+    def add(self, entry):
+        """Count a scanned FileEntry; directories are ignored"""
+        if entry.is_dir:
+            return
+
+        counts = self.extensions.setdefault(entry.ext or "(none)", [0, 0])
+        counts[0] += 1
+        counts[1] += entry.size
+
+        if entry.content_status in SKIP_REASONS:
+            skipped = self.skipped.setdefault(entry.content_status, [0, 0])
+            skipped[0] += 1
+            skipped[1] += entry.size
+
+        self.push(self.largest, (entry.size, entry.rel_path))
+        self.push(self.deepest, (entry.depth, entry.rel_path))
+
+    def push(self, heap, item):
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    def extension_rows(self):
+        """(extension, files, bytes) rows, largest total first"""
+        return sorted(((ext, files, size) for ext, (files, size) in self.extensions.items()),
+                      key=lambda row: (-row[2], -row[1], row[0]))
+
+    def largest_files(self):
+        return [(path, size) for size, path in sorted(self.largest, key=lambda item: (-item[0], item[1]))]
+
+    def deepest_paths(self):
+        return [(path, depth) for depth, path in sorted(self.deepest, key=lambda item: (-item[0], item[1]))]
+
+    def skipped_rows(self):
+        """(reason, files, bytes) rows in the order of SKIP_REASONS"""
+        return [(SKIP_REASONS[status], *self.skipped[status]) for status in SKIP_REASONS if status in self.skipped]
+
+    def listed_extensions(self):
+        """Extension rows to list, with the remainder folded into an 'other' row"""
+        rows = self.extension_rows()
+        if len(rows) <= MAX_EXTENSIONS_LISTED:
+            return rows
+        listed = rows[:MAX_EXTENSIONS_LISTED - 1]
+        rest = rows[MAX_EXTENSIONS_LISTED - 1:]
+        listed.append((f"other ({len(rest)})", sum(row[1] for row in rest), sum(row[2] for row in rest)))
+        return listed
+
+    def to_dict(self):
+        """Statistics for the JSON/YAML metadata"""
+        return {
+            "extensions": [{"extension": ext, "files": files, "bytes": size}
+                           for ext, files, size in self.extension_rows()],
+            "largest_files": [{"path": path, "bytes": size} for path, size in self.largest_files()],
+            "deepest_paths": [{"path": path, "depth": depth} for path, depth in self.deepest_paths()],
+            "skipped": {status: {"files": files, "bytes": size}
+                        for status, (files, size) in self.skipped.items()}
+        }
+
+    def markdown(self):
+        """Statistics section for markdown output"""
+        lines = ["## STATISTICS", "", "**Files by extension**", "",
+                 "| Extension | Files | Size |", "|---|---:|---:|"]
+        lines += [f"| {ext} | {files} | {format_size(size)} |" for ext, files, size in self.listed_extensions()]
+
+        lines += ["", "**Largest files**", "", "| File | Size |", "|---|---:|"]
+        lines += [f"| `{path}` | {format_size(size)} |" for path, size in self.largest_files()]
+
+        lines += ["", "**Deepest paths**", ""]
+        lines += [f"- `{path}` (depth {depth})" for path, depth in self.deepest_paths()]
+
+        skipped = self.skipped_rows()
+        if skipped:
+            lines += ["", "**Content skipped**", "", "| Reason | Files | Size |", "|---|---:|---:|"]
+            lines += [f"| {reason} | {files} | {format_size(size)} |" for reason, files, size in skipped]
+        return "\n".join(lines) + "\n\n"
+
+    def text(self):
+        """Statistics section for plain text output"""
+        lines = ["STATISTICS:", "", "Files by extension:"]
+        lines += [f"  {ext:<20} {files:>8} files {format_size(size):>12}"
+                  for ext, files, size in self.listed_extensions()]
+
+        lines += ["", "Largest files:"]
+        lines += [f"  {format_size(size):>12}  {path}" for path, size in self.largest_files()]
+
+        lines += ["", "Deepest paths:"]
+        lines += [f"  {depth:>3}  {path}" for path, depth in self.deepest_paths()]
+
+        skipped = self.skipped_rows()
+        if skipped:
+            lines += ["", "Content skipped:"]
+            lines += [f"  {reason:<20} {files:>8} files {format_size(size):>12}" for reason, files, size in skipped]
+        return "\n".join(lines) + "\n"
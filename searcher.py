@@ -0,0 +1,144 @@
+import bisect
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from decoder import decode_bytes, detect_bom, detect_wide_encoding
+
+# Threads reading and scanning candidate files; reads release the GIL, so this overlaps I/O
+SEARCH_THREADS = 8
+
+
+class ContentQuery:
+    """Matches file content against literal strings or regular expressions (any of them).
+
+    Files are scanned as raw bytes, so most are never decoded: literals are found with
+    bytes searches and other ASCII patterns run as bytes regexes. ASCII queries use ASCII
+    classes and case folding (\\w, \\d, IGNORECASE) so byte and text scans agree. Files in
+    UTF-16/32, and queries with non-ASCII patterns, are decoded and searched as text.
+    """
+
+    def __init__(self, patterns, regex=False, ignore_case=False):
+        self.patterns = [pattern for pattern in patterns if pattern]
+        if not self.patterns:
+            raise ValueError("No search patterns given")
+
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        sources = self.patterns if regex else [re.escape(pattern) for pattern in self.patterns]
+        combined = "|".join(f"(?:{source})" for source in sources)
+        ascii_only = all(pattern.isascii() for pattern in self.patterns)
+        try:
+            self.text_regex = re.compile(combined, flags | (re.ASCII if ascii_only else 0))
+        except re.error as e:
+            raise ValueError(f"Invalid search pattern: {e}")
+
+        self.literals = None
+        self.byte_regex = None
+        if ascii_only and not regex and not ignore_case:
+            self.literals = [pattern.encode("ascii") for pattern in self.patterns]
+        elif ascii_only:
+            self.byte_regex = re.compile(combined.encode("ascii"), flags)
+
+    def count(self, data, encodings=None):
+        """Count the matches in raw file content.
+
+        Returns (matches, (text, encoding) if the content was decoded to search it, else None).
+        """
+        wide = (detect_bom(data)[0] or "").startswith(("utf-16", "utf-32")) or detect_wide_encoding(data)
+        if not wide:
+            if self.literals is not None:
+                return sum(data.count(literal) for literal in self.literals), None
+            if self.byte_regex is not None:
+                return sum(1 for _ in self.byte_regex.finditer(data)), None
+
+        decoded = decode_bytes(data, encodings)
+        return sum(1 for _ in self.text_regex.finditer(decoded[0])), decoded
+
+    def matching_lines(self, text):
+        """Get the sorted 0-based numbers of lines with a match"""
+        line_starts = [0] + [match.end() for match in re.finditer("\n", text)]
+        lines = set()
+        for match in self.text_regex.finditer(text):
+            first = bisect.bisect_right(line_starts, match.start()) - 1
+            last = bisect.bisect_right(line_starts, max(match.start(), match.end() - 1)) - 1
+            lines.update(range(first, last + 1))
+        return sorted(lines)
+
+    def excerpt(self, text, context_lines=0):
+        """Keep only the lines with a match and context_lines around them.
+
+        Each range of lines starts with a '@@ lines first-last @@' marker (1-based).
+        Returns None when nothing matches.
+        """
+        matched = self.matching_lines(text)
+        if not matched:
+            return None
+
+        lines = text.split("\n")
+        ranges = []
+        for line in matched:
+            first = max(0, line - context_lines)
+            last = min(len(lines) - 1, line + context_lines)
+            if ranges and first <= ranges[-1][1] + 1:
+                ranges[-1][1] = max(ranges[-1][1], last)
+            else:
+                ranges.append([first, last])
+
+        parts = []
+        for first, last in ranges:
+            parts.append(f"@@ lines {first + 1}-{last + 1} @@")
+            parts.extend(lines[first:last + 1])
+        return "\n".join(parts)
+
+
+def search_entries(query, entries, threads=SEARCH_THREADS):
+    """Count matches in file entries, in parallel.
+
+    Returns {rel_path: (matches, (text, encoding))} for files that match. Matching files are
+    decoded here, on the search threads, so writing them does not read them again.
+    """
+
+    def scan(entry):
+        try:
+            data = entry.source.read_bytes(entry.path)
+        except OSError:
+            return entry.rel_path, (0, None)
+        matches, decoded = query.count(data, entry.encodings)
+        if matches and decoded is None:
+            decoded = decode_bytes(data, entry.encodings)
+        return entry.rel_path, (matches, decoded)
+
+    if threads > 1 and len(entries) > 1:
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="search") as executor:
+            results = list(executor.map(scan, entries))
+    else:
+        results = [scan(entry) for entry in entries]
+    return {rel_path: result for rel_path, result in results if result[0]}
+
+
+# Queries shared by all extractors, keyed by the settings they were built from
+MAX_CACHED_QUERIES = 16
+_query_cache = {}
+_query_lock = threading.Lock()
+
+
+def get_content_query(config):
+    """Get the content query for a config, or None when no search patterns are set"""
+    settings = config.get('search') or {}
+    patterns = settings.get('patterns') or []
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    if not any(patterns):
+        return None
+
+    key = (tuple(patterns), bool(settings.get('regex')), bool(settings.get('ignore_case')))
+    query = _query_cache.get(key)
+    if query is None:
+        with _query_lock:
+            query = _query_cache.get(key)
+            if query is None:
+                if len(_query_cache) >= MAX_CACHED_QUERIES:
+                    _query_cache.clear()
+                query = ContentQuery(*key)
+                _query_cache[key] = query
+    return query
@@ -0,0 +1,228 @@
+import copy
+import io
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from cache import ContentCache, ScanCache
+from config import ConfigManager
+from extractor import FileStructureExtractor
+from filters import rule_overrides
+from outputs import OUTPUT_FORMATS
+from sources import is_archive, resolve_revision
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+CONTENT_TYPES = {
+    'md': 'text/markdown; charset=utf-8',
+    'txt': 'text/plain; charset=utf-8',
+    'json': 'application/json; charset=utf-8',
+    'yaml': 'application/x-yaml; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8'
+}
+
+# Rule sections a request may override; given lists replace the configured ones
+FILTER_SECTIONS = ['folders', 'extensions', 'files']
+
+
+class ChunkedWriter(io.TextIOBase):
+    """Text stream that sends UTF-8 data as HTTP/1.1 chunks, buffered into large chunks"""
+
+    def __init__(self, wfile, chunk_size=64 * 1024):
+        self.wfile = wfile
+        self.chunk_size = chunk_size
+        self.buffer = []
+        self.buffered = 0
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        data = text.encode('utf-8')
+        self.buffer.append(data)
+        self.buffered += len(data)
+        if self.buffered >= self.chunk_size:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self.buffered:
+            data = b"".join(self.buffer)
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.buffer = []
+            self.buffered = 0
+
+    def finish(self):
+        """Send any buffered data and the terminating chunk"""
+        self.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class ExtractionServer(ThreadingHTTPServer):
+    """Long-running localhost server that keeps filter rules, scan metadata and content warm"""
+
+    daemon_threads = True
+
+    def __init__(self, address, config_manager, max_concurrent=2, queue_timeout=30):
+        super().__init__(address, ExtractionRequestHandler)
+        self.config_manager = config_manager
+        self.scan_cache = ScanCache()
+        self.content_cache = ContentCache()
+        self.queue_timeout = queue_timeout
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+
+    def build_extractor(self, params):
+        """Build an extractor for one request, sharing the server's caches"""
+        config = copy.deepcopy(self.config_manager.config)
+        general = config['general']
+
+        # Responses stream a single document, so only one format applies
+        general['file_format'] = params.get('format') or self.config_manager.get_output_formats()[0]
+        if params.get('content_mode'):
+            general['content_mode'] = params['content_mode']
+        if params.get('max_file_size_mb'):
+            general['max_file_size_mb'] = float(params['max_file_size_mb'])
+        if params.get('chunk_chars'):
+            config['chunks']['max_chars'] = int(params['chunk_chars'])
+        if params.get('chunk_overlap') is not None:
+            config['chunks']['overlap_lines'] = int(params['chunk_overlap'])
+        if 'redact' in params:
+            config['redaction']['enabled'] = params['redact'] in (True, 'true', '1', 'yes')
+        if params.get('grep'):
+            patterns = params['grep']
+            config['search'].update(
+                patterns=[patterns] if isinstance(patterns, str) else list(patterns),
+                regex=params.get('regex') in (True, 'true', '1', 'yes'),
+                ignore_case=params.get('ignore_case') in (True, 'true', '1', 'yes'),
+                context_lines=int(params['context']) if params.get('context') is not None else None)
+
+        # Rule lists must be {kind: [names]}; a string would otherwise be split into characters
+        rule_overrides({section: params[section] for section in FILTER_SECTIONS if section in params})
+        for section in FILTER_SECTIONS:
+            for kind, values in (params.get(section) or {}).items():
+                if kind in config[section]:
+                    config[section][kind] = list(values)
+
+        config_manager = ConfigManager.from_dict(config)
+        if 'profile' in params:
+            config_manager.use_profile(params['profile'])
+
+        extractor = FileStructureExtractor(config_manager, self.scan_cache, self.content_cache)
+        # Compile the content search now, so a bad pattern is reported before streaming starts
+        extractor.content_query
+        return extractor
+
+
+class ExtractionRequestHandler(BaseHTTPRequestHandler):
+    """Handles GET/POST /extract and GET /health"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "StructJAM"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            self.send_json(200, {"status": "ok"})
+        elif url.path == "/extract":
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            self.handle_extract(params)
+        else:
+            self.send_json(404, {"error": f"Unknown path: {url.path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/extract":
+            self.send_json(404, {"error": f"Unknown path: {url.path}"})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            params = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(params, dict):
+                raise ValueError("Request body must be a JSON object")
+        except ValueError as e:
+            self.send_json(400, {"error": f"Invalid request: {e}"})
+            return
+
+        self.handle_extract(params)
+
+    def handle_extract(self, params):
+        """Validate an extraction request, wait for a free slot and stream the result"""
+        directory = params.get('directory')
+        file_format = params.get('format') or self.server.config_manager.get_output_formats()[0]
+
+        if not directory or not (os.path.isdir(directory) or is_archive(directory)):
+            self.send_json(404, {"error": f"Directory does not exist: {directory}"})
+            return
+        if file_format not in OUTPUT_FORMATS:
+            self.send_json(400, {"error": f"Unsupported format: {file_format}"})
+            return
+
+        # Check the revision before the response starts; a failure after the headers would
+        # reach the client as a truncated 200
+        revision = params.get('rev')
+        if revision:
+            if not isinstance(revision, str) or not os.path.isdir(directory):
+                self.send_json(400, {"error": f"Invalid revision request: {revision!r} of {directory}"})
+                return
+            try:
+                resolve_revision(directory, revision)
+            except ValueError as e:
+                self.send_json(404, {"error": str(e)})
+                return
+
+        try:
+            extractor = self.server.build_extractor(params)
+        except (AttributeError, TypeError, ValueError) as e:
+            self.send_json(400, {"error": f"Invalid request: {e}"})
+            return
+
+        if not self.server.slots.acquire(timeout=self.server.queue_timeout):
+            self.send_json(503, {"error": "Too many extractions running, try again later"},
+                           {"Retry-After": "5"})
+            return
+
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPES[file_format])
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            writer = ChunkedWriter(self.wfile)
+            success, message = extractor.extract_structure(directory, output=writer,
+                                                           revision=revision)
+            if success:
+                writer.finish()
+            else:
+                # Without the terminating chunk the client sees an incomplete response
+                self.log_error("Extraction failed: %s", message)
+                self.close_connection = True
+        finally:
+            self.server.slots.release()
+
+    def send_json(self, status, data, headers=None):
+        """Send a small JSON response"""
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(config_manager, host=DEFAULT_HOST, port=DEFAULT_PORT, max_concurrent=2):
+    """Run the extraction server until interrupted"""
+    server = ExtractionServer((host, port), config_manager, max_concurrent)
+    print(f"Serving extractions on http://{host}:{server.server_address[1]} "
+          f"(max {max_concurrent} at once, Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,7 +1,57 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, filedialog, messagebox, scrolledtext
 from utils import set_window_icon, ThemeManager, create_tooltip
 
+WINDOW_WIDTH = 900
+WINDOW_HEIGHT = 700
+
+# Bind tags carrying the hover and click effects; every widget shares one set of handlers
+RELIEF_HOVER_TAG = 'SettingsReliefHover'
+COLOR_HOVER_TAG = 'SettingsColorHover'
+PRESS_TAG = 'SettingsPress'
+
+
+def on_relief_enter(e):
+    e.widget.configure(relief=tk.RAISED)
+
+
+def on_relief_leave(e):
+    e.widget.configure(relief=tk.FLAT)
+
+
+def on_color_enter(e):
+    if e.widget['state'] != tk.DISABLED:
+        e.widget.configure(bg=e.widget.hover_colors[1])
+
+
+def on_color_leave(e):
+    if e.widget['state'] != tk.DISABLED:
+        e.widget.configure(bg=e.widget.hover_colors[0])
+
+
+def on_press(e):
+    button = e.widget
+    if button['state'] != tk.DISABLED:
+        button.configure(relief=tk.SUNKEN)
+        button.after(100, lambda: button.configure(relief=tk.RAISED))
+
+
+def bind_effect_tags(widget):
+    """Register the shared effect handlers once per Tk interpreter"""
+    if widget.bind_class(RELIEF_HOVER_TAG):
+        return
+    widget.bind_class(RELIEF_HOVER_TAG, '<Enter>', on_relief_enter)
+    widget.bind_class(RELIEF_HOVER_TAG, '<Leave>', on_relief_leave)
+    widget.bind_class(COLOR_HOVER_TAG, '<Enter>', on_color_enter)
+    widget.bind_class(COLOR_HOVER_TAG, '<Leave>', on_color_leave)
+    widget.bind_class(PRESS_TAG, '<Button-1>', on_press)
+
+
+def add_effect_tags(widget, *tags):
+    """Put effect tags right after the widget's own tag, where widget bindings would run"""
+    own = widget.bindtags()
+    widget.bindtags(own[:1] + tags + own[1:])
+
 
 class SettingsWindow:
     def __init__(self, parent, config_manager, on_theme_change=None):
@@ -9,7 +59,7 @@ class SettingsWindow:
         self.on_theme_change = on_theme_change
         self.window = tk.Toplevel(parent)
         self.window.title("Settings - File Structure Extractor")
-        self.window.geometry("900x700")
+        self.window.geometry(f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}")
         self.window.resizable(True, True)
         self.window.transient(parent)
         self.window.grab_set()
@@ -23,17 +73,25 @@ class SettingsWindow:
 
         # Apply theme to window
         self.window.configure(bg=self.theme['bg'])
+        bind_effect_tags(self.window)
+
+        # List tabs are built the first time they are shown; until then their listboxes are None
+        self.ignored_folders_listbox = None
+        self.excluded_folders_listbox = None
+        self.ignored_ext_listbox = None
+        self.excluded_ext_listbox = None
+        self.ignored_files_listbox = None
+        self.excluded_files_listbox = None
+        self.pending_tabs = {}
 
         self.create_widgets()
         self.center_window()
 
     def center_window(self):
-        """Center the window on screen"""
-        self.window.update_idletasks()
-        w, h = self.window.winfo_width(), self.window.winfo_height()
-        x = (self.window.winfo_screenwidth() // 2) - (w // 2)
-        y = (self.window.winfo_screenheight() // 2) - (h // 2)
-        self.window.geometry(f"{w}x{h}+{x}+{y}")
+        """Center the window on screen, using the requested size instead of waiting for layout"""
+        x = (self.window.winfo_screenwidth() // 2) - (WINDOW_WIDTH // 2)
+        y = (self.window.winfo_screenheight() // 2) - (WINDOW_HEIGHT // 2)
+        self.window.geometry(f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}+{x}+{y}")
 
     def create_widgets(self):
         """Create all widgets"""
@@ -70,16 +128,28 @@ class SettingsWindow:
         style.configure('TNotebook.Tab', background=self.theme['frame_bg'],
                         foreground=self.theme['fg'], padding=[12, 8])
 
-        # Create tabs
-        self.create_general_tab()
-        self.create_folders_tab()
-        self.create_extensions_tab()
-        self.create_files_tab()
-
-    def create_general_tab(self):
+        # Create tabs; only the General tab is shown at first, the others are built when selected
+        tabs = [("⚙️ General", self.create_general_tab), ("📁 Folders", self.create_folders_tab),
+                ("📄 Extensions", self.create_extensions_tab), ("📝 Files", self.create_files_tab)]
+        for i, (text, create_tab) in enumerate(tabs):
+            frame = ttk.Frame(self.notebook)
+            self.notebook.add(frame, text=text)
+            if i == 0:
+                create_tab(frame)
+            else:
+                self.pending_tabs[str(frame)] = (frame, create_tab)
+
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+
+    def on_tab_changed(self, event):
+        """Build a tab the first time it is selected"""
+        pending = self.pending_tabs.pop(self.notebook.select(), None)
+        if pending:
+            frame, create_tab = pending
+            create_tab(frame)
+
+    def create_general_tab(self, general_frame):
         """Create general settings tab"""
-        general_frame = ttk.Frame(self.notebook)
-        self.notebook.add(general_frame, text="⚙️ General")
 
         # Main container
         main_container = tk.Frame(general_frame, bg=self.theme['bg'])
@@ -101,6 +171,27 @@ class SettingsWindow:
         ThemeManager.apply_theme(prefix_entry, self.theme, 'entry')
         prefix_entry.pack(fill=tk.X, padx=10, pady=(0, 10))
 
+        # Output directory
+        tk.Label(output_frame, text="Output directory (leave empty to write into the scanned directory):",
+                 bg=self.theme['bg'], fg=self.theme['fg'],
+                 font=('Helvetica', 10)).pack(anchor=tk.W, padx=10, pady=(0, 5))
+
+        output_dir_frame = tk.Frame(output_frame, bg=self.theme['bg'])
+        output_dir_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        self.output_dir_var = tk.StringVar(value=self.config.get('general', 'output_dir') or '')
+        output_dir_entry = tk.Entry(output_dir_frame, textvariable=self.output_dir_var,
+                                    font=('Helvetica', 10))
+        ThemeManager.apply_theme(output_dir_entry, self.theme, 'entry')
+        output_dir_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
+
+        browse_btn = tk.Button(output_dir_frame, text="Browse...", command=self.browse_output_dir,
+                               bg=self.theme['button'], fg='white', width=8,
+                               activebackground=self.theme['accent'], font=('Helvetica', 9),
+                               relief=tk.RAISED, bd=2, cursor='hand2')
+        browse_btn.pack(side=tk.LEFT)
+        self.add_button_effects(browse_btn, self.theme['button'], self.theme['accent'])
+
         # File format
         tk.Label(output_frame, text="Output format:", bg=self.theme['bg'],
                  fg=self.theme['fg'], font=('Helvetica', 10)).pack(anchor=tk.W, padx=10, pady=(0, 5))
@@ -108,17 +199,39 @@ class SettingsWindow:
         format_frame = tk.Frame(output_frame, bg=self.theme['bg'])
         format_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
 
-        self.format_var = tk.StringVar(value=self.config.get('general', 'file_format'))
-
+        # Several formats can be ticked; they are written from a single scan
+        selected = self.config.get_output_formats()
         formats = [('Markdown (.md)', 'md'), ('Text (.txt)', 'txt'),
-                   ('JSON (.json)', 'json'), ('YAML (.yaml)', 'yaml')]
+                   ('JSON (.json)', 'json'), ('YAML (.yaml)', 'yaml'), ('Chunks (.jsonl)', 'jsonl')]
 
+        self.format_vars = {}
         for i, (text, value) in enumerate(formats):
-            rb = tk.Radiobutton(format_frame, text=text, variable=self.format_var,
+            self.format_vars[value] = tk.BooleanVar(value=value in selected)
+            cb = tk.Checkbutton(format_frame, text=text, variable=self.format_vars[value],
+                                bg=self.theme['bg'], fg=self.theme['fg'],
+                                activebackground=self.theme['bg'], selectcolor=self.theme['accent'],
+                                font=('Helvetica', 10), relief=tk.FLAT, bd=2, padx=5, pady=2)
+            cb.grid(row=i // 2, column=i % 2, sticky='w', padx=(0, 20), pady=2)
+            self.add_checkbox_effects(cb)
+
+        # Content mode
+        tk.Label(output_frame, text="Content mode:", bg=self.theme['bg'],
+                 fg=self.theme['fg'], font=('Helvetica', 10)).pack(anchor=tk.W, padx=10, pady=(0, 5))
+
+        mode_frame = tk.Frame(output_frame, bg=self.theme['bg'])
+        mode_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        self.content_mode_var = tk.StringVar(value=self.config.get('general', 'content_mode') or 'full')
+
+        content_modes = [('Full contents', 'full'), ('Skeleton (signatures and docstrings)', 'skeleton'),
+                         ('Minified (no comments or blank lines)', 'minify')]
+
+        for i, (text, value) in enumerate(content_modes):
+            rb = tk.Radiobutton(mode_frame, text=text, variable=self.content_mode_var,
                                 value=value, bg=self.theme['bg'], fg=self.theme['fg'],
                                 activebackground=self.theme['bg'], selectcolor=self.theme['accent'],
                                 font=('Helvetica', 10), relief=tk.FLAT, bd=2, padx=5, pady=2)
-            rb.grid(row=i // 2, column=i % 2, sticky='w', padx=(0, 20), pady=2)
+            rb.grid(row=0, column=i, sticky='w', padx=(0, 20), pady=2)
             self.add_radiobutton_effects(rb)
 
         # Max file size
@@ -147,6 +260,65 @@ class SettingsWindow:
         delete_cb.pack(anchor=tk.W, padx=10, pady=10)
         self.add_checkbox_effects(delete_cb)
 
+        # Section index sidecar
+        self.index_var = tk.BooleanVar(value=self.config.get('general', 'write_index'))
+        index_cb = tk.Checkbutton(other_frame, text="Write section index (fast lookup of single files)",
+                                  variable=self.index_var, bg=self.theme['bg'],
+                                  fg=self.theme['fg'], activebackground=self.theme['bg'],
+                                  selectcolor=self.theme['accent'], font=('Helvetica', 10),
+                                  relief=tk.FLAT, bd=2, padx=5, pady=3)
+        index_cb.pack(anchor=tk.W, padx=10, pady=(0, 10))
+        self.add_checkbox_effects(index_cb)
+
+        # Statistics section
+        self.stats_var = tk.BooleanVar(value=self.config.get('general', 'include_statistics'))
+        stats_cb = tk.Checkbutton(other_frame, text="Include statistics (sizes by extension, largest files)",
+                                  variable=self.stats_var, bg=self.theme['bg'],
+                                  fg=self.theme['fg'], activebackground=self.theme['bg'],
+                                  selectcolor=self.theme['accent'], font=('Helvetica', 10),
+                                  relief=tk.FLAT, bd=2, padx=5, pady=3)
+        stats_cb.pack(anchor=tk.W, padx=10, pady=(0, 10))
+        self.add_checkbox_effects(stats_cb)
+
+        # Project config files
+        self.project_config_var = tk.BooleanVar(value=self.config.get('general', 'project_config') is not False)
+        project_cb = tk.Checkbutton(other_frame, text="Use project rules (.structjam.toml / .structjam.json)",
+                                    variable=self.project_config_var, bg=self.theme['bg'],
+                                    fg=self.theme['fg'], activebackground=self.theme['bg'],
+                                    selectcolor=self.theme['accent'], font=('Helvetica', 10),
+                                    relief=tk.FLAT, bd=2, padx=5, pady=3)
+        project_cb.pack(anchor=tk.W, padx=10, pady=(0, 10))
+        self.add_checkbox_effects(project_cb)
+
+        # Secret redaction
+        self.redact_var = tk.BooleanVar(value=self.config.get('redaction', 'enabled'))
+        redact_cb = tk.Checkbutton(other_frame, text="Redact secrets (keys, tokens, passwords)",
+                                   variable=self.redact_var, bg=self.theme['bg'],
+                                   fg=self.theme['fg'], activebackground=self.theme['bg'],
+                                   selectcolor=self.theme['accent'], font=('Helvetica', 10),
+                                   relief=tk.FLAT, bd=2, padx=5, pady=3)
+        redact_cb.pack(anchor=tk.W, padx=10, pady=(0, 10))
+        self.add_checkbox_effects(redact_cb)
+
+        # Symlinked directories
+        tk.Label(other_frame, text="Symlinked folders:", bg=self.theme['bg'],
+                 fg=self.theme['fg'], font=('Helvetica', 10)).pack(anchor=tk.W, padx=10, pady=(0, 5))
+
+        symlink_frame = tk.Frame(other_frame, bg=self.theme['bg'])
+        symlink_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        self.symlinks_var = tk.StringVar(value=self.config.get('general', 'symlinks') or 'skip')
+
+        symlink_options = [('Skip', 'skip'), ('Follow', 'follow'), ('List only', 'list_only')]
+
+        for i, (text, value) in enumerate(symlink_options):
+            rb = tk.Radiobutton(symlink_frame, text=text, variable=self.symlinks_var,
+                                value=value, bg=self.theme['bg'], fg=self.theme['fg'],
+                                activebackground=self.theme['bg'], selectcolor=self.theme['accent'],
+                                font=('Helvetica', 10), relief=tk.FLAT, bd=2, padx=5, pady=2)
+            rb.grid(row=0, column=i, sticky='w', padx=(0, 20), pady=2)
+            self.add_radiobutton_effects(rb)
+
         # Dark mode
         self.dark_mode_var = tk.BooleanVar(value=self.dark_mode)
         dark_cb = tk.Checkbutton(other_frame, text="Dark mode (requires restart)",
@@ -177,34 +349,22 @@ class SettingsWindow:
             rb.grid(row=i // 2, column=i % 2, sticky='w', padx=(0, 20), pady=2)
             self.add_radiobutton_effects(rb)
 
+    def browse_output_dir(self):
+        """Choose the output directory"""
+        directory = filedialog.askdirectory(parent=self.window, title="Select Output Directory")
+        if directory:
+            self.output_dir_var.set(directory)
+
     def add_checkbox_effects(self, checkbox):
         """Add visual effects to checkboxes"""
-
-        def on_enter(e):
-            checkbox.configure(relief=tk.RAISED)
-
-        def on_leave(e):
-            checkbox.configure(relief=tk.FLAT)
-
-        checkbox.bind('<Enter>', on_enter)
-        checkbox.bind('<Leave>', on_leave)
+        add_effect_tags(checkbox, RELIEF_HOVER_TAG)
 
     def add_radiobutton_effects(self, radiobutton):
         """Add visual effects to radio buttons"""
+        add_effect_tags(radiobutton, RELIEF_HOVER_TAG)
 
-        def on_enter(e):
-            radiobutton.configure(relief=tk.RAISED)
-
-        def on_leave(e):
-            radiobutton.configure(relief=tk.FLAT)
-
-        radiobutton.bind('<Enter>', on_enter)
-        radiobutton.bind('<Leave>', on_leave)
-
-    def create_folders_tab(self):
+    def create_folders_tab(self, folders_frame):
         """Create folders tab with both ignored and excluded"""
-        folders_frame = ttk.Frame(self.notebook)
-        self.notebook.add(folders_frame, text="📁 Folders")
 
         main_container = tk.Frame(folders_frame, bg=self.theme['bg'])
         main_container.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -242,10 +402,8 @@ class SettingsWindow:
         # Quick add buttons
         self.create_folder_quick_add(main_container)
 
-    def create_extensions_tab(self):
+    def create_extensions_tab(self, ext_frame):
         """Create extensions tab with both ignored and excluded"""
-        ext_frame = ttk.Frame(self.notebook)
-        self.notebook.add(ext_frame, text="📄 Extensions")
 
         main_container = tk.Frame(ext_frame, bg=self.theme['bg'])
         main_container.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -283,10 +441,8 @@ class SettingsWindow:
         # Quick add buttons
         self.create_extension_quick_add(main_container)
 
-    def create_files_tab(self):
+    def create_files_tab(self, files_frame):
         """Create files tab with both ignored and excluded"""
-        files_frame = ttk.Frame(self.notebook)
-        self.notebook.add(files_frame, text="📝 Files")
 
         main_container = tk.Frame(files_frame, bg=self.theme['bg'])
         main_container.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -371,23 +527,8 @@ class SettingsWindow:
 
     def add_button_effects(self, button, normal_color, hover_color):
         """Add hover and click effects to buttons"""
-
-        def on_enter(e):
-            if button['state'] != tk.DISABLED:
-                button.configure(bg=hover_color)
-
-        def on_leave(e):
-            if button['state'] != tk.DISABLED:
-                button.configure(bg=normal_color)
-
-        def on_click(e):
-            if button['state'] != tk.DISABLED:
-                button.configure(relief=tk.SUNKEN)
-                button.after(100, lambda: button.configure(relief=tk.RAISED))
-
-        button.bind('<Enter>', on_enter)
-        button.bind('<Leave>', on_leave)
-        button.bind('<Button-1>', on_click)
+        button.hover_colors = (normal_color, hover_color)
+        add_effect_tags(button, COLOR_HOVER_TAG, PRESS_TAG)
 
     def create_folder_quick_add(self, parent):
         """Create quick add buttons for folders"""
@@ -431,14 +572,8 @@ class SettingsWindow:
             btn.grid(row=i // 4, column=i % 4, padx=3, pady=3, sticky='ew')
 
             # Improve button feedback
-            def on_enter(e, b=btn, c=active_color):
-                b.configure(bg=c)
-
-            def on_leave(e, b=btn, c=color):
-                b.configure(bg=c)
-
-            btn.bind('<Enter>', on_enter)
-            btn.bind('<Leave>', on_leave)
+            btn.hover_colors = (color, active_color)
+            add_effect_tags(btn, COLOR_HOVER_TAG)
 
     def create_extension_quick_add(self, parent):
         """Create quick add buttons for extensions"""
@@ -482,14 +617,8 @@ class SettingsWindow:
             btn.grid(row=i // 6, column=i % 6, padx=3, pady=3, sticky='ew')
 
             # Improve button feedback
-            def on_enter(e, b=btn, c=active_color):
-                b.configure(bg=c)
-
-            def on_leave(e, b=btn, c=color):
-                b.configure(bg=c)
-
-            btn.bind('<Enter>', on_enter)
-            btn.bind('<Leave>', on_leave)
+            btn.hover_colors = (color, active_color)
+            add_effect_tags(btn, COLOR_HOVER_TAG)
 
     # Add/remove methods for folders
     def add_ignored_folder(self, entry, listbox):
@@ -594,23 +723,29 @@ class SettingsWindow:
 
             # Update general settings
             self.config.set('general', 'output_file_prefix', self.prefix_var.get() or 'project_structure')
-            self.config.set('general', 'file_format', self.format_var.get())
+            self.config.set_output_formats([value for value, var in self.format_vars.items() if var.get()])
+            self.config.set('general', 'output_dir', self.output_dir_var.get().strip())
+            self.config.set('general', 'content_mode', self.content_mode_var.get())
             self.config.set('general', 'max_file_size_mb', max_size)
             self.config.set('general', 'delete_previous_files', self.delete_var.get())
+            self.config.set('general', 'write_index', self.index_var.get())
+            self.config.set('general', 'include_statistics', self.stats_var.get())
+            self.config.set('general', 'project_config', self.project_config_var.get())
+            self.config.set('general', 'symlinks', self.symlinks_var.get())
+            self.config.set('redaction', 'enabled', self.redact_var.get())
             self.config.set('general', 'dark_mode', self.dark_mode_var.get())
             self.config.set('general', 'sort_mode', self.sort_var.get())
 
-            # Update folder settings
-            self.config.config['folders']['ignored'] = self.get_listbox_items(self.ignored_folders_listbox)
-            self.config.config['folders']['excluded'] = self.get_listbox_items(self.excluded_folders_listbox)
-
-            # Update extension settings
-            self.config.config['extensions']['ignored'] = self.get_listbox_items(self.ignored_ext_listbox)
-            self.config.config['extensions']['excluded'] = self.get_listbox_items(self.excluded_ext_listbox)
-
-            # Update file settings
-            self.config.config['files']['ignored'] = self.get_listbox_items(self.ignored_files_listbox)
-            self.config.config['files']['excluded'] = self.get_listbox_items(self.excluded_files_listbox)
+            # Update folder, extension and file settings from the tabs that were opened
+            lists = [('folders', 'ignored', self.ignored_folders_listbox),
+                     ('folders', 'excluded', self.excluded_folders_listbox),
+                     ('extensions', 'ignored', self.ignored_ext_listbox),
+                     ('extensions', 'excluded', self.excluded_ext_listbox),
+                     ('files', 'ignored', self.ignored_files_listbox),
+                     ('files', 'excluded', self.excluded_files_listbox)]
+            for section, key, listbox in lists:
+                if listbox is not None:
+                    self.config.config[section][key] = self.get_listbox_items(listbox)
 
             # Save configuration
             self.config.save_config()
@@ -0,0 +1,221 @@
+import ast
+import re
+
+from decoder import read_file
+
+
+# Registry of skeleton parsers, keyed by lowercase file extension.
+# A parser takes the decoded source text and returns the skeleton text,
+# or None when the source cannot be parsed (the full content is used instead).
+SKELETON_PARSERS = {}
+
+# Longest constant value kept verbatim in a skeleton
+MAX_VALUE_LENGTH = 120
+
+
+def register_parser(extensions, parser):
+    """Register a skeleton parser for one or more file extensions"""
+    if isinstance(extensions, str):
+        extensions = [extensions]
+    for ext in extensions:
+        SKELETON_PARSERS[ext.lower()] = parser
+
+
+def get_parser(ext):
+    """Get the skeleton parser registered for an extension, if any"""
+    return SKELETON_PARSERS.get(ext.lower())
+
+
+def has_parser(ext):
+    """Check if a skeleton parser is registered for an extension"""
+    return ext.lower() in SKELETON_PARSERS
+
+
+def skeletonize_source(source, ext):
+    """Build the skeleton of already-loaded source text"""
+    parser = get_parser(ext)
+    if parser is None:
+        return None
+    try:
+        return parser(source)
+    except (SyntaxError, ValueError, RecursionError):
+        return None
+
+
+def skeletonize_file(path, ext, encodings=None):
+    """Read a file and build its skeleton (process pool entry point).
+
+    Returns (skeleton or None, encoding the file was decoded with, UTF-8 size of the decoded source).
+    """
+    source, encoding = read_file(path, encodings)
+    return (skeletonize_source(source, ext), encoding,
+            len(source.encode("utf-8", errors="surrogatepass")))
+
+
+# ---------------------------------------------------------------------------
+# Python (ast)
+# ---------------------------------------------------------------------------
+
+def _shorten(text):
+    """Trim long constant values so skeletons stay compact"""
+    text = text.replace("\n", " ")
+    if len(text) > MAX_VALUE_LENGTH:
+        return text[:MAX_VALUE_LENGTH] + " ..."
+    return text
+
+
+def _docstring_lines(node, indent):
+    """Render the docstring of a node as indented source lines"""
+    doc = ast.get_docstring(node)
+    if not doc:
+        return []
+    doc = doc.replace('"""', '\\"\\"\\"')
+    lines = doc.splitlines()
+    if len(lines) == 1:
+        return [f'{indent}"""{lines[0]}"""']
+    rendered = [f'{indent}"""{lines[0]}']
+    rendered.extend(f"{indent}{line}" if line else "" for line in lines[1:])
+    rendered.append(f'{indent}"""')
+    return rendered
+
+
+def _is_constant_target(node):
+    """Check if an assignment binds an UPPER_CASE module constant"""
+    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+    return all(isinstance(t, ast.Name) and t.id.isupper() for t in targets)
+
+
+def _function_lines(node, indent):
+    """Render a function signature and its docstring"""
+    lines = [f"{indent}@{ast.unparse(d)}" for d in node.decorator_list]
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    lines.append(f"{indent}{prefix} {node.name}({ast.unparse(node.args)}){returns}:")
+    lines.extend(_docstring_lines(node, indent + "    "))
+    lines.append(f"{indent}    ...")
+    return lines
+
+
+def _class_lines(node, indent):
+    """Render a class header, docstring, attributes and method signatures"""
+    lines = [f"{indent}@{ast.unparse(d)}" for d in node.decorator_list]
+    bases = [ast.unparse(b) for b in node.bases] + [ast.unparse(k) for k in node.keywords]
+    header = f"({', '.join(bases)})" if bases else ""
+    lines.append(f"{indent}class {node.name}{header}:")
+
+    body_indent = indent + "    "
+    body = _docstring_lines(node, body_indent)
+    for child in node.body:
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if body:
+                body.append("")
+            body.extend(_function_lines(child, body_indent))
+        elif isinstance(child, ast.ClassDef):
+            if body:
+                body.append("")
+            body.extend(_class_lines(child, body_indent))
+        elif isinstance(child, (ast.Assign, ast.AnnAssign)):
+            body.append(body_indent + _shorten(ast.unparse(child)))
+
+    lines.extend(body or [f"{body_indent}..."])
+    return lines
+
+
+def _import_lines(nodes):
+    """Collect imports, including those guarded by module-level try/if blocks"""
+    lines = []
+    for node in nodes:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            lines.append(ast.unparse(node))
+        elif isinstance(node, (ast.Try, ast.If)):
+            lines.extend(_import_lines(node.body))
+    return lines
+
+
+def python_skeleton(source):
+    """Build a skeleton of Python source using the ast module"""
+    tree = ast.parse(source)
+    blocks = []
+
+    doc = _docstring_lines(tree, "")
+    if doc:
+        blocks.append(doc)
+
+    imports = _import_lines(tree.body)
+    if imports:
+        blocks.append(imports)
+
+    constants = [_shorten(ast.unparse(node)) for node in tree.body
+                 if isinstance(node, (ast.Assign, ast.AnnAssign)) and _is_constant_target(node)]
+    if constants:
+        blocks.append(constants)
+
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            blocks.append(_class_lines(node, ""))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            blocks.append(_function_lines(node, ""))
+
+    return "\n\n".join("\n".join(block) for block in blocks)
+
+
+# ---------------------------------------------------------------------------
+# Brace-delimited languages (lightweight line parser)
+# ---------------------------------------------------------------------------
+
+# Blocks opened by these keywords keep their members; any other block is a body
+CONTAINER_PATTERN = re.compile(
+    r"\b(class|interface|struct|enum|namespace|impl|trait|mod|module|object|protocol|extension)\b")
+
+# Strings, character literals and line comments, stripped before counting braces
+NOISE_PATTERN = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`(?:\\.|[^`\\])*`|//.*$')
+
+
+def brace_skeleton(source):
+    """Build a skeleton of brace-delimited source by dropping block bodies"""
+    lines = []
+    stack = []
+    in_comment = False
+    previous = ""
+
+    for line in source.splitlines():
+        visible = "body" not in stack
+        stripped = line.strip()
+
+        if in_comment or (stripped.startswith("/*") and "*/" not in stripped):
+            in_comment = "*/" not in stripped
+            if visible:
+                lines.append(line)
+            continue
+
+        code = re.sub(r"/\*.*?\*/", "", NOISE_PATTERN.sub("", line))
+        depth = len(stack)
+        for index, char in enumerate(code):
+            if char == "{":
+                if "body" in stack:
+                    stack.append("body")
+                else:
+                    # Allman-style braces take their kind from the previous line
+                    opener = code[:index].strip() or previous
+                    stack.append("container" if CONTAINER_PATTERN.search(opener) else "body")
+            elif char == "}" and stack:
+                stack.pop()
+
+        if not visible:
+            continue
+        if len(stack) > depth and stack[depth] == "body":
+            # The line opens a body that continues past it: keep only the signature
+            lines.append(line[:line.rfind("{") + 1] + " ... }")
+        else:
+            lines.append(line)
+        if code.strip():
+            previous = code.strip()
+
+    # Collapse runs of blank lines left behind by removed bodies
+    text = "\n".join(lines)
+    return re.sub(r"\n\s*\n(\s*\n)+", "\n\n", text).strip("\n")
+
+
+register_parser(".py", python_skeleton)
+register_parser(['.js', '.jsx', '.ts', '.tsx', '.java', '.cs', '.go', '.rs', '.swift', '.kt',
+                 '.c', '.h', '.cpp', '.hpp', '.php', '.dart', '.scala'], brace_skeleton)
@@ -0,0 +1,343 @@
+import os
+import re
+import socket
+import sqlite3
+from datetime import datetime, timedelta
+
+from indexer import content_hash
+
+
+# Files written per executemany batch, each batch in its own transaction
+BATCH_FILES = 1000
+
+# Matching lines listed per file in search results
+MAX_LINES_PER_FILE = 5
+
+# An incomplete snapshot whose writer has not finished a batch for this long is abandoned
+STALE_SNAPSHOT_HOURS = 24
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    root TEXT NOT NULL,
+    name TEXT,
+    revision TEXT,
+    created TEXT NOT NULL,
+    files INTEGER NOT NULL DEFAULT 0,
+    redacted INTEGER NOT NULL DEFAULT 0,
+    complete INTEGER NOT NULL DEFAULT 0,
+    host TEXT,
+    pid INTEGER,
+    heartbeat TEXT
+);
+CREATE INDEX IF NOT EXISTS snapshots_root ON snapshots(root, id);
+CREATE TABLE IF NOT EXISTS blobs (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    hash TEXT,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    status TEXT,
+    PRIMARY KEY (snapshot_id, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS files_hash ON files(hash);
+CREATE VIRTUAL TABLE IF NOT EXISTS blob_text USING fts5(
+    content, content='blobs', content_rowid='id', tokenize="unicode61 tokenchars '_'"
+);
+"""
+
+# Keywords that introduce a definition, for definitions-only searches
+DEFINITION_KEYWORDS = ("def", "class", "function", "func", "fn", "struct", "enum", "interface", "trait",
+                       "type", "impl", "module", "const", "let", "var", "val")
+
+# FTS5 operators, left out when picking the words to show matching lines for
+QUERY_OPERATORS = {"AND", "OR", "NOT", "NEAR"}
+
+
+def default_database_path():
+    """Snapshot database in the config directory"""
+    return os.path.join(os.path.expanduser("~"), ".file_extractor", "snapshots.db")
+
+
+def process_alive(pid):
+    """Whether a process of this host is running; assumed so where that cannot be checked safely"""
+    if os.name == 'nt':
+        # os.kill(pid, 0) sends CTRL_C_EVENT on Windows; the heartbeat decides there
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class SearchHit:
+    """A file in a snapshot whose content matches a search, with the matching lines"""
+
+    __slots__ = ('snapshot_id', 'root', 'name', 'created', 'path', 'lines')
+
+    def __init__(self, snapshot_id, root, name, created, path, lines):
+        self.snapshot_id = snapshot_id
+        self.root = root
+        self.name = name
+        self.created = created
+        self.path = path
+        # (1-based line number, line text) pairs
+        self.lines = lines
+
+    def __repr__(self):
+        return f"SearchHit({self.snapshot_id}, {self.path!r}, {len(self.lines)} lines)"
+
+
+class SnapshotStore:
+    """SQLite store of extraction snapshots with full-text search over file contents.
+
+    Every snapshot records its files (path, content hash, size, mtime). Contents are stored once
+    per distinct hash in blobs, which the FTS5 table blob_text indexes, so unchanged files cost one
+    small row per snapshot. Snapshots are written in batches; one that was interrupted is never
+    returned by queries, and is removed by the next writer once its owner process is gone or
+    has not written for STALE_SNAPSHOT_HOURS.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_database_path()
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        with self.db:
+            self.db.executescript(SCHEMA)
+            # Databases from before snapshots recorded their writer
+            columns = {row[1] for row in self.db.execute("PRAGMA table_info(snapshots)")}
+            for column, column_type in (("host", "TEXT"), ("pid", "INTEGER"), ("heartbeat", "TEXT")):
+                if column not in columns:
+                    self.db.execute(f"ALTER TABLE snapshots ADD COLUMN {column} {column_type}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        self.db.close()
+
+    def add_snapshot(self, root, entries, name=None, revision=None, redact=None, progress_callback=None):
+        """Store the files of a scan as a new snapshot; returns the snapshot id.
+
+        entries are FileEntry records (directories are skipped). redact, when given, is called
+        as redact(rel_path, content) and returns the content to store. Files whose size and
+        mtime match the previous snapshot of the same root reuse its hash without being read.
+        """
+        self.remove_stale_snapshots()
+        now = datetime.now().isoformat(timespec="seconds")
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO snapshots (root, name, revision, created, redacted, host, pid, heartbeat) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (root, name, revision, now, int(redact is not None), socket.gethostname(), os.getpid(), now))
+        snapshot_id = cursor.lastrowid
+        known = self.previous_hashes(root, snapshot_id, redact is not None)
+
+        files = [entry for entry in entries if not entry.is_dir]
+        for start in range(0, len(files), BATCH_FILES):
+            self.write_batch(snapshot_id, files[start:start + BATCH_FILES], known, redact)
+            if progress_callback:
+                progress_callback(min(100, (start + BATCH_FILES) * 100 // len(files)))
+
+        with self.db:
+            self.db.execute("UPDATE snapshots SET files = ?, complete = 1 WHERE id = ?", (len(files), snapshot_id))
+        return snapshot_id
+
+    def remove_stale_snapshots(self):
+        """Delete incomplete snapshots whose writer died or stopped writing; returns their ids.
+
+        Snapshots another process is still writing are left alone.
+        """
+        host = socket.gethostname()
+        cutoff = (datetime.now() - timedelta(hours=STALE_SNAPSHOT_HOURS)).isoformat(timespec="seconds")
+        stale = []
+        for snapshot_id, owner_host, pid, heartbeat in self.db.execute(
+                "SELECT id, host, pid, heartbeat FROM snapshots WHERE complete = 0").fetchall():
+            if heartbeat is None or heartbeat < cutoff or (owner_host == host and pid is not None
+                                                           and pid != os.getpid() and not process_alive(pid)):
+                stale.append(snapshot_id)
+        for snapshot_id in stale:
+            self.delete_snapshot(snapshot_id)
+        return stale
+
+    def previous_hashes(self, root, snapshot_id, redacted):
+        """{path: (size, mtime, hash)} of the latest complete snapshot of root stored the same way"""
+        row = self.db.execute(
+            "SELECT id FROM snapshots WHERE root = ? AND complete = 1 AND redacted = ? AND id < ? "
+            "ORDER BY id DESC LIMIT 1", (root, int(redacted), snapshot_id)).fetchone()
+        if row is None:
+            return {}
+        return {path: (size, mtime, file_hash) for path, size, mtime, file_hash in self.db.execute(
+            "SELECT path, size, mtime, hash FROM files WHERE snapshot_id = ? AND hash IS NOT NULL", row)}
+
+    def write_batch(self, snapshot_id, entries, known, redact):
+        """Write one batch of files and their new contents in a single transaction"""
+        rows = []
+        contents = {}
+        for entry in entries:
+            file_hash = None
+            status = entry.content_status
+            if status is None:
+                previous = known.get(entry.rel_path)
+                if previous and entry.mtime and previous[:2] == (entry.size, entry.mtime):
+                    file_hash = previous[2]
+                else:
+                    try:
+                        content = entry.read_content()
+                    except (OSError, UnicodeError, ValueError):
+                        status = 'error'
+                    else:
+                        if redact is not None:
+                            content = redact(entry.rel_path, content)
+                        file_hash = content_hash(content)
+                        contents[file_hash] = content
+            rows.append((snapshot_id, entry.rel_path, file_hash, entry.size, entry.mtime, status))
+
+        with self.db:
+            if contents:
+                # Only contents not stored yet become blobs and get indexed
+                hashes = list(contents)
+                existing = set()
+                for start in range(0, len(hashes), 500):
+                    chunk = hashes[start:start + 500]
+                    existing.update(row[0] for row in self.db.execute(
+                        f"SELECT hash FROM blobs WHERE hash IN ({','.join('?' * len(chunk))})", chunk))
+                for file_hash, content in contents.items():
+                    if file_hash in existing:
+                        continue
+                    cursor = self.db.execute("INSERT OR IGNORE INTO blobs (hash, size, content) VALUES (?, ?, ?)",
+                                             (file_hash, len(content), content))
+                    if cursor.rowcount == 1:
+                        self.db.execute("INSERT INTO blob_text (rowid, content) VALUES (?, ?)",
+                                        (cursor.lastrowid, content))
+            self.db.executemany("INSERT INTO files (snapshot_id, path, hash, size, mtime, status) "
+                                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.db.execute("UPDATE snapshots SET heartbeat = ? WHERE id = ?",
+                            (datetime.now().isoformat(timespec="seconds"), snapshot_id))
+
+    def list_snapshots(self, root=None):
+        """Complete snapshots, newest first, as dicts"""
+        sql = "SELECT id, root, name, revision, created, files FROM snapshots WHERE complete = 1"
+        params = []
+        if root:
+            sql += " AND root = ?"
+            params.append(root)
+        columns = ("id", "root", "name", "revision", "created", "files")
+        return [dict(zip(columns, row)) for row in self.db.execute(sql + " ORDER BY id DESC", params)]
+
+    def get_snapshot(self, snapshot_id):
+        """A complete snapshot as a dict, or None"""
+        row = self.db.execute("SELECT id, root, name, revision, created, files FROM snapshots "
+                              "WHERE id = ? AND complete = 1", (snapshot_id,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("id", "root", "name", "revision", "created", "files"), row))
+
+    def file_hashes(self, snapshot_id):
+        """{path: content hash} of a snapshot; files without stored content map to '(status)'"""
+        return {path: file_hash or f"({status})" for path, file_hash, status in self.db.execute(
+            "SELECT path, hash, status FROM files WHERE snapshot_id = ?", (snapshot_id,))}
+
+    def read_files(self, snapshot_id, paths):
+        """{path: content} of files in a snapshot; files without stored content read as '[status]'"""
+        contents = {}
+        for start in range(0, len(paths), 500):
+            chunk = paths[start:start + 500]
+            rows = self.db.execute(
+                "SELECT f.path, f.status, b.content FROM files f LEFT JOIN blobs b ON b.hash = f.hash "
+                f"WHERE f.snapshot_id = ? AND f.path IN ({','.join('?' * len(chunk))})", [snapshot_id] + chunk)
+            for path, status, content in rows:
+                contents[path] = content if content is not None else f"[{status}]"
+        return contents
+
+    def delete_snapshot(self, snapshot_id):
+        """Delete a snapshot; contents no other snapshot uses are removed with their index entries"""
+        with self.db:
+            self.db.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+            orphans = self.db.execute("SELECT id, content FROM blobs WHERE hash NOT IN "
+                                      "(SELECT hash FROM files WHERE hash IS NOT NULL)").fetchall()
+            self.db.executemany("INSERT INTO blob_text (blob_text, rowid, content) VALUES ('delete', ?, ?)",
+                                orphans)
+            self.db.executemany("DELETE FROM blobs WHERE id = ?", [(blob_id,) for blob_id, _ in orphans])
+
+    def search(self, query, root=None, snapshot_id=None, latest=False, definitions=False, limit=50):
+        """Find the files whose content matches a query, best matches first.
+
+        query is an FTS5 query (words, "phrases", prefix*, AND/OR/NOT); text that is not valid
+        FTS5 syntax is searched as a phrase. Identifiers with underscores are single words.
+        root or snapshot_id restrict the search, latest keeps only the newest snapshot of each
+        root, and definitions keeps only lines that define a searched word (def, class, fn, ...).
+        """
+        conditions = ["s.complete = 1"]
+        params = []
+        if root:
+            conditions.append("s.root = ?")
+            params.append(root)
+        if snapshot_id is not None:
+            conditions.append("s.id = ?")
+            params.append(snapshot_id)
+        if latest:
+            conditions.append("s.id = (SELECT MAX(id) FROM snapshots WHERE root = s.root AND complete = 1)")
+
+        # Rank the distinct matching contents first, then list the snapshot files that have them
+        sql = ("WITH hits AS (SELECT rowid, rank FROM blob_text WHERE blob_text MATCH ?) "
+               "SELECT s.id, s.root, s.name, s.created, f.path, b.id "
+               "FROM hits JOIN blobs b ON b.id = hits.rowid "
+               "JOIN files f ON f.hash = b.hash JOIN snapshots s ON s.id = f.snapshot_id "
+               f"WHERE {' AND '.join(conditions)} ORDER BY hits.rank, s.id DESC, f.path")
+        try:
+            rows = self.db.execute(sql, [query] + params)
+        except sqlite3.OperationalError:
+            query = '"' + query.replace('"', '""') + '"'
+            rows = self.db.execute(sql, [query] + params)
+
+        line_pattern = self.line_pattern(query, definitions)
+        hits = []
+        contents = {}
+        for snapshot, root_path, name, created, path, blob_id in rows:
+            content = contents.get(blob_id)
+            if content is None:
+                content = self.db.execute("SELECT content FROM blobs WHERE id = ?", (blob_id,)).fetchone()[0]
+                contents[blob_id] = content
+            lines = [(number, line.strip()) for number, line in enumerate(content.split("\n"), 1)
+                     if line_pattern.search(line)][:MAX_LINES_PER_FILE]
+            if definitions and not lines:
+                continue
+            hits.append(SearchHit(snapshot, root_path, name, created, path, lines))
+            if len(hits) >= limit:
+                break
+        return hits
+
+    @staticmethod
+    def line_pattern(query, definitions):
+        """Regex for the lines to show: any searched word or phrase of an FTS5 query, or a definition of one"""
+        phrases = [phrase.replace('""', '"').split() for phrase in re.findall(r'"((?:[^"]|"")*)"', query)]
+        words = [word for word in re.findall(r"\w+\*?", re.sub(r'"(?:[^"]|"")*"', " ", query))
+                 if word not in QUERY_OPERATORS]
+        terms = [r"\s+".join(re.escape(word) for word in phrase) for phrase in phrases if phrase]
+        # word* is a prefix search
+        terms += [re.escape(word[:-1]) + r"\w*" if word.endswith("*") else re.escape(word) for word in words]
+        alternatives = "|".join(terms) or r"(?!)"
+        if definitions:
+            keywords = "|".join(DEFINITION_KEYWORDS)
+            return re.compile(rf"\b(?:{keywords})\s+(?:{alternatives})\b|^\s*(?:{alternatives})\s*(?::|=(?!=))",
+                              re.IGNORECASE)
+        return re.compile(rf"\b(?:{alternatives})", re.IGNORECASE)
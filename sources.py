@@ -0,0 +1,319 @@
+import io
+import os
+import posixpath
+import subprocess
+import tarfile
+import threading
+import time
+import zipfile
+from collections import namedtuple
+
+from cache import list_directory
+from decoder import decode_bytes
+
+ZIP_EXTENSIONS = ('.zip', '.jar', '.whl')
+TAR_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+# A file in a git tree: mode and object id as bytes, size in bytes
+GitBlob = namedtuple('GitBlob', ['mode', 'oid', 'size'])
+
+
+class DirectorySource:
+    """Files and folders on disk.
+
+    Sources share one interface: paths are opaque strings built with join(), list_directory()
+    returns (name, is_dir, is_symlink, handle) tuples sorted by name, and stat() takes the
+    handle from the listing so sources can avoid extra lookups. stat() returns
+    (size, mtime_ns, file_id), where file_id identifies the physical file or is None.
+    read_text() reads a file's bytes once and returns (text, encoding name).
+    """
+
+    def __init__(self, root, scan_cache=None):
+        self.root = root
+        self.name = os.path.basename(os.path.normpath(root))
+        self.scan_cache = scan_cache
+        self.on_disk = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        pass
+
+    def join(self, path, name):
+        return os.path.join(path, name)
+
+    def list_directory(self, path):
+        if self.scan_cache is not None:
+            return self.scan_cache.list_directory(path)
+        return list_directory(path)
+
+    def stat(self, path, handle=None):
+        """Get (size, mtime_ns, file_id) of a file or directory, following symlinks"""
+        st = handle.stat() if handle is not None else os.stat(path)
+        # DirEntry.stat() leaves st_ino at 0 on Windows
+        file_id = (st.st_dev, st.st_ino) if st.st_ino else None
+        return st.st_size, st.st_mtime_ns, file_id
+
+    def read_bytes(self, path):
+        with open(path, "rb") as src:
+            return src.read()
+
+    def read_text(self, path, encodings=None):
+        return decode_bytes(self.read_bytes(path), encodings)
+
+
+class ArchiveSource:
+    """Members of a zip or tar archive, read on demand without extracting the archive.
+
+    The directory structure is built from the member list; directories that only exist
+    implicitly (as prefixes of member names) are included.
+    """
+
+    def __init__(self, archive_path):
+        self.archive_path = archive_path
+        self.name = os.path.basename(archive_path)
+        self.root = ""
+        self.on_disk = False
+        # Directory path -> {name: member or None for directories}
+        self.tree = {"": {}}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def add_member(self, name, member, is_dir):
+        """Add a member to the directory tree, creating implicit parent directories; returns its path"""
+        parts = [part for part in name.replace("\\", "/").split("/") if part and part != "."]
+        if not parts or ".." in parts:
+            return None
+
+        parent = ""
+        for part in parts[:-1]:
+            child = self.join(parent, part)
+            self.tree[parent][part] = None
+            self.tree.setdefault(child, {})
+            parent = child
+
+        path = self.join(parent, parts[-1])
+        if is_dir:
+            self.tree[parent][parts[-1]] = None
+            self.tree.setdefault(path, {})
+        elif path not in self.tree:
+            # Later members replace earlier ones with the same name, as when extracting
+            self.tree[parent][parts[-1]] = member
+        return path
+
+    def join(self, path, name):
+        return posixpath.join(path, name) if path else name
+
+    def list_directory(self, path):
+        children = self.tree.get(path)
+        if children is None:
+            raise NotADirectoryError(path)
+        return [(name, member is None, self.is_symlink(member), member)
+                for name, member in sorted(children.items())]
+
+    def is_symlink(self, member):
+        return False
+
+    def read_text(self, path, encodings=None):
+        return decode_bytes(self.read_bytes(path), encodings)
+
+    def member(self, path):
+        parent, _, name = path.rpartition("/")
+        member = self.tree.get(parent, {}).get(name)
+        if member is None:
+            raise FileNotFoundError(f"No such member: {path}")
+        return member
+
+
+class ZipSource(ArchiveSource):
+    """Members of a zip archive (also .jar and .whl)"""
+
+    def __init__(self, archive_path):
+        super().__init__(archive_path)
+        self.archive = zipfile.ZipFile(archive_path)
+        for info in self.archive.infolist():
+            self.add_member(info.filename, info, info.is_dir())
+
+    def close(self):
+        self.archive.close()
+
+    def stat(self, path, handle=None):
+        info = handle or self.member(path)
+        mtime = time.mktime(info.date_time + (0, 0, -1))
+        return info.file_size, int(mtime * 1_000_000_000), None
+
+    def read_bytes(self, path):
+        return self.archive.read(self.member(path))
+
+
+class TarSource(ArchiveSource):
+    """Members of a tar archive, optionally gzip, bzip2 or xz compressed.
+
+    Compressed streams can only seek forward, while members are read in the walk's sorted order
+    rather than archive order. So the contents of a compressed archive's text members (those with
+    a text_extensions extension and at most max_member_size bytes) are captured while the member
+    list is read, and the stream is decompressed exactly once. Plain tars are read by seeking.
+    """
+
+    def __init__(self, archive_path, max_member_size=None, text_extensions=None):
+        super().__init__(archive_path)
+        self.archive = tarfile.open(archive_path, "r:*")
+        # Member path -> content captured in the listing pass (compressed archives only)
+        self.contents = {}
+        capture = not isinstance(self.archive.fileobj, io.BufferedReader)
+        text_extensions = set(text_extensions) if text_extensions is not None else None
+
+        for info in self.archive:
+            if not (info.isdir() or info.isfile() or info.issym() or info.islnk()):
+                continue
+            path = self.add_member(info.name, info, info.isdir())
+            if (capture and path is not None and info.isfile()
+                    and (max_member_size is None or info.size <= max_member_size)
+                    and (text_extensions is None
+                         or posixpath.splitext(path)[1].lower() in text_extensions)):
+                # The stream is positioned at this member's data now; later it would mean a restart
+                with self.archive.extractfile(info) as src:
+                    self.contents[path] = src.read()
+
+    def close(self):
+        self.archive.close()
+        self.contents.clear()
+
+    def is_symlink(self, member):
+        return member is not None and member.issym()
+
+    def stat(self, path, handle=None):
+        info = handle or self.member(path)
+        return info.size, int(info.mtime * 1_000_000_000), None
+
+    def read_bytes(self, path):
+        if path in self.contents:
+            return self.contents[path]
+        member = self.member(path)
+        if member.islnk():
+            # Hard links share the content of the member they point to
+            target = "/".join(part for part in member.linkname.replace("\\", "/").split("/")
+                              if part and part != ".")
+            if target in self.contents:
+                return self.contents[target]
+        src = self.archive.extractfile(member)
+        if src is None:
+            raise OSError(f"Cannot read member: {path}")
+        with src:
+            return src.read()
+
+
+def resolve_revision(repo_path, revision):
+    """Commit hash and commit time (seconds) of a revision; raises ValueError if it does not exist"""
+    try:
+        commit, commit_time = subprocess.run(
+            ["git", "-C", repo_path, "show", "-s", "--format=%H %ct", f"{revision}^{{commit}}", "--"],
+            capture_output=True, check=True).stdout.split()
+    except subprocess.CalledProcessError as e:
+        message = e.stderr.decode("utf-8", "replace").strip().splitlines()
+        raise ValueError(f"Unknown revision {revision!r}: {message[0] if message else 'git failed'}")
+    return commit.decode("ascii"), int(commit_time)
+
+
+class GitSource(ArchiveSource):
+    """Files of a git revision, read from the object store without a checkout.
+
+    The tree is listed once with git ls-tree; blob contents are streamed through one
+    long-lived git cat-file --batch process instead of a subprocess per file.
+    Every file gets the commit time as its modification time.
+    """
+
+    def __init__(self, repo_path, revision):
+        super().__init__(repo_path)
+        self.name = os.path.basename(os.path.normpath(repo_path))
+        self.revision = revision
+        self.process = None
+        self.lock = threading.Lock()
+
+        self.commit, commit_time = resolve_revision(repo_path, revision)
+        self.mtime = commit_time * 1_000_000_000
+
+        listing = self.git("ls-tree", "-r", "-l", "-z", "--full-tree", self.commit)
+        for record in listing.split(b"\0"):
+            if not record:
+                continue
+            meta, _, name = record.partition(b"\t")
+            mode, obj_type, oid, size = meta.split()
+            path = os.fsdecode(name)
+            if obj_type == b"blob":
+                self.add_member(path, GitBlob(mode, oid, int(size)), False)
+            elif obj_type == b"commit":
+                # Submodules show up as empty directories
+                self.add_member(path, None, True)
+
+    def git(self, *args):
+        """Run a git command in the repository and return its output"""
+        return subprocess.run(["git", "-C", self.archive_path, *args],
+                              capture_output=True, check=True).stdout
+
+    def close(self):
+        if self.process is not None:
+            self.process.stdin.close()
+            self.process.stdout.close()
+            self.process.wait()
+            self.process = None
+
+    def is_symlink(self, member):
+        return member is not None and member.mode == b"120000"
+
+    def stat(self, path, handle=None):
+        blob = handle or self.member(path)
+        return blob.size, self.mtime, None
+
+    def read_bytes(self, path):
+        blob = self.member(path)
+        with self.lock:
+            if self.process is None:
+                self.process = subprocess.Popen(["git", "-C", self.archive_path, "cat-file", "--batch"],
+                                                stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            self.process.stdin.write(blob.oid + b"\n")
+            self.process.stdin.flush()
+
+            # Reply is "<oid> <type> <size>\n<content>\n", or "<oid> missing\n"
+            header = self.process.stdout.readline().split()
+            if len(header) != 3:
+                raise OSError(f"Cannot read object for {path}")
+            data = self.process.stdout.read(int(header[2]))
+            self.process.stdout.read(1)
+            return data
+
+
+def is_archive(path):
+    """Check if a path is a supported archive file"""
+    lower = path.lower()
+    return os.path.isfile(path) and lower.endswith(ZIP_EXTENSIONS + TAR_EXTENSIONS)
+
+
+def open_source(path, scan_cache=None, revision=None, max_member_size=None, text_extensions=None):
+    """Open a directory or supported archive as a source.
+
+    With a revision, path is a git repository and the files of that revision are read instead.
+    max_member_size and text_extensions tell a compressed tar which members' contents to keep
+    from its single decompression pass.
+    """
+    if revision:
+        if not os.path.isdir(path):
+            raise ValueError(f"Not a git repository: {path}")
+        return GitSource(path, revision)
+    if os.path.isdir(path):
+        return DirectorySource(path, scan_cache)
+    if is_archive(path):
+        if path.lower().endswith(ZIP_EXTENSIONS):
+            return ZipSource(path)
+        return TarSource(path, max_member_size, text_extensions)
+    raise ValueError(f"Not a directory or supported archive: {path}")
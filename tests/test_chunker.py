@@ -0,0 +1,79 @@
+import unittest
+
+from chunker import ChunkBuilder, chunk_id
+
+SOURCE = '''import os
+
+LIMIT = 3
+
+
+def first(a):
+    return a + 1
+
+
+class Thing:
+    """A thing."""
+
+    def one(self):
+        return 1
+
+    def two(self):
+        return 2
+'''
+
+
+class ChunkBuilderTest(unittest.TestCase):
+
+    def test_python_blocks_carry_symbols_and_lines(self):
+        records = ChunkBuilder().chunks("pkg/mod.py", SOURCE, ".py")
+        lines = SOURCE.split("\n")
+        self.assertEqual([record["symbol"] for record in records], [None, "first", "Thing"])
+        for record in records:
+            self.assertEqual(record["path"], "pkg/mod.py")
+            self.assertEqual(record["language"], "py")
+            self.assertEqual("\n".join(lines[record["start_line"] - 1:record["end_line"]]), record["content"])
+        self.assertEqual((records[1]["start_line"], records[1]["end_line"]), (6, 7))
+
+    def test_large_class_is_cut_between_methods(self):
+        records = ChunkBuilder(max_chars=60).chunks("mod.py", SOURCE, ".py")
+        thing = [record for record in records if record["symbol"] == "Thing"]
+        self.assertGreater(len(thing), 1)
+        self.assertTrue(all(len(record["content"]) <= 60 for record in records))
+        self.assertTrue(thing[-1]["content"].lstrip().startswith("def two"))
+
+    def test_overlap_repeats_previous_lines(self):
+        text = "\n".join(f"line {number}" for number in range(1, 21))
+        records = ChunkBuilder(max_chars=40, overlap_lines=1).chunks("notes.txt", text, ".txt")
+        for previous, record in zip(records, records[1:]):
+            self.assertEqual(record["start_line"], previous["end_line"])
+
+    def test_paragraphs_for_other_files(self):
+        text = "first paragraph\n\nsecond paragraph\n"
+        records = ChunkBuilder(max_chars=20).chunks("README.md", text, ".md")
+        self.assertEqual([record["content"] for record in records], ["first paragraph", "second paragraph"])
+        self.assertEqual([record["start_line"] for record in records], [1, 3])
+        self.assertTrue(all(record["symbol"] is None for record in records))
+
+    def test_invalid_python_falls_back_to_paragraphs(self):
+        records = ChunkBuilder().chunks("broken.py", "def f(:\n    pass\n", ".py")
+        self.assertEqual(len(records), 1)
+        self.assertIsNone(records[0]["symbol"])
+
+    def test_long_line_is_cut(self):
+        records = ChunkBuilder(max_chars=10).chunks("data.txt", "x" * 25, ".txt")
+        self.assertEqual([len(record["content"]) for record in records], [10, 10, 5])
+
+    def test_ids_survive_lines_added_above(self):
+        before = ChunkBuilder().chunks("mod.py", SOURCE, ".py")
+        after = ChunkBuilder().chunks("mod.py", "# header\n\n" + SOURCE, ".py")
+        self.assertEqual(before[1]["id"], after[1]["id"])
+        self.assertEqual(after[1]["start_line"], before[1]["start_line"] + 2)
+
+    def test_repeated_content_gets_distinct_ids(self):
+        self.assertNotEqual(chunk_id("a.txt", "0" * 64, 0), chunk_id("a.txt", "0" * 64, 1))
+        records = ChunkBuilder(max_chars=5).chunks("a.txt", "same\n\nsame\n", ".txt")
+        self.assertEqual(len({record["id"] for record in records}), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
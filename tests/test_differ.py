@@ -0,0 +1,101 @@
+import io
+import os
+import tempfile
+import unittest
+
+from config import ConfigManager
+from differ import OutputManifest, diff_manifests, diff_texts, parse_sections, parse_tree
+from extractor import FileStructureExtractor
+
+
+def write_file(root, rel_path, content):
+    path = os.path.join(root, *rel_path.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mode = "wb" if isinstance(content, bytes) else "w"
+    with open(path, mode) as f:
+        f.write(content)
+
+
+class DifferTest(unittest.TestCase):
+    """Compares md and txt outputs of two small trees, with and without their section indexes"""
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp.cleanup)
+        manager = ConfigManager.from_dict({})
+        manager.config = manager.get_default_config()
+        manager.config['general']['delete_previous_files'] = False
+        self.extractor = FileStructureExtractor(manager)
+
+        self.old = os.path.join(self.temp.name, "old")
+        self.new = os.path.join(self.temp.name, "new")
+        for root in (self.old, self.new):
+            write_file(root, "README.md", "hello\n")
+            write_file(root, "pkg/a.py", "def f():\n    return 1\n")
+        write_file(self.old, "pkg/gone.txt", "removed\n")
+        write_file(self.old, "pkg/before.txt", "moved content\n")
+        os.makedirs(os.path.join(self.old, "empty"))
+        write_file(self.new, "pkg/a.py", "def f():\n    return 2\n")
+        write_file(self.new, "pkg/after.txt", "moved content\n")
+        write_file(self.new, "pkg/image.bin", b"\x00\x01\x02binary")
+        os.makedirs(os.path.join(self.new, "docs", "drafts"))
+
+    def extract(self, root, file_format):
+        output = os.path.join(self.temp.name, f"{os.path.basename(root)}.{file_format}")
+        success, message = self.extractor.extract_structure(root, output=output)
+        self.assertTrue(success, message)
+        return output
+
+    def check_report(self, report):
+        self.assertEqual(report.added, ["docs/", "docs/drafts/", "pkg/image.bin"])
+        self.assertEqual(report.removed, ["empty/", "pkg/gone.txt"])
+        self.assertEqual(report.renamed, [("pkg/before.txt", "pkg/after.txt")])
+        self.assertEqual([change.path for change in report.changed], ["pkg/a.py"])
+        self.assertEqual((report.changed[0].added, report.changed[0].removed), (1, 1))
+        self.assertEqual(report.unchanged, 1)
+
+    def test_indexed_outputs(self):
+        for file_format in ('md', 'txt'):
+            with self.subTest(file_format=file_format):
+                old = OutputManifest(self.extract(self.old, file_format))
+                new = OutputManifest(self.extract(self.new, file_format))
+                self.assertIsNotNone(new.index)
+                self.check_report(diff_manifests(old, new))
+
+    def test_outputs_without_index(self):
+        for file_format in ('md', 'txt'):
+            with self.subTest(file_format=file_format):
+                old_path = self.extract(self.old, file_format)
+                new_path = self.extract(self.new, file_format)
+                for path in (old_path, new_path):
+                    os.remove(path + ".index.json")
+                old, new = OutputManifest(old_path), OutputManifest(new_path)
+                self.assertIsNone(new.index)
+                self.check_report(diff_manifests(old, new))
+
+    def test_names_only(self):
+        report = diff_manifests(OutputManifest(self.extract(self.old, 'md')),
+                                OutputManifest(self.extract(self.new, 'md')), line_diffs=False)
+        self.assertEqual([change.path for change in report.changed], ["pkg/a.py"])
+        self.assertIsNone(report.changed[0].diff)
+        self.assertIn("1 changed, 1 unchanged", report.summary())
+
+    def test_parse_sections_and_tree(self):
+        out = io.StringIO()
+        self.extractor.extract_structure(self.new, output=out)
+        text = out.getvalue()
+        sections = parse_sections(text, 'md')
+        self.assertEqual(sections["README.md"], "hello\n")
+        self.assertNotIn("pkg/image.bin", sections)
+        self.assertEqual(set(parse_tree(text, 'md')),
+                         {"README.md", "docs/", "docs/drafts/", "pkg/", "pkg/a.py", "pkg/after.txt",
+                          "pkg/image.bin"})
+
+    def test_diff_texts(self):
+        path, added, removed, diff = diff_texts("a.txt", "one\ntwo\n", "one\nthree\nfour\n")
+        self.assertEqual((path, added, removed), ("a.txt", 2, 1))
+        self.assertEqual(diff[:2], ["--- a/a.txt", "+++ b/a.txt"])
+
+
+if __name__ == "__main__":
+    unittest.main()
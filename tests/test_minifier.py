@@ -0,0 +1,34 @@
+import unittest
+
+from minifier import get_language, has_minifier, minify_source
+
+
+class MinifierTest(unittest.TestCase):
+
+    def test_python_drops_comments_and_blank_lines(self):
+        source = "# comment\n\ndef f(x):\n    # inside\n    return x  # trailing\n\n\nVALUE = '# kept'\n"
+        self.assertEqual(minify_source(source, ".py"), "def f(x):\n    return x\nVALUE = '# kept'")
+
+    def test_python_keeps_docstrings_and_code(self):
+        source = 'def f():\n    """Doc."""\n\n    return 1\n'
+        self.assertEqual(minify_source(source, ".py"), 'def f():\n    """Doc."""\n    return 1')
+
+    def test_c_style_comments_outside_strings(self):
+        source = '// line\nvar a = "// not a comment"; /* block */\n\nvar b = 1;\n'
+        self.assertEqual(minify_source(source, ".js"), 'var a = "// not a comment";\nvar b = 1;')
+
+    def test_config_comments(self):
+        self.assertEqual(minify_source("# comment\nkey: value\n\nother: 2\n", ".yaml"), "key: value\nother: 2")
+
+    def test_unparsable_source_is_left_alone(self):
+        self.assertIsNone(minify_source("def f(:\n    '''\n", ".py"))
+
+    def test_registry(self):
+        self.assertTrue(has_minifier(".PY"))
+        self.assertFalse(has_minifier(".txt"))
+        self.assertIsNone(minify_source("text", ".txt"))
+        self.assertEqual(get_language(".py"), "Python")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode
+
+from config import ConfigManager
+from server import ExtractionServer
+
+
+def write_file(root, rel_path, content):
+    path = os.path.join(root, *rel_path.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(content)
+
+
+class ExtractionServerTest(unittest.TestCase):
+    """Requests against a server on an ephemeral localhost port"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp = tempfile.TemporaryDirectory()
+        cls.tree = os.path.join(cls.temp.name, "project")
+        write_file(cls.tree, "README.md", "hello\n")
+        write_file(cls.tree, "pkg/a.py", "def f():\n    return 1\n")
+
+        manager = ConfigManager.from_dict({})
+        manager.config = manager.get_default_config()
+        cls.server = ExtractionServer(("127.0.0.1", 0), manager)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.temp.cleanup()
+
+    def request(self, path, params=None, body=None):
+        """Send a GET (or a POST with body); returns (status, content type, body text)"""
+        url = self.base + path + (f"?{urlencode(params)}" if params else "")
+        data = body if body is None or isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, data=data), timeout=30) as response:
+                return response.status, response.headers["Content-Type"], response.read().decode("utf-8")
+        except urllib.error.HTTPError as e:
+            with e:
+                return e.code, e.headers["Content-Type"], e.read().decode("utf-8")
+
+    def assert_error(self, expected_status, path, params=None, body=None):
+        status, content_type, text = self.request(path, params, body)
+        self.assertEqual(status, expected_status, text)
+        self.assertTrue(content_type.startswith("application/json"))
+        self.assertIn("error", json.loads(text))
+
+    def test_health(self):
+        status, _, text = self.request("/health")
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(text), {"status": "ok"})
+
+    def test_unknown_path(self):
+        self.assert_error(404, "/nothing")
+
+    def test_missing_directory(self):
+        self.assert_error(404, "/extract", {"directory": os.path.join(self.temp.name, "missing")})
+        self.assert_error(404, "/extract")
+
+    def test_unsupported_format(self):
+        self.assert_error(400, "/extract", {"directory": self.tree, "format": "pdf"})
+
+    def test_invalid_body(self):
+        self.assert_error(400, "/extract", body=b"not json")
+        self.assert_error(400, "/extract", body=[self.tree])
+
+    def test_malformed_rule_lists(self):
+        self.assert_error(400, "/extract", body={"directory": self.tree, "folders": "node_modules"})
+        self.assert_error(400, "/extract", body={"directory": self.tree, "extensions": {"excluded": ".py"}})
+
+    def test_invalid_numbers_and_patterns(self):
+        self.assert_error(400, "/extract", {"directory": self.tree, "chunk_chars": "many"})
+        self.assert_error(400, "/extract", {"directory": self.tree, "grep": "(", "regex": "true"})
+
+    def test_unknown_revision(self):
+        self.assert_error(404, "/extract", {"directory": self.tree, "rev": "no-such-revision"})
+
+    def test_extract_markdown(self):
+        status, content_type, text = self.request("/extract", {"directory": self.tree, "format": "md"})
+        self.assertEqual(status, 200)
+        self.assertTrue(content_type.startswith("text/markdown"))
+        self.assertIn(f"# File Structure for: {self.tree}", text)
+        self.assertIn("### FILE: README.md", text)
+        self.assertIn("hello", text)
+        self.assertIn("def f():", text)
+
+    def test_extract_with_rule_override(self):
+        body = {"directory": self.tree, "format": "txt", "extensions": {"excluded": [".py"]}}
+        status, _, text = self.request("/extract", body=body)
+        self.assertEqual(status, 200)
+        self.assertIn("FILE: README.md", text)
+        self.assertNotIn("a.py", text)
+
+    def test_extract_jsonl(self):
+        status, content_type, text = self.request("/extract", {"directory": self.tree, "format": "jsonl"})
+        self.assertEqual(status, 200)
+        self.assertTrue(content_type.startswith("application/x-ndjson"))
+        records = {record["path"]: record for record in map(json.loads, text.splitlines())}
+        self.assertEqual(set(records), {"README.md", "pkg/a.py"})
+        self.assertEqual(records["pkg/a.py"]["symbol"], "f")
+        self.assertEqual((records["pkg/a.py"]["start_line"], records["pkg/a.py"]["end_line"]), (1, 2))
+
+    @unittest.skipUnless(shutil.which("git"), "git is not installed")
+    def test_extract_revision(self):
+        repo = os.path.join(self.temp.name, "repo")
+        write_file(repo, "old.txt", "first\n")
+        environment = dict(os.environ, GIT_AUTHOR_NAME="test", GIT_AUTHOR_EMAIL="test@example.com",
+                           GIT_COMMITTER_NAME="test", GIT_COMMITTER_EMAIL="test@example.com")
+        for command in (["init", "-q"], ["add", "."], ["commit", "-q", "-m", "first"]):
+            subprocess.run(["git", "-C", repo, *command], check=True, env=environment)
+        write_file(repo, "new.txt", "not committed\n")
+
+        status, _, text = self.request("/extract", {"directory": repo, "rev": "HEAD", "format": "txt"})
+        self.assertEqual(status, 200)
+        self.assertIn(f"{repo} @ HEAD", text)
+        self.assertIn("FILE: old.txt", text)
+        self.assertNotIn("new.txt", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from skeleton import has_parser, skeletonize_source
+
+SOURCE = '''"""Module doc."""
+import os
+
+LIMIT = 10
+other = 3
+
+
+class Thing(Base):
+    """A thing."""
+
+    def method(self, x: int) -> str:
+        """Method doc."""
+        return str(x)
+
+
+def helper(a, b=1):
+    y = a + b
+    return y
+'''
+
+
+class SkeletonTest(unittest.TestCase):
+
+    def test_python_keeps_signatures_and_docstrings(self):
+        skeleton = skeletonize_source(SOURCE, ".py")
+        for kept in ('"""Module doc."""', "import os", "LIMIT = 10", "class Thing(Base):", '"""A thing."""',
+                     "def method(self, x: int) -> str:", '"""Method doc."""', "def helper(a, b=1):"):
+            self.assertIn(kept, skeleton)
+        for dropped in ("other = 3", "return str(x)", "y = a + b"):
+            self.assertNotIn(dropped, skeleton)
+        self.assertIn("        ...", skeleton)
+
+    def test_brace_languages(self):
+        source = "function add(a, b) {\n  const c = a + b;\n  return c;\n}\n"
+        skeleton = skeletonize_source(source, ".js")
+        self.assertIn("function add(a, b)", skeleton)
+        self.assertNotIn("const c", skeleton)
+
+    def test_unparsable_python_gives_none(self):
+        self.assertIsNone(skeletonize_source("def f(:\n", ".py"))
+
+    def test_registry(self):
+        self.assertTrue(has_parser(".Py"))
+        self.assertFalse(has_parser(".md"))
+        self.assertIsNone(skeletonize_source("text", ".md"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class DirectoryLister:
+    """Lists directories and stats their files for a depth-first walk, inline or on threads.
+
+    With more than one thread, every listed directory queues its subdirectories right away,
+    so listing and stat round trips for the whole frontier overlap, which pays off on network
+    mounts. The walk still asks for directories in its own sorted depth-first order; when it
+    needs a directory that is still queued, it takes the job back and lists it itself instead
+    of waiting behind the rest of the queue.
+
+    descend(name, is_symlink) decides which subdirectories are queued ahead of time and
+    wants_stat(name) which files are stat'ed. Listings are lists of
+    (name, is_dir, is_symlink, handle, stat) tuples, where stat is the source's
+    (size, mtime_ns, file_id) or None.
+    """
+
+    def __init__(self, source, descend, wants_stat, threads=1):
+        self.source = source
+        self.descend = descend
+        self.wants_stat = wants_stat
+        self.executor = None
+        if threads > 1:
+            self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="walker")
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        """Stop queueing work and drop listings that were never used"""
+        with self.lock:
+            self.closed = True
+            self.pending.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def read(self, path):
+        """List a directory and stat the wanted files"""
+        listing = []
+        for name, is_dir, is_symlink, handle in self.source.list_directory(path):
+            stat = None
+            if not is_dir and self.wants_stat(name):
+                try:
+                    stat = self.source.stat(self.source.join(path, name), handle)
+                except OSError:
+                    pass
+            listing.append((name, is_dir, is_symlink, handle, stat))
+        return listing
+
+    def queue(self, path):
+        """Queue a directory to be listed by the thread pool"""
+        with self.lock:
+            if self.closed or path in self.pending:
+                return
+            try:
+                self.pending[path] = self.executor.submit(self.read_and_queue, path)
+            except RuntimeError:
+                # The pool was shut down by close()
+                pass
+
+    def read_and_queue(self, path):
+        """List a directory, then queue the subdirectories the walk will enter"""
+        listing = self.read(path)
+        for name, is_dir, is_symlink, _, _ in listing:
+            if is_dir and self.descend(name, is_symlink):
+                self.queue(self.source.join(path, name))
+        return listing
+
+    def start(self, root):
+        """Begin listing from the root directory"""
+        if self.executor is not None:
+            self.queue(root)
+
+    def listing(self, path):
+        """Get a directory's listing, waiting for it or listing it in this thread"""
+        if self.executor is None:
+            return self.read(path)
+
+        with self.lock:
+            future = self.pending.pop(path, None)
+        # Not queued (e.g. a followed symlink) or not started yet: list it here
+        if future is None or future.cancel():
+            return self.read_and_queue(path)
+        return future.result()